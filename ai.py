@@ -1,14 +1,23 @@
 import os
 
 from dotenv import load_dotenv
-from openai import OpenAI
 
 from dump_utils import get_current_time_america_new_york, replace_placeholders
 from prompts import SYSTEM_PROMPT, USER_PROMPT
 
 load_dotenv()
 
-client = OpenAI()
+_client = None
+
+
+def get_client():
+    """Returns the OpenAI client, created (and the SDK imported) on first use."""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+
+        _client = OpenAI()
+    return _client
 
 
 async def create_chat_completion(user_message, logger):
@@ -18,7 +27,7 @@ async def create_chat_completion(user_message, logger):
     logger.info("Sending request to OpenAI API. Final prompt: %s", final_prompt)
 
     try:
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": SYSTEM_PROMPT},
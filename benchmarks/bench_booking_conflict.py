@@ -0,0 +1,150 @@
+"""
+Benchmark: answering a booking conflict, with and without alternative slots.
+
+Against the local fakes, each trial books a slot for one caller, then books the same
+slot for another caller and times how long the second caller waits for something to
+offer instead:
+    sequential: /bookslot relays the conflict (ALTERNATIVE_SLOTS=0), then the agent
+        calls /fetchslots for the same time.
+    pipelined: /bookslot returns alternativeSlots with the conflict, looked up while
+        the booking was posted.
+Slots are passed as ISO timestamps, so neither mode waits on the LLM; in a real call
+the sequential mode also pays for another conversational turn.
+
+Usage:
+    python benchmarks/bench_booking_conflict.py [--trials 40] [--ghl-latency-ms 150]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_load import (  # noqa: E402
+    add_upstream_arguments,
+    configure_environment,
+    percentile,
+    start_fakes,
+    tool_call_payload,
+)
+from fakes import ServerThread  # noqa: E402
+
+from utils.ghl import add_business_days  # noqa: E402
+from utils.tz import get_zone  # noqa: E402
+
+TIMEZONE = "America/New_York"
+
+
+def trial_slots(trials, slots_per_day):
+    """Distinct future slots the fake GoHighLevel offers, starting two business days out."""
+    step = timedelta(minutes=max(9 * 60 // max(slots_per_day, 1), 1))
+    day = add_business_days(date.today(), 2)
+    slots = []
+    while len(slots) < trials:
+        start = datetime(day.year, day.month, day.day, 8, tzinfo=get_zone(TIMEZONE))
+        slots.extend(
+            (start + step * index).isoformat() for index in range(slots_per_day)
+        )
+        day = add_business_days(day, 1)
+    return slots[:trials]
+
+
+def booking(slot, phone):
+    return tool_call_payload(
+        "bookSlot",
+        {
+            "selectedSlot": slot,
+            "firstName": "Ada",
+            "lastName": "Lovelace",
+            "phone": phone,
+        },
+    )
+
+
+async def run_trials(base_url, mode, slots, tool_settings):
+    # Resolved at startup, so switched on the running app's settings
+    tool_settings.alternative_slots = 0 if mode == "sequential" else 3
+    latencies = []
+    offered = 0
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        for index, slot in enumerate(slots):
+            await client.post("/bookslot", json=booking(slot, f"+1555{index:07d}"))
+            started = time.perf_counter()
+            response = await client.post(
+                "/bookslot", json=booking(slot, f"+1666{index:07d}")
+            )
+            result = response.json()["results"][0]["result"]
+            alternatives = result.get("alternativeSlots")
+            if mode == "sequential":
+                response = await client.post(
+                    "/fetchslots",
+                    json=tool_call_payload("fetchSlots", {"selectedSlot": slot}),
+                )
+                alternatives = response.json()["results"][0].get("result")
+            latencies.append((time.perf_counter() - started) * 1000)
+            offered += bool(alternatives)
+    latencies.sort()
+    return {
+        "trials": len(slots),
+        "with_alternatives": offered,
+        "mean_ms": round(statistics.fmean(latencies), 1),
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trials", type=int, default=40)
+    parser.add_argument("--output", default="bench_booking_conflict.json")
+    add_upstream_arguments(parser)
+    args = parser.parse_args()
+
+    ghl, openai_server = start_fakes(args)
+    configure_environment(ghl.url, openai_server.url)
+    import main as server_main
+
+    slots = trial_slots(args.trials * 2, args.slots_per_day)
+    results = {}
+    app_server = ServerThread(server_main.app).start()
+    try:
+        # Each mode books its own slots, so neither finds the other's bookings
+        for mode, mode_slots in (
+            ("sequential", slots[: args.trials]),
+            ("pipelined", slots[args.trials :]),
+        ):
+            results[mode] = asyncio.run(
+                run_trials(
+                    app_server.url,
+                    mode,
+                    mode_slots,
+                    server_main.app.state.registry.tool_settings,
+                )
+            )
+            print(f"{mode:<10} {json.dumps(results[mode])}")
+    finally:
+        app_server.stop()
+        ghl.stop()
+        openai_server.stop()
+
+    report = {
+        "benchmark": "booking_conflict",
+        "config": vars(args),
+        "upstream_requests": {"ghl": ghl.server.config.app.state.requests},
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
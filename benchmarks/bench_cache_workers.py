@@ -0,0 +1,134 @@
+"""
+Benchmark: slot cache hit rate as workers are added, per-worker memory vs. shared Redis.
+
+Each simulated worker owns a SlotCache; requests for a handful of calendars and
+day windows are spread round-robin over the workers, as a load balancer would. With
+the memory backend every worker warms its own copy, so the hit rate falls as workers
+are added; with the Redis backend they share one store. Bookings invalidate a day on
+one worker and must reach the others.
+
+Runs against fakeredis unless --redis-url points at a server (e.g. a local
+redis-server started with `redis-server --port 6379`).
+
+Usage:
+    python benchmarks/bench_cache_workers.py [--requests 2000] [--workers 1 2 4 8]
+        [--redis-url redis://localhost:6379/15]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.cache import MemoryBackend, SlotCache  # noqa: E402
+from utils.cache_backend import RedisBackend  # noqa: E402
+
+TIMEZONE = "America/New_York"
+
+
+def redis_client_factory(redis_url):
+    if redis_url:
+        import redis.asyncio as redis_asyncio
+
+        return lambda: redis_asyncio.from_url(redis_url)
+    import fakeredis
+
+    server = fakeredis.FakeServer()
+    return lambda: fakeredis.FakeAsyncRedis(server=server)
+
+
+async def run(backends, requests, calendars, windows, book_ratio, seed):
+    caches = [SlotCache(ttl=300, maxsize=512, backend=backend) for backend in backends]
+    random.seed(seed)
+    first_day = date(2026, 11, 2)
+    fetches = hits = 0
+    for request in range(requests):
+        cache = caches[request % len(caches)]
+        calendar_id = f"calendar-{random.randrange(calendars)}"
+        start_day = first_day + timedelta(days=random.randrange(windows))
+        end_day = start_day + timedelta(days=1)
+        if random.random() < book_ratio:
+            await cache.invalidate_day("default", calendar_id, TIMEZONE, start_day)
+            continue
+        if (
+            await cache.get("default", calendar_id, TIMEZONE, start_day, end_day)
+            is not None
+        ):
+            hits += 1
+        else:
+            fetches += 1
+            await cache.set(
+                "default",
+                calendar_id,
+                TIMEZONE,
+                start_day,
+                end_day,
+                {"slots": {"slots": []}},
+            )
+    return {
+        "hit_rate": round(hits / max(hits + fetches, 1), 3),
+        "upstream_fetches": fetches,
+    }
+
+
+async def main_async(args):
+    new_redis_client = redis_client_factory(args.redis_url)
+    results = {}
+    for workers in args.workers:
+        memory = await run(
+            [MemoryBackend() for _ in range(workers)],
+            args.requests,
+            args.calendars,
+            args.windows,
+            args.book_ratio,
+            args.seed,
+        )
+        backends = [
+            RedisBackend(client=new_redis_client(), prefix=f"bench{workers}:")
+            for _ in range(workers)
+        ]
+        await backends[0].client.flushdb()
+        shared = await run(
+            backends,
+            args.requests,
+            args.calendars,
+            args.windows,
+            args.book_ratio,
+            args.seed,
+        )
+        for backend in backends:
+            await backend.close()
+        results[workers] = {"memory": memory, "redis": shared}
+        print(
+            f"{workers} workers: memory hit rate {memory['hit_rate']:.1%} "
+            f"({memory['upstream_fetches']} fetches), redis hit rate "
+            f"{shared['hit_rate']:.1%} ({shared['upstream_fetches']} fetches)"
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--calendars", type=int, default=5)
+    parser.add_argument("--windows", type=int, default=10)
+    parser.add_argument("--book-ratio", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--redis-url")
+    parser.add_argument("--output", default="bench_cache_workers.json")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    report = {"benchmark": "cache_workers", "config": vars(args), "results": results}
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Micro-benchmark: request decoding and response encoding, stdlib json vs. utils.codec.
+
+The request side decodes a Vapi tool-call webhook with a large `message` envelope and
+reads the tool call's arguments; the response side renders a fetchSlots result.
+
+Usage:
+    python benchmarks/bench_codec.py [--transcript-messages 200] [--repeat 2000]
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_load import tool_call_payload  # noqa: E402
+
+from utils.codec import FastJSONResponse, orjson, parse_tool_calls  # noqa: E402
+
+
+def build_body(transcript_messages):
+    payload = tool_call_payload("fetchSlots", {"selectedSlot": "tomorrow at 2 PM"})
+    payload["message"]["artifact"]["messages"] = [
+        {
+            "role": "user" if i % 2 else "bot",
+            "message": "I'd like to come in sometime next week, ideally a morning.",
+            "time": 1718000000000 + i * 1000,
+            "secondsFromStart": i * 1.5,
+        }
+        for i in range(transcript_messages)
+    ]
+    payload["message"]["artifact"]["transcript"] = "\n".join(
+        message["message"] for message in payload["message"]["artifact"]["messages"]
+    )
+    return json.dumps(payload).encode("utf-8")
+
+
+def legacy_parse(body):
+    # What `await request.json()` plus the handlers' .get() chains did
+    request_body = json.loads(body)
+    tool_calls = request_body.get("message", {}).get("toolCalls", [])
+    return [
+        (
+            tool_call.get("id"),
+            tool_call.get("function", {}).get("arguments", {}).get("selectedSlot"),
+        )
+        for tool_call in tool_calls
+    ]
+
+
+def fast_parse(body):
+    return [
+        (tool_call.id, tool_call.arguments.get("selectedSlot"))
+        for tool_call in parse_tool_calls(body)
+    ]
+
+
+def bench(label, fn, repeat):
+    per_call = min(timeit.repeat(fn, number=repeat, repeat=5)) / repeat
+    print(f"{label:<44} {per_call * 1e6:>12.2f} us")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transcript-messages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    body = build_body(args.transcript_messages)
+    content = {
+        "results": [
+            {
+                "toolCallId": "call_0123456789abcdefghijklmn",
+                "result": ["2024-06-04T09:00:00-04:00", "2024-06-05T08:00:00-04:00"],
+            }
+        ]
+    }
+    assert legacy_parse(body) == fast_parse(body)
+    assert json.loads(JSONResponse(content).body) == json.loads(
+        FastJSONResponse(content).body
+    )
+
+    print(f"request body: {len(body)} bytes, orjson: {orjson is not None}\n")
+    legacy = bench(
+        "parse (json.loads + .get chains)", lambda: legacy_parse(body), args.repeat
+    )
+    fast = bench("parse (codec, ToolCall)", lambda: fast_parse(body), args.repeat)
+    print(f"  speedup: {legacy / fast:.1f}x\n")
+
+    legacy = bench("render (JSONResponse)", lambda: JSONResponse(content), args.repeat)
+    fast = bench(
+        "render (FastJSONResponse)", lambda: FastJSONResponse(content), args.repeat
+    )
+    print(f"  speedup: {legacy / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
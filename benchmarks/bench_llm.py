@@ -0,0 +1,110 @@
+"""
+Benchmark: time-to-result of the LLM date extraction against a fake OpenAI API.
+
+Compares the original request (full completion, no token cap) with a capped
+completion and with streaming early exit, which stops reading as soon as a complete
+ISO 8601 timestamp has arrived. The fake model answers with the timestamp followed by
+`--notes`, as the real one sometimes does despite the prompt.
+
+Usage:
+    python benchmarks/bench_llm.py [--requests 50] [--concurrency 8]
+        [--ttft-ms 300] [--token-latency-ms 20]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_load import percentile  # noqa: E402
+from fakes import FakeUpstreamConfig, ServerThread, create_fake_openai_app  # noqa: E402
+
+DEFAULT_NOTES = (
+    "\n\nNote: the user asked for tomorrow morning, so I used 10:00 AM in the EDT"
+    " offset because the date falls between March and November."
+)
+
+MODES = {
+    # name: (stream, max_tokens, json_mode)
+    "full": (False, 0, False),
+    "capped": (False, 32, False),
+    "stream": (True, 32, False),
+    "stream_json": (True, 32, True),
+}
+
+
+async def run_mode(agent, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            success, _ = await agent.extract_date_time("tomorrow morning")
+            latencies.append((time.perf_counter() - started) * 1000)
+            failures += not success
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    latencies.sort()
+    return {
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "failures": failures,
+    }
+
+
+async def run(args, base_url):
+    os.environ.update(OPENAI_API_KEY="sk-benchmark", OPENAI_BASE_URL=f"{base_url}/v1")
+    from chat_gpt_agent import ChatGPTAgent
+
+    results = {}
+    for name, (stream, max_tokens, json_mode) in MODES.items():
+        agent = ChatGPTAgent()
+        agent.stream, agent.max_tokens, agent.json_mode = stream, max_tokens, json_mode
+        await run_mode(agent, min(args.concurrency, args.requests), args.concurrency)
+        results[name] = await run_mode(agent, args.requests, args.concurrency)
+        await agent.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--ttft-ms", type=float, default=300.0)
+    parser.add_argument("--token-latency-ms", type=float, default=20.0)
+    parser.add_argument("--notes", default=DEFAULT_NOTES)
+    parser.add_argument("--output", default="bench_llm.json")
+    args = parser.parse_args()
+
+    fake = ServerThread(
+        create_fake_openai_app(
+            FakeUpstreamConfig(
+                latency_ms=args.ttft_ms,
+                jitter_ms=args.ttft_ms / 10,
+                token_latency_ms=args.token_latency_ms,
+                notes=args.notes,
+            )
+        )
+    ).start()
+    try:
+        results = asyncio.run(run(args, fake.url))
+    finally:
+        fake.stop()
+
+    report = {"benchmark": "llm", "config": vars(args), "results": results}
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(json.dumps(results, indent=2))
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Offline load benchmark for /fetchslots and /bookslot.
+
+Starts local fake GoHighLevel and OpenAI servers, points the app from main.py at them,
+drives it with Vapi-style tool-call payloads at a fixed concurrency and writes
+p50/p95/p99 latency and throughput per route to a JSON file.
+
+Usage:
+    python benchmarks/bench_load.py --concurrency 32 --requests 2000 --output bench_load.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fakes import (  # noqa: E402
+    FakeUpstreamConfig,
+    ServerThread,
+    create_fake_ghl_app,
+    create_fake_openai_app,
+)
+
+# Phrases the rule-based parser resolves, and phrases only the LLM understands
+FAST_PATH_PHRASES = [
+    "tomorrow at 2 PM",
+    "Monday morning",
+    "next Friday afternoon",
+    "Wednesday at 10:30 am",
+    "tomorrow evening",
+]
+LLM_PHRASES = [
+    "sometime after lunch on the 21st",
+    "the first thing next week",
+    "whenever works after my doctor's appointment on Thursday",
+]
+
+
+def tool_call_payload(name, arguments):
+    call_id = f"call_{uuid.uuid4().hex[:24]}"
+    return {
+        "message": {
+            "type": "tool-calls",
+            "timestamp": int(time.time() * 1000),
+            "call": {
+                "id": str(uuid.uuid4()),
+                "orgId": str(uuid.uuid4()),
+                "type": "inboundPhoneCall",
+                "status": "in-progress",
+                "assistantId": str(uuid.uuid4()),
+                "phoneNumberId": str(uuid.uuid4()),
+                "customer": {"number": "+15555550100"},
+            },
+            "toolCalls": [
+                {
+                    "id": call_id,
+                    "type": "function",
+                    "function": {"name": name, "arguments": arguments},
+                }
+            ],
+            "toolWithToolCallList": [
+                {
+                    "type": "function",
+                    "function": {"name": name, "parameters": {"type": "object"}},
+                    "toolCall": {"id": call_id},
+                }
+            ],
+            "artifact": {
+                "messages": [
+                    {"role": "bot", "message": "When would you like to come in?"}
+                ]
+                * 20
+            },
+        }
+    }
+
+
+def make_request(book_ratio, llm_ratio):
+    phrases = LLM_PHRASES if random.random() < llm_ratio else FAST_PATH_PHRASES
+    arguments = {"selectedSlot": random.choice(phrases)}
+    if random.random() < book_ratio:
+        arguments.update(
+            firstName="Ada",
+            lastName="Lovelace",
+            phone=f"+1555{random.randint(0, 9999999):07d}",
+        )
+        return "/bookslot", tool_call_payload("bookSlot", arguments)
+    return "/fetchslots", tool_call_payload("fetchSlots", arguments)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    summary = {}
+    for route, values in sorted(latencies.items()):
+        values.sort()
+        summary[route] = {
+            "requests": len(values),
+            "errors": errors.get(route, 0),
+            "rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(values, 0.50), 2),
+            "p95_ms": round(percentile(values, 0.95), 2),
+            "p99_ms": round(percentile(values, 0.99), 2),
+            "max_ms": round(values[-1], 2),
+        }
+    total = sum(len(values) for values in latencies.values())
+    summary["all"] = {
+        "requests": total,
+        "errors": sum(errors.values()),
+        "rps": round(total / elapsed, 2),
+    }
+    return summary
+
+
+async def drive(base_url, requests, concurrency, book_ratio=0.2, llm_ratio=0.2):
+    """
+    Sends `requests` tool calls to base_url from `concurrency` workers.
+
+    A request counts as an error when the HTTP status is not 200 or any result
+    carries an "error" entry.
+
+    Returns:
+        dict: Per-route p50/p95/p99 latency, error count and requests per second.
+    """
+    latencies = {}
+    errors = {}
+    remaining = iter(range(requests))
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=60
+    ) as client:
+
+        async def worker():
+            for _ in remaining:
+                route, payload = make_request(book_ratio, llm_ratio)
+                started = time.perf_counter()
+                try:
+                    response = await client.post(route, json=payload)
+                    failed = response.status_code != 200 or any(
+                        "error" in result for result in response.json()["results"]
+                    )
+                except httpx.HTTPError:
+                    failed = True
+                latencies.setdefault(route, []).append(
+                    (time.perf_counter() - started) * 1000
+                )
+                if failed:
+                    errors[route] = errors.get(route, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return summarize(latencies, errors, elapsed)
+
+
+def start_fakes(args):
+    ghl = ServerThread(
+        create_fake_ghl_app(
+            FakeUpstreamConfig(
+                latency_ms=args.ghl_latency_ms,
+                jitter_ms=args.ghl_latency_ms / 5,
+                error_rate=args.ghl_error_rate,
+                slots_per_day=args.slots_per_day,
+            )
+        )
+    ).start()
+    openai_server = ServerThread(
+        create_fake_openai_app(
+            FakeUpstreamConfig(
+                latency_ms=args.openai_latency_ms,
+                jitter_ms=args.openai_latency_ms / 2,
+                error_rate=args.openai_error_rate,
+            )
+        )
+    ).start()
+    return ghl, openai_server
+
+
+def configure_environment(ghl_url, openai_url):
+    """Points the app at the fakes; must run before main.py is imported."""
+    os.environ.update(
+        GHL_BASE_URL=f"{ghl_url}/v1",
+        OPENAI_BASE_URL=f"{openai_url}/v1",
+        OPENAI_API_KEY="sk-benchmark",
+        CALENDAR_ID="benchmark-calendar",
+        AUTH_TOKEN="benchmark-token",
+    )
+    os.environ.setdefault(
+        "LOG_FILE", os.path.join(tempfile.gettempdir(), "ghl-server-bench.log")
+    )
+
+
+def add_upstream_arguments(parser):
+    parser.add_argument("--ghl-latency-ms", type=float, default=150.0)
+    parser.add_argument("--ghl-error-rate", type=float, default=0.0)
+    parser.add_argument("--openai-latency-ms", type=float, default=800.0)
+    parser.add_argument("--openai-error-rate", type=float, default=0.0)
+    parser.add_argument("--slots-per-day", type=int, default=18)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--book-ratio", type=float, default=0.2)
+    parser.add_argument("--llm-ratio", type=float, default=0.2)
+    parser.add_argument("--output", default="bench_load.json")
+    add_upstream_arguments(parser)
+    args = parser.parse_args()
+
+    ghl, openai_server = start_fakes(args)
+    configure_environment(ghl.url, openai_server.url)
+    import main as server_main
+
+    app_server = ServerThread(server_main.app).start()
+    try:
+        summary = asyncio.run(
+            drive(
+                app_server.url,
+                args.requests,
+                args.concurrency,
+                book_ratio=args.book_ratio,
+                llm_ratio=args.llm_ratio,
+            )
+        )
+    finally:
+        app_server.stop()
+        ghl.stop()
+        openai_server.stop()
+
+    report = {
+        "benchmark": "load",
+        "config": vars(args),
+        "upstream_requests": {
+            "ghl": ghl.server.config.app.state.requests,
+            "openai": openai_server.server.config.app.state.requests,
+        },
+        "results": summary,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(json.dumps(report["results"], indent=2))
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
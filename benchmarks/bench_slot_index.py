@@ -0,0 +1,135 @@
+"""
+Micro-benchmark: SlotIndex selection vs. the previous per-slot strptime helpers.
+
+Usage:
+    python benchmarks/bench_slot_index.py [--days 30] [--slots-per-day 96] [--repeat 20]
+"""
+
+import argparse
+import sys
+import timeit
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytz
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from dump_utils import filter_slots_by_time_range  # noqa: E402
+from utils.ghl import get_first_slots  # noqa: E402
+from utils.slot_index import slot_epoch_ms  # noqa: E402
+
+EDT = pytz.timezone("America/New_York")
+
+
+def legacy_get_first_slots(slot_data, current_datetime_str):
+    first_slots = []
+    edt_timezone = pytz.timezone("America/New_York")
+    current_datetime = datetime.strptime(
+        current_datetime_str, "%Y-%m-%d %H:%M:%S%z"
+    ).astimezone(edt_timezone)
+    for key_count, (date, slots_info) in enumerate(slot_data.items()):
+        if key_count == 0:
+            found_slot = False
+            for slot_str in slots_info["slots"]:
+                slot_datetime = datetime.strptime(
+                    slot_str, "%Y-%m-%dT%H:%M:%S%z"
+                ).astimezone(edt_timezone)
+                if slot_datetime >= current_datetime + timedelta(hours=1):
+                    first_slots.append((date, slot_str))
+                    found_slot = True
+                    break
+            if not found_slot and slots_info["slots"]:
+                first_slots.append((date, slots_info["slots"][-1]))
+        elif key_count == 1 and slots_info["slots"]:
+            first_slots.append((date, slots_info["slots"][0]))
+    return first_slots
+
+
+def legacy_filter_slots_by_time_range(slots, start_epoch_ms, end_epoch_ms):
+    tz = pytz.timezone("America/New_York")
+    filtered_slots = []
+    for slot in slots:
+        slot_epoch = int(datetime.fromisoformat(slot).astimezone(tz).timestamp()) * 1000
+        if start_epoch_ms <= slot_epoch <= end_epoch_ms:
+            filtered_slots.append(slot)
+    return filtered_slots
+
+
+def build_slot_data(days, slots_per_day):
+    start = EDT.localize(datetime(2024, 6, 3))
+    step = timedelta(minutes=24 * 60 // slots_per_day)
+    slot_data = {}
+    for day in range(days):
+        day_start = EDT.normalize(start + timedelta(days=day))
+        slot_data[day_start.strftime("%Y-%m-%d")] = {
+            "slots": [
+                EDT.normalize(day_start + step * i).isoformat()
+                for i in range(slots_per_day)
+            ]
+        }
+    return slot_data
+
+
+def bench(label, fn, repeat):
+    per_call = min(timeit.repeat(fn, number=1, repeat=repeat))
+    print(f"{label:<44} {per_call * 1e6:>12.1f} us")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--slots-per-day", type=int, default=96)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    slot_data = build_slot_data(args.days, args.slots_per_day)
+    first_date = next(iter(slot_data))
+    all_slots = [slot for info in slot_data.values() for slot in info["slots"]]
+    # Late in the first day, so the legacy scan walks almost every slot
+    current = first_date + " 22:00:00-04:00"
+    range_start = slot_epoch_ms(all_slots[len(all_slots) // 3])
+    range_end = slot_epoch_ms(all_slots[len(all_slots) // 2])
+
+    assert get_first_slots(slot_data, current) == legacy_get_first_slots(
+        slot_data, current
+    )
+    assert filter_slots_by_time_range(
+        all_slots, range_start, range_end
+    ) == legacy_filter_slots_by_time_range(all_slots, range_start, range_end)
+
+    print(f"{len(all_slots)} slots over {args.days} days\n")
+    legacy = bench(
+        "get_first_slots (strptime per slot)",
+        lambda: legacy_get_first_slots(slot_data, current),
+        args.repeat,
+    )
+    slot_epoch_ms.cache_clear()
+    cold = bench(
+        "get_first_slots (SlotIndex, cold parse)",
+        lambda: (slot_epoch_ms.cache_clear(), get_first_slots(slot_data, current)),
+        args.repeat,
+    )
+    warm = bench(
+        "get_first_slots (SlotIndex, memoized parse)",
+        lambda: get_first_slots(slot_data, current),
+        args.repeat,
+    )
+    print(f"  speedup: {legacy / cold:.1f}x cold, {legacy / warm:.1f}x warm\n")
+
+    legacy = bench(
+        "filter_slots_by_time_range (per slot)",
+        lambda: legacy_filter_slots_by_time_range(all_slots, range_start, range_end),
+        args.repeat,
+    )
+    warm = bench(
+        "filter_slots_by_time_range (bisect)",
+        lambda: filter_slots_by_time_range(all_slots, range_start, range_end),
+        args.repeat,
+    )
+    print(f"  speedup: {legacy / warm:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
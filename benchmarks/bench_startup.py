@@ -0,0 +1,144 @@
+"""
+Cold start benchmark: how long `import main` takes, from `python -X importtime`.
+
+Imports main.py in fresh interpreters, reports the median cumulative import time
+and the slowest modules, and fails (exit status 1) when the median exceeds the
+budget or a module that must stay off the serving path gets imported: SDKs the
+lifespan loads (openai), optional backends (redis), the launcher (uvicorn) and the
+legacy helpers (ai, ghl, dump_utils, requests, pytz).
+
+Also times the app lifespan (Registry startup and shutdown) on its own.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--budget-ms 800]
+        [--output benchmarks/bench_startup.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+FORBIDDEN_MODULES = (
+    "openai",
+    "redis",
+    "uvicorn",
+    "ai",
+    "ghl",
+    "dump_utils",
+    "requests",
+    "pytz",
+)
+
+LIFESPAN_SCRIPT = """
+import asyncio, json, time
+import main
+
+async def run():
+    started = time.perf_counter()
+    async with main.lifespan(main.app):
+        ready = time.perf_counter()
+    return ready - started, time.perf_counter() - ready
+
+startup, shutdown = asyncio.run(run())
+print(json.dumps({"startup_ms": startup * 1000, "shutdown_ms": shutdown * 1000}))
+"""
+
+
+def environment():
+    return {
+        **os.environ,
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-benchmark"),
+        "LOG_FILE": os.path.join(tempfile.gettempdir(), "ghl-server-bench.log"),
+        "WARMUP": "false",
+        "SLOT_PREFETCH": "false",
+    }
+
+
+def parse_importtime(stderr):
+    """Returns {module: (self_us, cumulative_us)} from -X importtime output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def import_main():
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT,
+        env=environment(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(completed.stderr)
+
+
+def time_lifespan():
+    completed = subprocess.run(
+        [sys.executable, "-c", LIFESPAN_SCRIPT],
+        cwd=ROOT,
+        env=environment(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=800.0)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument(
+        "--output", default=str(Path(__file__).resolve().parent / "bench_startup.json")
+    )
+    args = parser.parse_args()
+
+    runs = [import_main() for _ in range(args.runs)]
+    import_ms = statistics.median(modules["main"][1] / 1000 for modules in runs)
+    slowest = sorted(runs[-1].items(), key=lambda item: item[1][0], reverse=True)
+    forbidden = sorted(set(FORBIDDEN_MODULES) & set(runs[-1]))
+    lifespan = [time_lifespan() for _ in range(args.runs)]
+    startup_ms = statistics.median(run["startup_ms"] for run in lifespan)
+
+    print(
+        f"import main: {import_ms:.0f} ms (median of {args.runs}, budget {args.budget_ms:.0f} ms)"
+    )
+    print(f"lifespan startup: {startup_ms:.0f} ms")
+    print("slowest modules (self time):")
+    for name, (self_us, _) in slowest[: args.top]:
+        print(f"  {self_us / 1000:>8.1f} ms  {name}")
+    if forbidden:
+        print(f"imported on the serving path: {', '.join(forbidden)}")
+
+    report = {
+        "benchmark": "startup",
+        "config": vars(args),
+        "import_ms": round(import_ms, 1),
+        "lifespan_startup_ms": round(startup_ms, 1),
+        "modules": len(runs[-1]),
+        "forbidden_imported": forbidden,
+        "slowest_modules_ms": {
+            name: round(self_us / 1000, 2) for name, (self_us, _) in slowest[: args.top]
+        },
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"wrote {args.output}")
+    if forbidden or import_ms > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
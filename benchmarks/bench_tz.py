@@ -0,0 +1,154 @@
+"""
+Micro-benchmark: utils.tz offset tables vs. the previous pytz helpers.
+
+Times the conversions the slot search makes per request: the search window (next
+business day, then a formatted "+HH:MM" string parsed back to epoch milliseconds),
+the cache's day window, epoch to local date, and epoch to ISO 8601 string.
+
+Usage:
+    python benchmarks/bench_tz.py [--samples 1000] [--repeat 20]
+"""
+
+import argparse
+import random
+import sys
+import timeit
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+
+import pytz
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.api import first_search_window  # noqa: E402
+from utils.ghl import add_business_days, day_window_epoch_ms  # noqa: E402
+from utils.tz import (  # noqa: E402
+    epoch_ms_to_date,
+    epoch_ms_to_isoformat,
+    local_to_epoch_ms,
+    offset_table,
+)
+
+TIMEZONE = "America/New_York"
+
+
+def legacy_get_next_business_day(datetime_edt):
+    edt_timezone = pytz.timezone("America/New_York")
+    if datetime_edt.weekday() < 5:
+        return datetime_edt
+    days_until_next_weekday = (7 - datetime_edt.weekday()) % 7
+    next_weekday = datetime_edt.date() + timedelta(days=days_until_next_weekday)
+    return edt_timezone.localize(datetime.combine(next_weekday, time(8, 0)))
+
+
+def legacy_format_datetime_with_offset(dt):
+    offset = dt.strftime("%z")
+    return dt.strftime("%Y-%m-%d %H:%M:%S") + offset[:3] + ":" + offset[3:]
+
+
+def legacy_datetime_str_to_epoch_ms(datetime_str, timezone_str="America/New_York"):
+    dt = datetime.strptime(datetime_str, "%Y-%m-%d %H:%M:%S%z")
+    tz = pytz.timezone(timezone_str)
+    if dt.tzinfo != tz:
+        dt = dt.astimezone(tz)
+    return int(dt.timestamp() * 1000)
+
+
+def legacy_first_search_window(epoch_ms):
+    edt_timezone = pytz.timezone(TIMEZONE)
+    current = datetime.fromtimestamp(epoch_ms / 1000, edt_timezone)
+    start_date = legacy_get_next_business_day(current)
+    start = legacy_datetime_str_to_epoch_ms(
+        legacy_format_datetime_with_offset(start_date)
+    )
+    end_date = edt_timezone.localize(
+        datetime.combine(add_business_days(start_date.date(), 1), time(17, 0))
+    )
+    end = legacy_datetime_str_to_epoch_ms(legacy_format_datetime_with_offset(end_date))
+    return start, end
+
+
+def legacy_day_window_epoch_ms(start_day, end_day, timezone_str=TIMEZONE):
+    tz = pytz.timezone(timezone_str)
+    start = tz.localize(datetime.combine(start_day, time.min))
+    end = tz.localize(datetime.combine(end_day + timedelta(days=1), time.min))
+    return int(start.timestamp() * 1000), int(end.timestamp() * 1000) - 1
+
+
+def legacy_epoch_ms_to_date(epoch_ms, timezone_str=TIMEZONE):
+    return datetime.fromtimestamp(epoch_ms / 1000, pytz.timezone(timezone_str)).date()
+
+
+def legacy_epoch_ms_to_isoformat(epoch_ms, timezone_str=TIMEZONE):
+    return datetime.fromtimestamp(
+        epoch_ms // 1000, pytz.timezone(timezone_str)
+    ).isoformat()
+
+
+def bench(label, fn, samples, repeat):
+    per_call = min(timeit.repeat(fn, number=1, repeat=repeat)) / len(samples)
+    print(f"{label:<44} {per_call * 1e6:>10.2f} us")
+    return per_call
+
+
+def compare(name, legacy, fast, samples, repeat):
+    for sample in samples:
+        assert legacy(*sample) == fast(*sample), (name, sample)
+    slow = bench(
+        f"{name} (pytz)", lambda: [legacy(*s) for s in samples], samples, repeat
+    )
+    quick = bench(
+        f"{name} (utils.tz)", lambda: [fast(*s) for s in samples], samples, repeat
+    )
+    print(f"  speedup: {slow / quick:.1f}x\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(7)
+    low = local_to_epoch_ms(date(2024, 1, 1), time.min, TIMEZONE)
+    high = local_to_epoch_ms(date(2027, 1, 1), time.min, TIMEZONE)
+    # Whole seconds, as the legacy helpers drop milliseconds
+    epochs = [
+        (random.randrange(low, high) // 1000 * 1000,) for _ in range(args.samples)
+    ]
+    days = [(epoch_ms_to_date(epoch),) for (epoch,) in epochs]
+    day_pairs = [(day, day + timedelta(days=4)) for (day,) in days]
+
+    offset_table(TIMEZONE)  # Built once per process, on first use
+    compare(
+        "first_search_window",
+        legacy_first_search_window,
+        lambda epoch: first_search_window(epoch, TIMEZONE),
+        epochs,
+        args.repeat,
+    )
+    compare(
+        "day_window_epoch_ms",
+        legacy_day_window_epoch_ms,
+        day_window_epoch_ms,
+        day_pairs,
+        args.repeat,
+    )
+    compare(
+        "epoch_ms_to_date",
+        legacy_epoch_ms_to_date,
+        epoch_ms_to_date,
+        epochs,
+        args.repeat,
+    )
+    compare(
+        "epoch_ms_to_isoformat",
+        legacy_epoch_ms_to_isoformat,
+        epoch_ms_to_isoformat,
+        epochs,
+        args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Benchmark: throughput of serve.py as worker processes are added.
+
+Starts the local fake GoHighLevel and OpenAI servers, then for each worker count
+launches `python serve.py` with WEB_CONCURRENCY set, waits until it answers, drives
+it with the bench_load mix of tool calls and records requests per second and latency.
+Before stopping each server it checks the graceful drain: requests in flight when
+SIGTERM arrives must still complete.
+
+The fakes and the load generator share this process, so on a machine with few cores
+they compete with the workers; read the scaling against the core count in the report.
+
+Usage:
+    python benchmarks/bench_workers.py [--workers 1 2 4] [--requests 2000]
+        [--concurrency 64] [--output bench_workers.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_load import (  # noqa: E402
+    add_upstream_arguments,
+    configure_environment,
+    drive,
+    make_request,
+    start_fakes,
+)
+from fakes import free_port  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def launch(workers, port, extra_env=None):
+    env = {
+        **os.environ,
+        "HOST": "127.0.0.1",
+        "PORT": str(port),
+        "WEB_CONCURRENCY": str(workers),
+        **(extra_env or {}),
+    }
+    return subprocess.Popen(
+        [sys.executable, str(ROOT / "serve.py")],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until_ready(process, base_url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"serve.py exited with status {process.returncode}")
+        try:
+            if httpx.get(base_url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise TimeoutError(f"serve.py did not answer on {base_url}")
+
+
+async def drain_check(process, base_url, requests):
+    """Sends SIGTERM with `requests` in flight; returns how many completed with 200."""
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+
+        async def send():
+            route, payload = make_request(book_ratio=0.0, llm_ratio=1.0)
+            try:
+                response = await client.post(route, json=payload)
+            except httpx.HTTPError:
+                return False
+            return response.status_code == 200
+
+        in_flight = [asyncio.create_task(send()) for _ in range(requests)]
+        await asyncio.sleep(0.1)  # Sent, and waiting on the (slow) fake LLM
+        process.send_signal(signal.SIGTERM)
+        return sum(await asyncio.gather(*in_flight))
+
+
+def run(workers, args):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    process = launch(workers, port)
+    try:
+        wait_until_ready(process, base_url)
+        # Fills every worker's caches and pools before measuring
+        asyncio.run(drive(base_url, args.warmup, args.concurrency))
+        summary = asyncio.run(
+            drive(
+                base_url,
+                args.requests,
+                args.concurrency,
+                book_ratio=args.book_ratio,
+                llm_ratio=args.llm_ratio,
+            )
+        )
+        drained = asyncio.run(drain_check(process, base_url, args.drain_requests))
+        process.wait(timeout=60)
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+    summary["drain"] = {"in_flight": args.drain_requests, "completed": drained}
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--drain-requests", type=int, default=16)
+    parser.add_argument("--book-ratio", type=float, default=0.2)
+    parser.add_argument("--llm-ratio", type=float, default=0.2)
+    parser.add_argument("--output", default="bench_workers.json")
+    add_upstream_arguments(parser)
+    args = parser.parse_args()
+
+    ghl, openai_server = start_fakes(args)
+    configure_environment(ghl.url, openai_server.url)
+    results = {}
+    try:
+        for workers in args.workers:
+            summary = run(workers, args)
+            results[workers] = summary
+            print(
+                f"{workers} workers: {summary['all']['rps']:.1f} req/s, "
+                f"{summary['all']['errors']} errors, drain "
+                f"{summary['drain']['completed']}/{summary['drain']['in_flight']}"
+            )
+    finally:
+        ghl.stop()
+        openai_server.stop()
+
+    baseline = results[args.workers[0]]["all"]["rps"]
+    for summary in results.values():
+        summary["speedup"] = round(summary["all"]["rps"] / baseline, 2)
+    report = {
+        "benchmark": "workers",
+        "config": vars(args),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
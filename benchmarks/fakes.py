@@ -0,0 +1,257 @@
+"""
+Local stand-ins for the GoHighLevel and OpenAI APIs, used by the benchmarks.
+
+Both fakes are small FastAPI apps with configurable latency, error rate and (for
+GoHighLevel) slot density, so the server can be load tested without network access.
+"""
+
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytz
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+EDT = pytz.timezone("America/New_York")
+
+
+class FakeUpstreamConfig:
+    """
+    Behaviour of a fake upstream.
+
+    Args:
+        latency_ms (float): Mean added latency per request.
+        jitter_ms (float): Uniform jitter added on top of latency_ms.
+        error_rate (float): Fraction of requests answered with `error_status`.
+        error_status (int): Status used for injected errors (default: 500).
+        slots_per_day (int): GoHighLevel only; slots offered between 08:00 and 17:00.
+        token_latency_ms (float): OpenAI only; time to generate each answer token,
+            on top of latency_ms (the time to the first token).
+        notes (str): OpenAI only; text the model adds after the timestamp, as it
+            sometimes does despite the prompt.
+    """
+
+    def __init__(
+        self,
+        latency_ms=50.0,
+        jitter_ms=10.0,
+        error_rate=0.0,
+        error_status=500,
+        slots_per_day=18,
+        token_latency_ms=0.0,
+        notes="",
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.slots_per_day = slots_per_day
+        self.token_latency_ms = token_latency_ms
+        self.notes = notes
+
+    async def delay(self):
+        await asyncio.sleep(
+            max(self.latency_ms + random.uniform(0, self.jitter_ms), 0) / 1000
+        )
+
+    def should_fail(self):
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+
+def create_fake_ghl_app(config=None):
+    """Builds a fake GoHighLevel v1 API serving /appointments/slots and /appointments."""
+    config = config or FakeUpstreamConfig()
+    app = FastAPI()
+    app.state.requests = {"slots": 0, "book": 0}
+    booked = set()
+
+    @app.get("/v1/appointments/slots")
+    async def slots(startDate: int, endDate: int, timezone: str = "America/New_York"):
+        app.state.requests["slots"] += 1
+        await config.delay()
+        if config.should_fail():
+            return JSONResponse({"msg": "Injected error"}, config.error_status)
+        start = datetime.fromtimestamp(startDate / 1000, EDT)
+        end = datetime.fromtimestamp(endDate / 1000, EDT)
+        step = timedelta(minutes=max(9 * 60 // max(config.slots_per_day, 1), 1))
+        result = {}
+        day = start.date()
+        while day <= end.date():
+            if day.weekday() < 5:
+                slot = EDT.localize(datetime.combine(day, datetime.min.time())) + (
+                    timedelta(hours=8)
+                )
+                day_slots = []
+                for _ in range(config.slots_per_day):
+                    slot_str = slot.isoformat()
+                    if start <= slot <= end and slot_str not in booked:
+                        day_slots.append(slot_str)
+                    slot += step
+                if day_slots:
+                    result[day.isoformat()] = {"slots": day_slots}
+            day += timedelta(days=1)
+        return result
+
+    @app.post("/v1/appointments")
+    async def book(request: Request):
+        app.state.requests["book"] += 1
+        form = await request.form()
+        await config.delay()
+        if config.should_fail():
+            return JSONResponse({"msg": "Injected error"}, config.error_status)
+        selected_slot = form.get("selectedSlot")
+        if selected_slot in booked:
+            return JSONResponse(
+                {
+                    "selectedSlot": {
+                        "message": "The slot you have selected is no longer available.",
+                        "rule": "invalid",
+                    }
+                },
+                422,
+            )
+        booked.add(selected_slot)
+        return {"id": uuid.uuid4().hex, "selectedSlot": selected_slot}
+
+    return app
+
+
+def answer_tokens(text):
+    """Splits an answer into token-sized pieces of about four characters."""
+    return [text[i : i + 4] for i in range(0, len(text), 4)]
+
+
+def create_fake_openai_app(config=None):
+    """
+    Builds a fake OpenAI chat-completions API, streaming (SSE) or not.
+
+    The answer is the next business day at 10:00 in America/New_York, in ISO 8601,
+    which is what the date extraction prompt asks the model for, followed by
+    `config.notes`. Generation honours `max_tokens` and takes `token_latency_ms` per
+    token; a streaming client that disconnects stops it.
+    """
+    config = config or FakeUpstreamConfig(latency_ms=800.0, jitter_ms=400.0)
+    app = FastAPI()
+    app.state.requests = {"chat": 0}
+    app.state.tokens = 0
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        app.state.requests["chat"] += 1
+        body = await request.json()
+        await config.delay()
+        if config.should_fail():
+            return JSONResponse(
+                {"error": {"message": "Injected error", "type": "server_error"}},
+                config.error_status,
+            )
+        answer = datetime.now(EDT).replace(
+            hour=10, minute=0, second=0, microsecond=0, tzinfo=None
+        ) + timedelta(days=1)
+        while answer.weekday() >= 5:
+            answer += timedelta(days=1)
+        timestamp = EDT.localize(answer).isoformat()
+        if body.get("response_format", {}).get("type") == "json_object":
+            content = json.dumps({"datetime": timestamp}) + config.notes
+        else:
+            content = timestamp + config.notes
+        tokens = answer_tokens(content)[: body.get("max_tokens") or None]
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        model = body.get("model", "gpt-4o")
+
+        if body.get("stream"):
+
+            def chunk(delta, finish_reason=None):
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                    ],
+                }
+                return f"data: {json.dumps(payload)}\n\n"
+
+            async def events():
+                yield chunk({"role": "assistant", "content": ""})
+                for token in tokens:
+                    await asyncio.sleep(config.token_latency_ms / 1000)
+                    app.state.tokens += 1
+                    yield chunk({"content": token})
+                yield chunk({}, "stop")
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        await asyncio.sleep(config.token_latency_ms * len(tokens) / 1000)
+        app.state.tokens += len(tokens)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": 250,
+                "completion_tokens": len(tokens),
+                "total_tokens": 250 + len(tokens),
+            },
+        }
+
+    return app
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ServerThread:
+    """Runs an ASGI app with uvicorn on a background thread."""
+
+    def __init__(self, app, port=None, **config):
+        self.port = port or free_port()
+        self.server = uvicorn.Server(
+            uvicorn.Config(
+                app, host="127.0.0.1", port=self.port, log_level="warning", **config
+            )
+        )
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout=10.0):
+        self.thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise RuntimeError(f"server on port {self.port} did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=10.0)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
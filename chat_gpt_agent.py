@@ -1,10 +1,14 @@
+import logging
 import os
+import re
 
-import openai
-from dotenv import load_dotenv
 from fastapi import HTTPException
 
-load_dotenv()
+from utils.limiter import ConcurrencyLimiter
+from utils.metrics import span
+from utils.resilience import Resilience
+
+logger = logging.getLogger(__name__)
 
 system_message = """
 Ask the user when they would like to book a meeting. You will be provided with the current date and their response.
@@ -21,11 +25,7 @@ If the user specifies "morning," assume they mean 08:00 AM.
 If the user specifies "afternoon," assume they mean 13:00 PM.
 If the user specifies "evening," assume they mean 16:00 PM.
 
-For dates between the second Sunday in March and the first Sunday in November, use the EDT offset: DATE FORMAT ISO 8601: 2024-04-04T14:30:00-04:00
-
-For dates outside this period, use the EST offset: DATE FORMAT ISO 8601: 2024-04-04T14:30:00-05:00
-
-Adjust the time zone offset according to these rules.
+The current date/time names the user's timezone. Use the UTC offset in force in that timezone on the output date: DATE FORMAT ISO 8601: 2024-04-04T14:30:00-04:00
 
 lastly check the outcome date,
 then we need to check day of date
@@ -41,39 +41,193 @@ This is when the user would like to book:
 """
 
 
+json_mode_message = """
+Respond with a JSON object of the form {"datetime": "<ISO 8601 date and time>"}.
+"""
+
+# A complete ISO 8601 timestamp with its offset; the stream can stop once one is seen
+ISO_TIMESTAMP_RE = re.compile(
+    r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:\d{2})"
+)
+
+# Request classes that can be given their own model
+REQUEST_CLASSES = ("fetch", "book")
+
+
+def retryable_errors():
+    """Returns the OpenAI failures worth another attempt within the deadline."""
+    import openai
+
+    return (
+        openai.APIConnectionError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    )
+
+
+def extract_timestamp(text):
+    """Returns the first ISO 8601 timestamp in a model answer, or the stripped answer."""
+    match = ISO_TIMESTAMP_RE.search(text or "")
+    return match.group(0) if match else (text or "").strip()
+
+
 class ChatGPTAgent:
-    def __init__(self):
+    """
+    Extracts the requested booking time from caller input with the OpenAI API.
+
+    Settings:
+        OPENAI_MODEL (str): Model used for every request class (default: gpt-4o).
+        OPENAI_FETCH_MODEL, OPENAI_BOOK_MODEL (str): Model for fetchSlots or bookSlot
+            extractions, e.g. a smaller model for the latency-bound fetchSlots.
+        OPENAI_MAX_TOKENS (int): Completion token cap (default: 32; a timestamp with
+            its offset takes about 15; 0 removes the cap).
+        OPENAI_STREAM (bool): Stream the completion and stop reading as soon as a
+            complete timestamp has arrived (default: true).
+        OPENAI_JSON_MODE (bool): Ask for a {"datetime": ...} JSON object instead of
+            free text (default: false).
+
+    Args:
+        limiter (ConcurrencyLimiter): Caps concurrent OpenAI calls.
+        resilience (Resilience): Retry and circuit breaker policy for OpenAI calls.
+    """
+
+    def __init__(self, limiter=None, resilience=None):
         self.api_key = os.getenv("OPENAI_API_KEY")
 
         if not self.api_key:
-            raise ValueError("OPENAI_API_KEY must be set in environment or passed in")
+            # Requests the date parser answers still work; LLM calls fail one by one
+            logger.warning(
+                "OPENAI_API_KEY is not set; date extraction via OpenAI will fail"
+            )
 
-        self.openai_client = openai.AsyncOpenAI(api_key=self.api_key)
-        self.model = "gpt-4o"
+        self._openai_client = None
+        self.model = os.getenv("OPENAI_MODEL", "gpt-4o")
+        self.models = {
+            request_class: os.getenv(
+                f"OPENAI_{request_class.upper()}_MODEL", self.model
+            )
+            for request_class in REQUEST_CLASSES
+        }
+        self.max_tokens = int(os.getenv("OPENAI_MAX_TOKENS", "32"))
+        self.stream = os.getenv("OPENAI_STREAM", "true").lower() in ("1", "true", "yes")
+        self.json_mode = os.getenv("OPENAI_JSON_MODE", "false").lower() in (
+            "1",
+            "true",
+            "yes",
+        )
+        self.early_exits = 0
+        # Caps concurrent OpenAI calls; sheds load with HTTPException(503)
+        self.limiter = limiter or ConcurrencyLimiter("openai", mode="off")
+        self.resilience = resilience or Resilience("openai")
+
+    @property
+    def openai_client(self):
+        """
+        The AsyncOpenAI client, created on first use.
+
+        Importing the openai SDK takes longer than the rest of the app, so requests
+        the date parser answers, and cold starts, never pay for it.
 
-    async def extract_date_time(self, user_input):
+        Raises:
+            ValueError: If OPENAI_API_KEY is not set.
+        """
+        if self._openai_client is None:
+            if not self.api_key:
+                raise ValueError("OPENAI_API_KEY must be set in environment")
+            import openai
+
+            # Retries are handled by self.resilience, within the call's deadline
+            self._openai_client = openai.AsyncOpenAI(
+                api_key=self.api_key, max_retries=0
+            )
+            # The SDK's errors can only be named once it is imported
+            self.resilience.retryable_errors += retryable_errors()
+        return self._openai_client
+
+    async def _read_stream(self, request):
+        """Streams a completion, stopping as soon as a full timestamp has arrived."""
+        stream = await self.openai_client.chat.completions.create(
+            stream=True, **request
+        )
+        text = ""
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                text += chunk.choices[0].delta.content or ""
+                if ISO_TIMESTAMP_RE.search(text):
+                    self.early_exits += 1
+                    break
+        finally:
+            await stream.close()  # Stops generation we no longer need
+        return text
+
+    async def extract_date_time(self, user_input, request_class="fetch"):
         """
         Extracts date and time information from user input using the OpenAI API.
 
         Args:
-            system_message (str): The system message to guide the AI model.
             user_input (str): The user's input text.
+            request_class (str): "fetch" or "book", selecting the model to use.
 
         Returns:
-            dict: A dictionary containing:
-                - "success" (bool): True if the request was successful, False otherwise.
-                - "message" (str): The AI model's response or an error message.
+            tuple: (success, message), where message is the ISO 8601 timestamp the
+            model answered with, or an error message when success is False.
+
+        Raises:
+            HTTPException: 503 when the OpenAI limiter sheds the call or its circuit
+                breaker is open.
         """
+        messages = [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_input},
+        ]
+        request = {
+            "model": self.models.get(request_class, self.model),
+            "messages": messages,
+            "temperature": 0,
+        }
+        if self.max_tokens:
+            request["max_tokens"] = self.max_tokens
+        if self.json_mode:
+            messages.insert(1, {"role": "system", "content": json_mode_message})
+            request["response_format"] = {"type": "json_object"}
+
+        async def send():
+            async with self.limiter.permit():
+                with span("llm", upstream="openai"):
+                    if self.stream:
+                        return await self._read_stream(request)
+                    response = await self.openai_client.chat.completions.create(
+                        **request
+                    )
+                    return response.choices[0].message.content
+
         try:
-            response = await self.openai_client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": user_input},
-                ],
-                temperature=0,
-            )
-            return True, response.choices[0].message.content
-        except Exception as e:  # Catch all exceptions
-            print(e)
+            content = await self.resilience.call(send)
+            return True, extract_timestamp(content)
+        except HTTPException:
+            raise  # Shed by the limiter or the circuit breaker
+        except Exception:  # Retries and the deadline are spent
+            logger.warning("OpenAI date extraction failed", exc_info=True)
             return False, "An error occurred while processing your request."
+
+    def stats(self):
+        return {"early_exits": self.early_exits}
+
+    async def warm_up(self):
+        """
+        Opens a connection to the OpenAI API by listing models, which costs no
+        tokens. Any response will do; only the connection is kept.
+        """
+        import openai
+
+        try:
+            await self.openai_client.models.list()
+        except openai.APIStatusError:
+            pass  # Connected; the status does not matter
+
+    async def close(self):
+        """Closes the underlying OpenAI HTTP connection pool."""
+        if self._openai_client is not None:
+            await self._openai_client.close()
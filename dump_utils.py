@@ -1,22 +1,23 @@
 from datetime import datetime, timedelta
 
-import pytz
+from utils.slot_index import SlotIndex
+from utils.tz import epoch_ms_to_datetime, get_zone
 
 
 def get_current_date_america_new_york():
-    tz = pytz.timezone("America/New_York")
+    tz = get_zone("America/New_York")
     now = datetime.now(tz)
     return now.strftime("%Y-%m-%d")
 
 
 def get_current_time_america_new_york():
-    tz = pytz.timezone("America/New_York")
+    tz = get_zone("America/New_York")
     now = datetime.now(tz)
     return now.strftime("%Y-%m-%d %H:%M:%S %Z")
 
 
 def is_outside_business_hours():
-    tz = pytz.timezone("America/New_York")
+    tz = get_zone("America/New_York")
     now = datetime.now(tz)
 
     # Convert the current time to epoch timestamp
@@ -35,7 +36,7 @@ def is_outside_business_hours():
 
 
 def get_date_time_in_epoch_ms(date_time_str):
-    tz = pytz.timezone("America/New_York")
+    tz = get_zone("America/New_York")
     datetime_edt = datetime.fromisoformat(date_time_str)
     datetime_new_york = datetime_edt.astimezone(tz)
     print(datetime_edt)
@@ -46,22 +47,16 @@ def get_date_time_in_epoch_ms(date_time_str):
 
 
 def epoch_ms_to_date_time_str(epoch_ms, tz_name="America/New_York"):
-    tz = pytz.timezone(tz_name)
-    dt = datetime.fromtimestamp(epoch_ms / 1000, tz=tz)
-    return dt.isoformat()
+    return epoch_ms_to_datetime(epoch_ms, tz_name).isoformat()
 
 
 def filter_slots_by_time_range(slots, start_epoch_ms, end_epoch_ms):
-    filtered_slots = []
-    for slot in slots:
-        slot_epoch_ms = get_date_time_in_epoch_ms(slot)
-        if start_epoch_ms <= slot_epoch_ms <= end_epoch_ms:
-            filtered_slots.append(slot)
-    return filtered_slots
+    index = SlotIndex({"slots": {"slots": slots}})
+    return index.slots_in_range(start_epoch_ms, end_epoch_ms)
 
 
 def get_current_and_future_epoch_america_new_york_milliseconds(selected_slot=None):
-    tz = pytz.timezone("America/New_York")
+    tz = get_zone("America/New_York")
 
     if selected_slot:
         # Parse the selected_slot in EDT timezone and convert to New York timezone
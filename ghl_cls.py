@@ -1,28 +1,82 @@
 import json
+import logging
 import os
+from datetime import datetime
 
-import requests
-from dotenv import load_dotenv
-
-load_dotenv()
+import httpx
 from fastapi import HTTPException
 
+from utils.ghl import day_window_epoch_ms, get_holidays, trim_slot_data
+from utils.http import get_http_client
+from utils.limiter import ConcurrencyLimiter
+from utils.metrics import span
+from utils.resilience import Resilience
+from utils.singleflight import SingleFlight
+from utils.tenants import DEFAULT_BUSINESS_HOURS
+from utils.tz import epoch_ms_to_date, get_zone
+
+logger = logging.getLogger(__name__)
+
+# Transport failures worth retrying, and the subset raised before a request is sent
+RETRYABLE_ERRORS = (httpx.TransportError,)
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+# Prefix of the 422 messages about the booking payload rather than the slot
+MISSING_FIELDS_MESSAGE = "Missing required fields"
+
 
 class GoHighLevelClient:
 
-    def __init__(self):
-        self.base_url = "https://rest.gohighlevel.com/v1"
-        self.calendar_id = os.getenv("CALENDAR_ID")
-        self.timezone = os.getenv("TIMEZONE", "America/New_York")
-        self.auth_token = os.getenv("AUTH_TOKEN")
+    def __init__(
+        self,
+        http_client=None,
+        slot_cache=None,
+        tenant=None,
+        limiter=None,
+        resilience=None,
+    ):
+        self.base_url = os.getenv("GHL_BASE_URL", "https://rest.gohighlevel.com/v1")
+        if tenant is not None:
+            self.tenant_id = tenant.id
+            self.calendar_id = tenant.calendar_id
+            self.timezone = tenant.timezone
+            self.auth_token = tenant.auth_token
+            self.business_hours = tenant.business_hours
+        else:
+            self.tenant_id = "default"
+            self.calendar_id = os.getenv("CALENDAR_ID")
+            self.timezone = os.getenv("TIMEZONE", "America/New_York")
+            self.auth_token = os.getenv("AUTH_TOKEN")
+            self.business_hours = DEFAULT_BUSINESS_HOURS
+        # Parsed once; the slot searches skip these when counting business days
+        self.holidays = get_holidays()
+        # Shared keep-alive pool; falls back to the process-wide client.
+        self.http_client = http_client or get_http_client()
+        self.slot_cache = slot_cache
+        # Identical slot queries in flight at the same time share one upstream call
+        self.slot_flight = SingleFlight()
+        # Caps concurrent GoHighLevel calls; shared by every tenant's client
+        self.limiter = limiter or ConcurrencyLimiter("ghl", mode="off")
+        # Retries, hedging and the circuit breaker; also shared by every tenant
+        self.resilience = resilience or Resilience("ghl")
+        # Called with the day (or None for every day) whose availability changed
+        self.invalidation_callbacks = []
 
-    async def get_appointment_slots(self, start_date_epoch_ms, end_date_epoch_ms):
+    async def get_appointment_slots(
+        self, start_date_epoch_ms, end_date_epoch_ms, use_cache=True
+    ):
         """
         Fetches appointment slots from GoHighLevel API, handling missing configuration.
 
+        When a slot cache is configured, whole days are fetched once and later windows
+        inside those days are answered from the cache until the entry expires or a
+        booking on that day invalidates it.
+
         Args:
             start_date_epoch_ms: Start date in epoch milliseconds.
             end_date_epoch_ms: End date in epoch milliseconds.
+            use_cache: Read the slot cache first (default: True). Background refreshes
+                pass False so they always see the current availability.
 
         Returns:
             tuple: A tuple containing the result and status code of the API request.
@@ -41,11 +95,95 @@ class GoHighLevelClient:
                 detail="Missing Configuration (CALENDAR_ID or AUTH_TOKEN)",
             )
 
-        url = f"{self.base_url}/appointments/slots?calendarId={self.calendar_id}&startDate={start_date_epoch_ms}&endDate={end_date_epoch_ms}&timezone={self.timezone}"
+        if not use_cache or self.slot_cache is None or not self.slot_cache.enabled:
+            return await self.slot_flight.do(
+                ("range", start_date_epoch_ms, end_date_epoch_ms),
+                lambda: self._request_appointment_slots(
+                    start_date_epoch_ms, end_date_epoch_ms
+                ),
+            )
+
+        # Cache whole days so every window inside them is served by one entry
+        start_day = epoch_ms_to_date(start_date_epoch_ms, self.timezone)
+        end_day = epoch_ms_to_date(end_date_epoch_ms, self.timezone)
+        slot_data = await self.slot_cache.get(
+            self.tenant_id, self.calendar_id, self.timezone, start_day, end_day
+        )
+        if slot_data is None:
+            # Requests after a booking do not join (or cache) a fetch from before it
+            generation = await self.slot_cache.generation(
+                self.tenant_id, self.calendar_id
+            )
+            result, status_code = await self.slot_flight.do(
+                ("days", start_day, end_day, generation),
+                lambda: self._request_and_cache_days(start_day, end_day, generation),
+            )
+            if status_code != 200:
+                return result, status_code
+            slot_data = result
+        return (
+            trim_slot_data(slot_data, start_date_epoch_ms, end_date_epoch_ms),
+            200,
+        )
+
+    async def cached_appointment_slots(self, start_date_epoch_ms, end_date_epoch_ms):
+        """
+        Returns the cached slot data for a window, trimmed to it, or None on a miss.
+
+        Unlike get_appointment_slots, a miss does not fetch (nor fill the cache).
+        """
+        if self.slot_cache is None or not self.slot_cache.enabled:
+            return None
+        slot_data = await self.slot_cache.get(
+            self.tenant_id,
+            self.calendar_id,
+            self.timezone,
+            epoch_ms_to_date(start_date_epoch_ms, self.timezone),
+            epoch_ms_to_date(end_date_epoch_ms, self.timezone),
+        )
+        if slot_data is None:
+            return None
+        return trim_slot_data(slot_data, start_date_epoch_ms, end_date_epoch_ms)
+
+    async def _request_and_cache_days(self, start_day, end_day, generation):
+        result, status_code = await self._request_appointment_slots(
+            *day_window_epoch_ms(start_day, end_day, self.timezone)
+        )
+        if status_code == 200:
+            await self.slot_cache.set(
+                self.tenant_id,
+                self.calendar_id,
+                self.timezone,
+                start_day,
+                end_day,
+                result,
+                generation=generation,
+            )
+        return result, status_code
+
+    async def _request_appointment_slots(self, start_date_epoch_ms, end_date_epoch_ms):
+        """Sends the slots request to GoHighLevel; see get_appointment_slots for the result."""
+        url = f"{self.base_url}/appointments/slots"
+        params = {
+            "calendarId": self.calendar_id,
+            "startDate": start_date_epoch_ms,
+            "endDate": end_date_epoch_ms,
+            "timezone": self.timezone,
+        }
         headers = {"Authorization": f"Bearer {self.auth_token}"}
 
+        async def send():
+            async with self.limiter.permit() as permit:
+                with span("ghl_slots", upstream="ghl") as current:
+                    response = await self.http_client.get(
+                        url, params=params, headers=headers
+                    )
+                    current.status = permit.status = response.status_code
+            return response
+
         try:
-            response = requests.get(url, headers=headers)
+            # Slot reads are idempotent, so they may be retried and hedged
+            response = await self.resilience.call(send, hedge=True)
 
             if response.status_code == 200:  # Success
                 return response.json(), response.status_code
@@ -60,9 +198,11 @@ class GoHighLevelClient:
             else:  # Unexpected error
                 return "Unknown Error", None
 
-        except Exception as e:
-            # TODO: handle exception
-            print(f"Request Error: {e}")
+        except HTTPException:
+            raise  # Shed by the limiter or the circuit breaker
+        except Exception:
+            # Retries and the deadline are spent; the caller reports the failure
+            logger.warning("GoHighLevel slots request failed", exc_info=True)
             return "Request Error", None
 
     async def check_slot_bookable(
@@ -106,17 +246,27 @@ class GoHighLevelClient:
         if missing_fields:
             raise HTTPException(
                 status_code=422,
-                detail=f"Missing required fields: {', '.join(missing_fields)}",
+                detail=f"{MISSING_FIELDS_MESSAGE}: {', '.join(missing_fields)}",
             )
 
         url = f"{self.base_url}/appointments"
         headers = {"Authorization": f"Bearer {self.auth_token}"}
+
+        async def send():
+            async with self.limiter.permit() as permit:
+                with span("ghl_book", upstream="ghl") as current:
+                    response = await self.http_client.post(
+                        url, headers=headers, data=payload_fields
+                    )
+                    current.status = permit.status = response.status_code
+            return response
+
         try:
-            response = requests.request(
-                "POST", url, headers=headers, data=payload_fields
-            )
+            # Not idempotent: only retried when the request never left
+            response = await self.resilience.call(send, idempotent=False)
             if response.status_code == 200:  # Success
                 success_data = response.json()
+                await self._invalidate_slot_day(selectedSlot)
                 return "Appointment booked succesfully", response.status_code
             elif response.status_code == 422:
                 error_data = response.json()
@@ -126,12 +276,36 @@ class GoHighLevelClient:
                     if field in error_data
                 ]
                 if missing_fields:
-                    return f"Missing required fields: {', '.join(missing_fields)}", 422
+                    return f"{MISSING_FIELDS_MESSAGE}: {', '.join(missing_fields)}", 422
                 elif "selectedSlot" in error_data:
+                    # The slot is taken, so cached availability for that day is stale
+                    await self._invalidate_slot_day(selectedSlot)
                     return error_data["selectedSlot"]["message"], 422
             else:  # Unexpected error
                 return "Unknown Error", None
 
-        except requests.RequestException as e:
-            print(f"Request Error: {e}")
+        except (httpx.HTTPError, TimeoutError):
+            logger.warning("GoHighLevel booking request failed", exc_info=True)
             return "Request Error", None
+
+    async def _invalidate_slot_day(self, selected_slot):
+        """Drops cached availability for the day of an ISO 8601 slot that was booked or taken."""
+        try:
+            slot_datetime = datetime.fromisoformat(selected_slot)
+        except (TypeError, ValueError):
+            day = None
+        else:
+            if slot_datetime.tzinfo is not None:
+                slot_datetime = slot_datetime.astimezone(get_zone(self.timezone))
+            day = slot_datetime.date()
+        if self.slot_cache is not None:
+            if day is None:
+                await self.slot_cache.invalidate_calendar(
+                    self.tenant_id, self.calendar_id
+                )
+            else:
+                await self.slot_cache.invalidate_day(
+                    self.tenant_id, self.calendar_id, self.timezone, day
+                )
+        for callback in self.invalidation_callbacks:
+            callback(day)
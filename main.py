@@ -1,33 +1,53 @@
 import logging
-from datetime import datetime
+import os
+from contextlib import asynccontextmanager
 
-import pytz
-import uvicorn
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+from dotenv import load_dotenv
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 
-from chat_gpt_agent import ChatGPTAgent, user_message
-from ghl_cls import GoHighLevelClient
+from chat_gpt_agent import ChatGPTAgent
 from utils.api import (
-    fetch_and_process_slots,
-    get_current_time_america_new_york,
-    parse_datetime_string,
+    BOOK_SLOT_TOOL,
+    FETCH_SLOTS_TOOL,
+    answer_tool_calls,
     process_request,
-    replace_placeholders,
 )
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    datefmt="%d-%b-%y %H:%M:%S",
-    filename="debug.log",
+from utils.cache import DateExtractionCache
+from utils.codec import FastJSONResponse
+from utils.log import configure_logging
+from utils.metrics import ServerTimingMiddleware, render_metrics, span
+from utils.registry import (
+    Registry,
+    get_chat_gpt_agent,
+    get_date_cache,
+    get_registry,
 )
 
+# Read .env once, before anything looks at the environment
+load_dotenv()
+
+# Configure logging; records are written by a background thread
+configure_logging()
+
 # Create logger instance
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create the shared upstream clients once, before serving requests
+    app.state.registry = Registry()
+    await app.state.registry.startup()
+    # Runs before the worker accepts connections; serve.py turns it on
+    if os.getenv("WARMUP", "false").lower() in ("1", "true", "yes"):
+        await app.state.registry.warm_up()
+    yield
+    await app.state.registry.shutdown()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+app.add_middleware(ServerTimingMiddleware)
 
 
 @app.get("/")
@@ -35,187 +55,129 @@ async def hello_world():
     return "Hello World"
 
 
+@app.get("/metrics")
+async def metrics(registry: Registry = Depends(get_registry)):
+    return PlainTextResponse(
+        render_metrics(registry.stats()), media_type="text/plain; version=0.0.4"
+    )
+
+
 @app.post("/webhook")
 async def hello_webhook(request: Request):
     pass
 
 
 @app.post("/fetchslots")
-async def fetchSlots(request: Request):
-    tool_call_id = None
-    edt_timezone = pytz.timezone("America/New_York")
+async def fetchSlots(
+    request: Request,
+    registry: Registry = Depends(get_registry),
+    chat_gpt_agent: ChatGPTAgent = Depends(get_chat_gpt_agent),
+    date_cache: DateExtractionCache = Depends(get_date_cache),
+):
     try:
-        # Process request and get slots
-        tool_call = await process_request(request)
-        if not tool_call:
+        # Process request and answer every tool call concurrently
+        with span("process_request"):
+            webhook = await process_request(request)
+        tool_calls = webhook.tool_calls
+        if not tool_calls:
             raise Exception(detail="ToolCall is Missing")
 
-        tool_call_id = tool_call.get("id")
-        logger.info("tool_call_id: %s", tool_call_id)
-        function_arguments = tool_call.get("function", {}).get("arguments", {})
-        user_selected_slot = function_arguments.get("selectedSlot")
-        current_datetime_edt = datetime.now(edt_timezone)
+        ghl_client, slot_prefetcher = await registry.clients_for(webhook)
+
         logger.info(
-            f"current_datetime: {current_datetime_edt} user_selected_slot: {user_selected_slot}"
+            "tenant: %s tool_call_ids: %s",
+            ghl_client.tenant_id,
+            [tool_call.id for tool_call in tool_calls],
         )
-        if user_selected_slot:
-            current_date_time = get_current_time_america_new_york()
-            final_user_prompt = replace_placeholders(
-                user_message, current_date_time, user_selected_slot
-            )
-            logger.info(f"user_message {final_user_prompt}")
-            selected_slot_success, user_selected_slot_dt = (
-                await ChatGPTAgent().extract_date_time(final_user_prompt)
-            )
-            logger.info(
-                f"selected_slot_success: {selected_slot_success} user_selected_slot_date_time: {user_selected_slot_dt}"
-            )
-            current_datetime_edt = (
-                parse_datetime_string(user_selected_slot_dt)
-                if selected_slot_success
-                else current_datetime_edt
-            )
-
-        picked_slots = await fetch_and_process_slots(current_datetime_edt, edt_timezone)
-        logger.info(f"available slots are {picked_slots}")
-        # Success response
-        return JSONResponse(
-            content={
-                "results": [
-                    {
-                        "toolCallId": tool_call_id,
-                        "result": picked_slots,
-                    }
-                ]
-            },
-            status_code=200,
+        # bookSlot calls batched with the fetches are booked, not searched
+        results = await answer_tool_calls(
+            FETCH_SLOTS_TOOL,
+            tool_calls,
+            chat_gpt_agent,
+            date_cache,
+            ghl_client,
+            registry.booking_idempotency,
+            slot_prefetcher,
+            registry.tool_settings,
         )
+        logger.info("available slots are %s", results)
+        # Success response
+        return FastJSONResponse(content={"results": results}, status_code=200)
     except HTTPException as he:  # Catch specific HTTPException
-        logger.error(f"An HTTPException occurred: {he}", exc_info=True)
-        return JSONResponse(
+        logger.error("An HTTPException occurred: %s", he, exc_info=True)
+        return FastJSONResponse(
             content={
                 "results": [{"toolCallId": None, "error": {"message": he.detail}}]
             },
             status_code=200,
         )
     except Exception as e:  # Catch all other exceptions
-        error_message = (
-            "Something went wrong while fetching slots."
-            if tool_call_id
-            else "Internal Server Error"
-        )
+        error_message = "Internal Server Error"
         logger.error(error_message, exc_info=True)
-        logger.critical(f"An unexpected error occurred: {e}")
-        return JSONResponse(
+        logger.critical("An unexpected error occurred: %s", e)
+        return FastJSONResponse(
             content={
-                "results": [
-                    {"toolCallId": tool_call_id, "error": {"message": error_message}}
-                ]
+                "results": [{"toolCallId": None, "error": {"message": error_message}}]
             },
             status_code=200,
         )
 
 
 @app.post("/bookslot")
-async def bookSlot(request: Request):
-    tool_call_id = None
+async def bookSlot(
+    request: Request,
+    registry: Registry = Depends(get_registry),
+    chat_gpt_agent: ChatGPTAgent = Depends(get_chat_gpt_agent),
+    date_cache: DateExtractionCache = Depends(get_date_cache),
+):
     try:
-        # 1. Extract and validate request data
-        tool_call = await process_request(request)
-        if not tool_call:
+        # Extract and validate request data, then book every tool call concurrently
+        with span("process_request"):
+            webhook = await process_request(request)
+        tool_calls = webhook.tool_calls
+        if not tool_calls:
             raise Exception(detail="ToolCall is Missing")
-        tool_call_id = tool_call.get("id")
-        logger.info("tool_call_id: %s", tool_call_id)
-        function_arguments = tool_call.get("function", {}).get("arguments", {})
-
-        user_selected_slot = function_arguments.get("selectedSlot")
-        current_date_time = get_current_time_america_new_york()
-        final_user_prompt = replace_placeholders(
-            user_message, current_date_time, user_selected_slot
-        )
-        logger.info(
-            f"user_selected_slot: {user_selected_slot}, current_date_time: {current_date_time}"
-        )
-        logger.info(f"user_message {final_user_prompt}")
-        selected_slot_success, selected_slot = await ChatGPTAgent().extract_date_time(
-            final_user_prompt
-        )
-        logger.info(
-            f"current_date_time is {current_date_time} and user_selected_slot_success {selected_slot_success} and user_selected_slot {selected_slot}"
-        )
-        if not selected_slot_success:
-            return JSONResponse(
-                content={
-                    "results": [
-                        {
-                            "toolCallId": tool_call_id,
-                            "result": {"message": selected_slot},
-                        }
-                    ]
-                },
-                status_code=200,
-            )
-
-        # 2. Extract appointment details
-        appointment_details = {
-            "selectedSlot": selected_slot,
-            "firstName": function_arguments.get("firstName"),
-            "lastName": function_arguments.get("lastName"),
-            "phone": function_arguments.get("phone"),
-            "phoneToText": function_arguments.get("phone"),
-        }
-
-        # 3. Book appointment
-        ghl_client = GoHighLevelClient()
-        result, status_code = await ghl_client.check_slot_bookable(
-            **appointment_details
-        )
 
-        # 4. Construct and return response
-        if status_code == 200:
-            message = "Appointment booked successfully."
-        else:
-            message = result  # Use the API error message directly
+        ghl_client, slot_prefetcher = await registry.clients_for(webhook)
+
         logger.info(
-            f"appointment booking result {result} and appointment booking message {message}"
+            "tenant: %s tool_call_ids: %s",
+            ghl_client.tenant_id,
+            [tool_call.id for tool_call in tool_calls],
         )
-        return JSONResponse(
-            content={
-                "results": [
-                    {
-                        "toolCallId": tool_call_id,
-                        "result": {"message": message},
-                    }
-                ]
-            },
-            status_code=200,
+        results = await answer_tool_calls(
+            BOOK_SLOT_TOOL,
+            tool_calls,
+            chat_gpt_agent,
+            date_cache,
+            ghl_client,
+            registry.booking_idempotency,
+            slot_prefetcher,
+            registry.tool_settings,
         )
+        return FastJSONResponse(content={"results": results}, status_code=200)
 
     except HTTPException as he:  # Catch specific HTTPException
-        logger.critical(f"An HTTPException occurred: {he}", exc_info=True)
-        return JSONResponse(
+        logger.critical("An HTTPException occurred: %s", he, exc_info=True)
+        return FastJSONResponse(
             content={
                 "results": [{"toolCallId": None, "error": {"message": he.detail}}]
             },
             status_code=200,
         )
     except Exception as e:  # Catch all other exceptions
-        error_message = (
-            "Something went wrong when booking slot."
-            if tool_call_id
-            else "Internal Server Error"
-        )
+        error_message = "Internal Server Error"
         logger.error(error_message, exc_info=True)
-        logger.critical(f"An unexpected error occurred: {e}")
-        return JSONResponse(
+        logger.critical("An unexpected error occurred: %s", e)
+        return FastJSONResponse(
             content={
-                "results": [
-                    {"toolCallId": tool_call_id, "error": {"message": error_message}}
-                ]
+                "results": [{"toolCallId": None, "error": {"message": error_message}}]
             },
             status_code=200,
         )
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(app, host="localhost", port=3000)
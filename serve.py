@@ -0,0 +1,95 @@
+"""
+Production launcher: runs main:app under uvicorn with several worker processes.
+
+    python serve.py
+
+Settings are read from the environment:
+    HOST (str): Interface to bind (default: 0.0.0.0).
+    PORT (int): Port to bind (default: 3000).
+    WEB_CONCURRENCY (int): Worker processes (default: the number of CPU cores).
+    UVICORN_LOOP (str): auto, uvloop or asyncio (default: auto, i.e. uvloop when
+        installed).
+    UVICORN_HTTP (str): auto, httptools or h11 (default: auto, i.e. httptools when
+        installed).
+    KEEPALIVE_TIMEOUT_SECONDS (int): Idle keep-alive connections are closed after
+        this long (default: 75, above the 60 second idle timeout of common load
+        balancers, so the balancer never reuses a connection the server is closing).
+    BACKLOG (int): Connections the kernel queues while every worker is busy
+        (default: 2048).
+    GRACEFUL_SHUTDOWN_SECONDS (int): On SIGTERM, workers stop accepting and give
+        in-flight requests this long to finish before closing them (default: 30).
+    WARMUP (bool): Open upstream connections in each worker before it accepts
+        requests (default: true here; see Registry.warm_up).
+    ACCESS_LOG (bool): Log every request (default: false).
+"""
+
+import importlib.util
+import logging
+import os
+
+import uvicorn
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+LOOPS = ("auto", "uvloop", "asyncio")
+HTTP_PROTOCOLS = ("auto", "httptools", "h11")
+
+
+def _installed(module):
+    return importlib.util.find_spec(module) is not None
+
+
+def _choose(name, options, fast, fallback):
+    choice = os.getenv(name, "auto").lower()
+    if choice not in options:
+        raise ValueError(f"Unknown {name} {choice!r}, expected one of {options}")
+    if choice == "auto":
+        return fast if _installed(fast) else fallback
+    return choice
+
+
+def _flag(name, default):
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+def server_options():
+    """
+    Returns the uvicorn.run keyword arguments for the current environment.
+
+    Returns:
+        dict: Options for uvicorn.run("main:app", ...).
+    """
+    return {
+        "host": os.getenv("HOST", "0.0.0.0"),
+        "port": int(os.getenv("PORT", "3000")),
+        "workers": int(os.getenv("WEB_CONCURRENCY", "0")) or os.cpu_count() or 1,
+        "loop": _choose("UVICORN_LOOP", LOOPS, "uvloop", "asyncio"),
+        "http": _choose("UVICORN_HTTP", HTTP_PROTOCOLS, "httptools", "h11"),
+        "timeout_keep_alive": int(os.getenv("KEEPALIVE_TIMEOUT_SECONDS", "75")),
+        "backlog": int(os.getenv("BACKLOG", "2048")),
+        "timeout_graceful_shutdown": int(os.getenv("GRACEFUL_SHUTDOWN_SECONDS", "30")),
+        "access_log": _flag("ACCESS_LOG", "false"),
+    }
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    # Read here for HOST, PORT and WEB_CONCURRENCY; the workers inherit the result
+    load_dotenv()
+    # Inherited by the workers, which read it in the app lifespan
+    os.environ.setdefault("WARMUP", "true")
+    options = server_options()
+    logger.info(
+        "Serving on %s:%s with %d workers (%s loop, %s)",
+        options["host"],
+        options["port"],
+        options["workers"],
+        options["loop"],
+        options["http"],
+    )
+    uvicorn.run("main:app", **options)
+
+
+if __name__ == "__main__":
+    main()
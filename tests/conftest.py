@@ -0,0 +1,84 @@
+import asyncio
+import inspect
+from datetime import time
+
+import pytest
+
+from utils.ghl import trim_slot_data
+
+TIMEZONE = "America/New_York"
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    """Runs `async def` tests in a fresh event loop, like the app's own asyncio.run."""
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+    arguments = {
+        name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames
+    }
+    asyncio.run(pyfuncitem.obj(**arguments))
+    return True
+
+
+class FakeClock:
+    """A monotonic clock that only moves when a test sets `now`."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeGHL:
+    """
+    Stands in for GoHighLevelClient in tests.
+
+    Slot queries record their window, wait for `release` (set by default, so a test
+    can clear it to act mid-fetch) and answer `slot_data` trimmed to the window, or
+    `status_code` when it is not 200. Bookings are recorded and answered with
+    `booking`.
+    """
+
+    tenant_id = "default"
+    calendar_id = "calendar"
+    timezone = TIMEZONE
+    business_hours = (time(8, 0), time(17, 0))
+    holidays = frozenset()
+
+    def __init__(self):
+        self.slot_data = {}
+        self.status_code = 200
+        self.booking = ("Appointment booked succesfully", 200)
+        self.windows = []
+        self.bookings = []
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def get_appointment_slots(self, start_epoch_ms, end_epoch_ms, use_cache=True):
+        self.windows.append((start_epoch_ms, end_epoch_ms))
+        self.started.set()
+        await self.release.wait()
+        if self.status_code != 200:
+            return "Internal Server Error", self.status_code
+        return trim_slot_data(self.slot_data, start_epoch_ms, end_epoch_ms), 200
+
+    async def cached_appointment_slots(self, start_epoch_ms, end_epoch_ms):
+        return None
+
+    async def check_slot_bookable(self, **appointment_details):
+        self.bookings.append(appointment_details)
+        await asyncio.sleep(0.01)
+        return self.booking
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def ghl():
+    return FakeGHL()
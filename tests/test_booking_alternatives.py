@@ -0,0 +1,128 @@
+from datetime import date, datetime, time, timedelta
+
+import httpx
+import pytest
+
+from ghl_cls import MISSING_FIELDS_MESSAGE, GoHighLevelClient
+from utils.api import BOOK_SLOT_TOOL, ToolSettings, book_slot
+from utils.codec import ToolCall
+from utils.ghl import add_business_days
+from utils.tz import get_zone, local_to_epoch_ms
+
+TIMEZONE = "America/New_York"
+TAKEN_MESSAGE = "The slot you have selected is no longer available."
+
+
+def slot(day, hour):
+    return datetime.combine(day, time(hour), get_zone(TIMEZONE)).isoformat()
+
+
+# Far enough ahead that "from now on" never cuts into the day
+DAY = add_business_days(date.today(), 5)
+NEXT_DAY = add_business_days(DAY, 1)
+SELECTED = slot(DAY, 10)
+SLOT_DATA = {
+    DAY.isoformat(): {"slots": [slot(DAY, hour) for hour in (8, 9, 10, 12, 15)]},
+    NEXT_DAY.isoformat(): {"slots": [slot(NEXT_DAY, 8)]},
+}
+
+
+class FakeGoHighLevel:
+    """Serves SLOT_DATA and answers bookings with a fixed status and body."""
+
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+        self.slot_requests = 0
+
+    def __call__(self, request):
+        if request.method == "GET":
+            self.slot_requests += 1
+            return httpx.Response(200, json=SLOT_DATA)
+        return httpx.Response(self.status_code, json=self.body)
+
+
+@pytest.fixture(autouse=True)
+def alternatives_config(monkeypatch):
+    monkeypatch.setenv("CALENDAR_ID", "calendar")
+    monkeypatch.setenv("AUTH_TOKEN", "token")
+    monkeypatch.setenv("TIMEZONE", TIMEZONE)
+    monkeypatch.delenv("BUSINESS_HOLIDAYS", raising=False)
+
+
+def book(upstream, slot_prefetcher=None, alternative_slots=3):
+    ghl = GoHighLevelClient(
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+    )
+    tool_call = ToolCall(
+        "call",
+        BOOK_SLOT_TOOL,
+        {
+            "selectedSlot": SELECTED,
+            "firstName": "Ada",
+            "lastName": "Lovelace",
+            "phone": "+15550000000",
+        },
+    )
+    settings = ToolSettings(
+        alternative_slots=alternative_slots, alternative_slot_days=1
+    )
+    return book_slot(
+        tool_call, None, None, ghl, slot_prefetcher=slot_prefetcher, settings=settings
+    )
+
+
+async def test_taken_slot_offers_the_nearest_alternatives():
+    upstream = FakeGoHighLevel(422, {"selectedSlot": {"message": TAKEN_MESSAGE}})
+
+    outcome = await book(upstream)
+
+    assert outcome == {
+        "message": TAKEN_MESSAGE,
+        "alternativeSlots": [slot(DAY, 8), slot(DAY, 9), slot(DAY, 12)],
+    }
+
+
+async def test_successful_booking_has_no_alternatives():
+    upstream = FakeGoHighLevel(200, {"id": "appointment"})
+
+    assert await book(upstream) == {"message": "Appointment booked successfully."}
+
+
+async def test_missing_fields_have_no_alternatives():
+    upstream = FakeGoHighLevel(422, {"phone": {"message": "Invalid phone"}})
+
+    outcome = await book(upstream)
+
+    assert outcome == {"message": f"{MISSING_FIELDS_MESSAGE}: phone"}
+
+
+async def test_alternatives_come_from_the_prefetch_snapshot():
+    class Snapshot:
+        def snapshot(self):
+            start = local_to_epoch_ms(DAY, time.min, TIMEZONE)
+            end = local_to_epoch_ms(NEXT_DAY + timedelta(days=1), time.min, TIMEZONE)
+            return start, end, SLOT_DATA
+
+    upstream = FakeGoHighLevel(422, {"selectedSlot": {"message": TAKEN_MESSAGE}})
+
+    outcome = await book(upstream, slot_prefetcher=Snapshot())
+
+    assert len(outcome["alternativeSlots"]) == 3
+    assert upstream.slot_requests == 0
+
+
+def test_alternative_settings_are_read_from_the_environment(monkeypatch):
+    monkeypatch.setenv("ALTERNATIVE_SLOTS", "5")
+    monkeypatch.setenv("ALTERNATIVE_SLOT_DAYS", "-1")
+
+    settings = ToolSettings.from_env()
+
+    assert (settings.alternative_slots, settings.alternative_slot_days) == (5, 0)
+
+
+async def test_disabled_alternatives():
+    upstream = FakeGoHighLevel(422, {"selectedSlot": {"message": TAKEN_MESSAGE}})
+
+    assert await book(upstream, alternative_slots=0) == {"message": TAKEN_MESSAGE}
+    assert upstream.slot_requests == 0
@@ -0,0 +1,86 @@
+from datetime import date
+
+import pytest
+
+from utils.cache import SlotCache
+from utils.cache_backend import RedisBackend
+
+fakeredis = pytest.importorskip("fakeredis")
+
+TIMEZONE = "America/New_York"
+DAY = date(2024, 3, 4)
+
+
+@pytest.fixture
+def workers():
+    """Two workers' slot caches sharing one Redis server."""
+    server = fakeredis.FakeServer()
+    return [
+        SlotCache(
+            ttl=60,
+            maxsize=16,
+            backend=RedisBackend(client=fakeredis.FakeAsyncRedis(server=server)),
+        )
+        for _ in range(2)
+    ]
+
+
+async def test_generation_is_shared_between_workers(workers):
+    first, second = workers
+
+    await second.invalidate_day("default", "calendar", TIMEZONE, DAY)
+
+    assert await first.generation("default", "calendar") == 1
+
+
+async def test_fetch_from_before_another_workers_booking_is_not_stored(workers):
+    first, second = workers
+    generation = await first.generation("default", "calendar")
+
+    # The other worker books on the day while this one is fetching it
+    await second.invalidate_day("default", "calendar", TIMEZONE, DAY)
+    stored = await first.set(
+        "default", "calendar", TIMEZONE, DAY, DAY, {"a": 1}, generation=generation
+    )
+
+    assert not stored
+    assert await second.get("default", "calendar", TIMEZONE, DAY, DAY) is None
+
+
+async def test_bump_between_check_and_write_discards_the_write(workers):
+    first, second = workers
+    client = first.backend.client
+    generation_key = first._cache._generation_key(("generation", "default", "calendar"))
+    pipeline = client.pipeline
+
+    def racing_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        get = pipe.get
+
+        async def get_then_bump(name):
+            value = await get(name)
+            # The other worker books after the check, before the write
+            await second.invalidate_day("default", "calendar", TIMEZONE, DAY)
+            return value
+
+        pipe.get = get_then_bump
+        return pipe
+
+    client.pipeline = racing_pipeline
+    stored = await first.set(
+        "default", "calendar", TIMEZONE, DAY, DAY, {"a": 1}, generation=0
+    )
+
+    assert not stored
+    assert await second.get("default", "calendar", TIMEZONE, DAY, DAY) is None
+    assert int(await client.get(generation_key)) == 1
+
+
+async def test_current_generation_is_stored(workers):
+    first, second = workers
+    generation = await first.generation("default", "calendar")
+
+    assert await first.set(
+        "default", "calendar", TIMEZONE, DAY, DAY, {"a": 1}, generation=generation
+    )
+    assert await second.get("default", "calendar", TIMEZONE, DAY, DAY) == {"a": 1}
@@ -0,0 +1,56 @@
+from datetime import datetime
+
+import pytest
+
+from utils.cache import DateExtractionCache
+from utils.tz import get_zone
+
+KOLKATA = "Asia/Kolkata"  # UTC+05:30
+
+
+def local(timezone_str, *fields):
+    return datetime(*fields, tzinfo=get_zone(timezone_str))
+
+
+@pytest.fixture
+def date_cache():
+    return DateExtractionCache(ttl=60, maxsize=16, bucket_seconds=3600)
+
+
+def test_buckets_do_not_span_local_midnight(date_cache):
+    # Both instants fall in the same UTC hour, 18:00-19:00
+    before = date_cache.make_key(
+        "tomorrow", local(KOLKATA, 2024, 3, 4, 23, 45), KOLKATA
+    )
+    after = date_cache.make_key("tomorrow", local(KOLKATA, 2024, 3, 5, 0, 15), KOLKATA)
+
+    assert before != after
+    assert after[2:] == ("2024-03-05", 0)
+
+
+def test_buckets_follow_the_local_hour(date_cache):
+    start = date_cache.make_key("Tomorrow.", local(KOLKATA, 2024, 3, 4, 10, 0), KOLKATA)
+    end = date_cache.make_key(" tomorrow", local(KOLKATA, 2024, 3, 4, 10, 59), KOLKATA)
+
+    assert start == end == ("tomorrow", KOLKATA, "2024-03-04", 10)
+
+
+def test_now_is_read_in_the_given_timezone(date_cache):
+    utc_now = local("UTC", 2024, 3, 4, 18, 45)
+
+    key = date_cache.make_key("tomorrow", utc_now, KOLKATA)
+
+    assert key[2:] == ("2024-03-05", 0)
+
+
+async def test_answers_are_served_within_the_bucket(date_cache):
+    now = local(KOLKATA, 2024, 3, 4, 10, 5)
+    await date_cache.set("tomorrow at 9", now, "2024-03-05T09:00:00+05:30", KOLKATA)
+
+    later = local(KOLKATA, 2024, 3, 4, 10, 55)
+    next_hour = local(KOLKATA, 2024, 3, 4, 11, 0)
+
+    assert await date_cache.get("tomorrow at 9", later, KOLKATA) == (
+        "2024-03-05T09:00:00+05:30"
+    )
+    assert await date_cache.get("tomorrow at 9", next_hour, KOLKATA) is None
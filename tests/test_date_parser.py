@@ -0,0 +1,96 @@
+from datetime import datetime
+
+import pytest
+
+from utils.date_parser import localize_wall_time, parse_selected_slot
+from utils.tz import get_zone
+
+# A Friday morning, nine days before the switch to daylight saving time
+NOW = datetime(2024, 3, 1, 9, 0, tzinfo=get_zone("America/New_York"))
+
+
+@pytest.mark.parametrize(
+    "user_response, expected",
+    [
+        ("tomorrow at 2 PM", "2024-03-04T14:00:00-05:00"),
+        ("today at 3:30pm", "2024-03-01T15:30:00-05:00"),
+        ("friday afternoon", "2024-03-01T13:00:00-05:00"),
+        ("next Friday evening", "2024-03-08T16:00:00-05:00"),
+        ("Monday", "2024-03-04T08:00:00-05:00"),
+        ("at 14:00", "2024-03-01T14:00:00-05:00"),
+        ("noon", "2024-03-01T12:00:00-05:00"),
+        ("2024-03-05T10:15:00", "2024-03-05T10:15:00-05:00"),
+        ("2024-03-05T15:15:00+00:00", "2024-03-05T10:15:00-05:00"),
+    ],
+)
+def test_resolves_simple_phrases(user_response, expected):
+    assert parse_selected_slot(user_response, NOW) == expected
+
+
+@pytest.mark.parametrize(
+    "user_response, expected",
+    [
+        # Saturday rolls to Monday, across the change to EDT
+        ("2024-03-09", "2024-03-11T08:00:00-04:00"),
+        ("saturday at 3pm", "2024-03-04T15:00:00-05:00"),
+        ("sunday morning", "2024-03-04T08:00:00-05:00"),
+        ("day after tomorrow", "2024-03-04T08:00:00-05:00"),
+        ("2024-03-10T11:00:00", "2024-03-11T11:00:00-04:00"),
+    ],
+)
+def test_weekend_rolls_forward_to_monday(user_response, expected):
+    assert parse_selected_slot(user_response, NOW) == expected
+
+
+@pytest.mark.parametrize(
+    "user_response",
+    [
+        "",
+        "   ",
+        "at 2",  # Either half of the day
+        "next week",
+        "2 weeks from now",
+        "the 5th",
+        "monday or tuesday",
+        "tomorrow today",
+        "13pm",
+        "this",
+        "whenever suits you",
+    ],
+)
+def test_leaves_ambiguous_phrases_to_the_llm(user_response):
+    assert parse_selected_slot(user_response, NOW) is None
+
+
+@pytest.mark.parametrize(
+    "user_response, expected",
+    [
+        ("2024-03-05", "2024-03-05T08:00:00-05:00"),
+        ("20240305", "2024-03-05T08:00:00-05:00"),
+        # An ISO week date names the Monday of that week
+        ("2024-W10", "2024-03-04T08:00:00-05:00"),
+        ("2024-W10-3", "2024-03-06T08:00:00-05:00"),
+    ],
+)
+def test_date_alone_means_eight_in_the_morning(user_response, expected):
+    assert parse_selected_slot(user_response, NOW) == expected
+
+
+def test_resolves_in_the_given_timezone():
+    assert (
+        parse_selected_slot("tomorrow at 2 PM", NOW, "America/Chicago")
+        == "2024-03-04T14:00:00-06:00"
+    )
+    # 23:30 in New York is already Saturday in London, which rolls to Monday
+    late = NOW.replace(hour=23, minute=30)
+    assert parse_selected_slot("today", late, "Europe/London") == (
+        "2024-03-04T08:00:00+00:00"
+    )
+
+
+def test_localize_wall_time_keeps_the_clock_time():
+    assert (
+        localize_wall_time("2024-03-04T14:00:00-04:00", "America/Chicago")
+        == "2024-03-04T14:00:00-06:00"
+    )
+    assert localize_wall_time("not a timestamp") == "not a timestamp"
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from utils.api import BOOK_SLOT_TOOL, ToolSettings, book_slots_for_tool_calls
+from utils.codec import ToolCall
+from utils.idempotency import BookingIdempotency, booking_key
+
+
+class Booking:
+    """Counts executions; each one waits for `release` and answers `outcome`."""
+
+    def __init__(self, outcome=("Appointment booked succesfully", True)):
+        self.outcome = outcome
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        return self.outcome
+
+
+@pytest.fixture
+def idempotency():
+    return BookingIdempotency(ttl=60, maxsize=16)
+
+
+async def test_concurrent_duplicates_join_one_execution(idempotency):
+    booking = Booking()
+    booking.release.clear()
+    duplicates = [
+        asyncio.create_task(idempotency.run("key", booking)) for _ in range(5)
+    ]
+    await asyncio.sleep(0)
+    booking.release.set()
+
+    results = await asyncio.gather(*duplicates)
+
+    assert booking.calls == 1
+    assert results == ["Appointment booked succesfully"] * 5
+    assert idempotency.stats()["coalesced"] == 4
+
+
+async def test_later_retry_replays_the_stored_result(idempotency):
+    booking = Booking()
+
+    first = await idempotency.run("key", booking)
+    retry = await idempotency.run("key", booking)
+    other = await idempotency.run("other", booking)
+
+    assert booking.calls == 2  # Once for "key", once for "other"
+    assert first == retry == other
+    assert idempotency.replayed == 1
+
+
+async def test_transient_failure_is_not_replayed(idempotency):
+    first = await idempotency.run("key", Booking(("Request Error", False)))
+    retry = await idempotency.run("key", Booking())
+
+    assert first == "Request Error"
+    assert retry == "Appointment booked succesfully"
+    assert idempotency.replayed == 0
+
+
+def test_booking_key_ignores_formatting():
+    assert booking_key(
+        "calendar", "+1 (555) 000-0000", "2024-03-04T09:00:00-05:00"
+    ) == booking_key("calendar", "15550000000", "2024-03-04T14:00:00+00:00")
+    assert booking_key("calendar", "1", "tomorrow") == (
+        "slot",
+        "calendar",
+        "1",
+        "tomorrow",
+    )
+
+
+def booking_call(id, phone):
+    return ToolCall(
+        id,
+        BOOK_SLOT_TOOL,
+        {
+            "selectedSlot": "2024-03-04T09:00:00-05:00",
+            "firstName": "Ada",
+            "lastName": "Lovelace",
+            "phone": phone,
+        },
+    )
+
+
+async def test_duplicate_tool_calls_post_one_booking(ghl, idempotency):
+    settings = ToolSettings(alternative_slots=0)
+
+    def book(*tool_calls):
+        return book_slots_for_tool_calls(
+            list(tool_calls), None, None, ghl, idempotency, settings=settings
+        )
+
+    # A webhook retried with a new toolCallId while the first is in flight
+    concurrent = await book(
+        booking_call("a", "+1 555 000 0000"), booking_call("b", "15550000000")
+    )
+    # And the first tool call retried after it finished
+    retried = await book(booking_call("a", "+1 555 000 0000"))
+
+    assert len(ghl.bookings) == 1
+    expected = {"message": "Appointment booked successfully."}
+    assert [entry["result"] for entry in concurrent + retried] == [expected] * 3
@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from utils.limiter import ConcurrencyLimiter
+
+
+def limiter(**kwargs):
+    kwargs = {"mode": "fixed", "max_limit": 1, "max_queue": 1, **kwargs}
+    return ConcurrencyLimiter("test", **kwargs)
+
+
+async def hold(limiter, release):
+    async with limiter.permit():
+        await release.wait()
+
+
+async def test_full_queue_sheds_with_503():
+    shared = limiter(queue_timeout=5.0)
+    release = asyncio.Event()
+    holder = asyncio.create_task(hold(shared, release))
+    queued = asyncio.create_task(hold(shared, release))
+    await asyncio.sleep(0)
+
+    with pytest.raises(HTTPException) as shed:
+        await shared.acquire()
+    release.set()
+    await asyncio.gather(holder, queued)
+
+    assert shed.value.status_code == 503
+    stats = shared.stats()
+    assert (stats["acquired"], stats["rejected"], stats["in_flight"]) == (2, 1, 0)
+    assert stats["queue_depth"] == 0
+
+
+async def test_queued_call_times_out_with_503():
+    shared = limiter(queue_timeout=0.01)
+    release = asyncio.Event()
+    holder = asyncio.create_task(hold(shared, release))
+    await asyncio.sleep(0)
+
+    with pytest.raises(HTTPException) as shed:
+        await shared.acquire()
+    release.set()
+    await holder
+
+    assert shed.value.status_code == 503
+    assert shared.timed_out == 1
+    assert shared.in_flight == 0
+    assert shared.stats()["queue_depth"] == 0
+
+
+async def test_cancelled_waiter_leaves_the_queue_and_the_permit_moves_on():
+    shared = limiter(max_queue=2, queue_timeout=5.0)
+    release = asyncio.Event()
+    holder = asyncio.create_task(hold(shared, release))
+    await asyncio.sleep(0)
+    cancelled = asyncio.create_task(shared.acquire())
+    next_in_line = asyncio.create_task(hold(shared, asyncio.Event()))
+    await asyncio.sleep(0)
+
+    cancelled.cancel()
+    await asyncio.gather(cancelled, return_exceptions=True)
+    release.set()
+    await holder
+    await asyncio.sleep(0)
+
+    # The permit went to the next waiter, not to the cancelled one
+    assert shared.in_flight == 1
+    next_in_line.cancel()
+    await asyncio.gather(next_in_line, return_exceptions=True)
+    assert shared.in_flight == 0
+    assert shared.stats()["queue_depth"] == 0
+
+
+async def test_cancellation_racing_the_grant_does_not_leak_the_permit():
+    shared = limiter(queue_timeout=5.0)
+    await shared.acquire()
+    done = asyncio.Event()
+    done.set()
+    waiter = asyncio.create_task(hold(shared, done))
+    await asyncio.sleep(0)
+
+    # Granted and cancelled before the waiter gets to run again
+    shared.release(0.0)
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+
+    assert shared.in_flight == 0
+    assert shared.stats()["queue_depth"] == 0
+
+
+def test_aimd_backs_off_on_overload_and_grows_back():
+    shared = limiter(mode="aimd", max_limit=10, backoff_ratio=0.5)
+    start = shared.limit
+
+    shared.in_flight = 1
+    shared.release(0.01, overloaded=True)
+
+    assert shared.limit == start * 0.5
+
+    for _ in range(20):
+        shared.in_flight = int(shared.limit)
+        shared.release(0.01)
+
+    assert shared.limit == shared.max_limit
+
+
+async def test_off_mode_never_waits():
+    unlimited = ConcurrencyLimiter("test", mode="off", max_queue=0)
+
+    for _ in range(100):
+        await unlimited.acquire()
+
+    assert unlimited.in_flight == 100
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        ConcurrencyLimiter("test", mode="bogus")
@@ -0,0 +1,79 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from utils.prefetch import SlotPrefetcher
+from utils.tz import epoch_ms_to_date
+
+
+@pytest.fixture
+def slot_prefetcher(ghl, clock):
+    return SlotPrefetcher(ghl, clock=clock)
+
+
+async def test_refresh_publishes_a_snapshot(slot_prefetcher, ghl):
+    assert slot_prefetcher.snapshot() is None
+
+    assert await slot_prefetcher.refresh() == 200
+
+    start_epoch_ms, end_epoch_ms, slot_data = slot_prefetcher.snapshot()
+    assert (start_epoch_ms, end_epoch_ms) == ghl.windows[-1]
+    assert start_epoch_ms < end_epoch_ms
+    assert slot_prefetcher.stats()["refreshes"] == 1
+
+
+async def test_refresh_racing_an_invalidation_is_not_published(slot_prefetcher, ghl):
+    ghl.release.clear()
+    refresh = asyncio.create_task(slot_prefetcher.refresh())
+    await ghl.started.wait()
+    # A booking lands while the first refresh is in flight
+    slot_prefetcher.invalidate(epoch_ms_to_date(ghl.windows[0][0], ghl.timezone))
+    ghl.release.set()
+    await refresh
+
+    assert slot_prefetcher.snapshot() is None
+    assert slot_prefetcher.refreshes == 0
+    assert slot_prefetcher._wake.is_set()
+
+
+async def test_invalidate_outside_the_window_keeps_the_snapshot_but_wakes(
+    slot_prefetcher,
+):
+    await slot_prefetcher.refresh()
+    generation = slot_prefetcher._generation
+    start_epoch_ms, end_epoch_ms, _ = slot_prefetcher.snapshot()
+    after_window = epoch_ms_to_date(end_epoch_ms, slot_prefetcher.timezone)
+
+    slot_prefetcher.invalidate(after_window + timedelta(days=1))
+
+    assert slot_prefetcher.snapshot() is not None
+    assert slot_prefetcher._generation == generation + 1
+    assert slot_prefetcher._wake.is_set()
+
+    slot_prefetcher.invalidate(
+        epoch_ms_to_date(start_epoch_ms, slot_prefetcher.timezone)
+    )
+
+    assert slot_prefetcher.snapshot() is None
+
+
+async def test_stale_snapshot_is_not_served(slot_prefetcher, clock):
+    await slot_prefetcher.refresh()
+
+    clock.now += slot_prefetcher.max_age + 1
+
+    assert slot_prefetcher.snapshot() is None
+
+
+async def test_failed_refresh_backs_off(slot_prefetcher, ghl):
+    ghl.status_code = 503
+
+    status_code = await slot_prefetcher.refresh()
+    first = slot_prefetcher.next_delay(status_code)
+    second = slot_prefetcher.next_delay(status_code)
+
+    assert slot_prefetcher.snapshot() is None
+    assert slot_prefetcher.refresh_errors == 1
+    assert slot_prefetcher.failures == 2
+    assert second > first >= slot_prefetcher.interval * 2
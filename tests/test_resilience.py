@@ -0,0 +1,255 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from ghl_cls import RETRYABLE_ERRORS, UNSENT_ERRORS, GoHighLevelClient
+from utils.resilience import CircuitBreaker, Resilience
+
+
+class SentError(Exception):
+    """Failed after the request left, like a read timeout."""
+
+
+class UnsentError(Exception):
+    """Failed before the request left, like a refused connection."""
+
+
+class Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def resilience(**kwargs):
+    kwargs = {
+        "attempts": 3,
+        "base_delay": 0.0,
+        "retryable_errors": (SentError, UnsentError),
+        "unsent_errors": (UnsentError,),
+        **kwargs,
+    }
+    return Resilience("test", **kwargs)
+
+
+def attempts(*outcomes):
+    """Returns a send() that plays `outcomes` in turn, and the list of its calls."""
+    calls = []
+
+    async def send():
+        outcome = outcomes[len(calls)]
+        calls.append(outcome)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    return send, calls
+
+
+async def test_sent_non_idempotent_request_is_not_retried():
+    send, calls = attempts(SentError(), Response(200))
+
+    with pytest.raises(SentError):
+        await resilience().call(send, idempotent=False)
+
+    assert len(calls) == 1
+
+
+async def test_unsent_non_idempotent_request_is_retried():
+    send, calls = attempts(UnsentError(), Response(201))
+
+    response = await resilience().call(send, idempotent=False)
+
+    assert response.status_code == 201
+    assert len(calls) == 2
+
+
+async def test_non_idempotent_5xx_is_returned_without_retry():
+    send, calls = attempts(Response(503), Response(201))
+
+    response = await resilience().call(send, idempotent=False)
+
+    assert response.status_code == 503
+    assert len(calls) == 1
+
+
+async def test_idempotent_request_retries_until_attempts_run_out():
+    send, calls = attempts(SentError(), Response(503), Response(502))
+    policy = resilience()
+
+    response = await policy.call(send)
+
+    assert response.status_code == 502
+    assert len(calls) == 3
+    assert policy.retries == 2
+
+
+async def test_deadline_stops_a_slow_attempt():
+    async def send():
+        await asyncio.sleep(1)
+
+    policy = resilience(attempts=1, deadline=0.01)
+
+    with pytest.raises(TimeoutError):
+        await policy.call(send)
+
+    assert policy.deadline_exceeded == 1
+
+
+async def test_hedge_takes_the_faster_attempt():
+    calls = []
+
+    async def send():
+        calls.append(None)
+        await asyncio.sleep(1 if len(calls) == 1 else 0)
+        return Response(200, {"attempt": len(calls)})
+
+    policy = resilience(hedge=True, hedge_delay=0.01)
+
+    response = await policy.call(send, hedge=True)
+
+    assert response.headers == {"attempt": 2}
+    assert (policy.hedges, policy.hedge_wins) == (1, 1)
+
+
+def test_breaker_opens_then_lets_one_probe_through(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30, clock=clock)
+
+    breaker.record_failure()
+    breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(HTTPException) as refused:
+        breaker.allow()
+    assert refused.value.status_code == 503
+
+    clock.now += 30
+    breaker.allow()  # The probe
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(HTTPException):
+        breaker.allow()  # Only one probe at a time
+
+    breaker.record_success()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.allow()
+
+
+def test_failed_probe_reopens_the_breaker(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+
+    clock.now += 30
+    breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 29
+    with pytest.raises(HTTPException):
+        breaker.allow()
+    clock.now += 1
+    breaker.allow()
+
+
+async def test_cancelled_probe_lets_the_next_call_probe(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    clock.now += 30
+
+    async def send():
+        await asyncio.sleep(1)
+
+    probe = asyncio.create_task(resilience(breaker=breaker).call(send))
+    await asyncio.sleep(0)
+    probe.cancel()
+    await asyncio.gather(probe, return_exceptions=True)
+
+    breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def booking_client(monkeypatch, errors):
+    """A GoHighLevelClient whose transport raises `errors` in turn, then answers 200."""
+    monkeypatch.setenv("CALENDAR_ID", "calendar")
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if len(requests) <= len(errors):
+            raise errors[len(requests) - 1]("failed", request=request)
+        return httpx.Response(200, json={"id": "appointment"})
+
+    ghl = GoHighLevelClient(
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        resilience=resilience(
+            retryable_errors=RETRYABLE_ERRORS, unsent_errors=UNSENT_ERRORS
+        ),
+    )
+    return ghl, requests
+
+
+def book(ghl):
+    return ghl.check_slot_bookable(
+        "Ada", "Lovelace", "+15550000000", "Phone", "2024-03-04T09:00:00-05:00"
+    )
+
+
+async def test_booking_post_that_timed_out_is_not_resent(monkeypatch):
+    ghl, requests = booking_client(monkeypatch, [httpx.ReadTimeout])
+
+    assert await book(ghl) == ("Request Error", None)
+    assert len(requests) == 1
+
+
+async def test_booking_post_that_never_connected_is_retried(monkeypatch):
+    ghl, requests = booking_client(monkeypatch, [httpx.ConnectError])
+
+    assert await book(ghl) == ("Appointment booked succesfully", 200)
+    assert len(requests) == 2
+
+
+async def test_local_errors_leave_the_breaker_alone(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=30, clock=clock)
+    policy = resilience(attempts=1, breaker=breaker)
+    shed = HTTPException(status_code=503, detail="busy")
+
+    # Real upstream failures interleaved with load shedding and a config error
+    for outcome in (SentError(), shed, SentError(), ValueError("no key"), SentError()):
+        send, _ = attempts(outcome)
+        with pytest.raises((SentError, HTTPException, ValueError)):
+            await policy.call(send)
+
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+async def test_shed_probe_does_not_close_the_breaker(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    clock.now += 30
+    policy = resilience(attempts=1, breaker=breaker)
+
+    send, _ = attempts(HTTPException(status_code=503, detail="busy"))
+    with pytest.raises(HTTPException):
+        await policy.call(send)
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.allow()  # The next call may still probe
+
+
+async def test_upstream_error_response_counts_as_an_answer(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    clock.now += 30
+    policy = resilience(attempts=1, breaker=breaker)
+    request = httpx.Request("POST", "https://example.com")
+    rejected = httpx.HTTPStatusError(
+        "bad request", request=request, response=httpx.Response(400, request=request)
+    )
+
+    send, _ = attempts(rejected)
+    with pytest.raises(httpx.HTTPStatusError):
+        await policy.call(send)
+
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,94 @@
+from datetime import datetime
+
+import pytest
+
+from utils.slot_index import SlotIndex, slot_epoch_ms
+
+SLOT_DATA = {
+    "2024-03-04": {
+        "slots": [
+            "2024-03-04T11:00:00-05:00",
+            "2024-03-04T09:00:00-05:00",  # GoHighLevel does not promise order
+            "2024-03-04T10:00:00-05:00",
+        ]
+    },
+    "2024-03-05": {"slots": ["2024-03-05T09:00:00-05:00", "2024-03-05T13:00:00-05:00"]},
+    "2024-03-06": {"slots": ["not a slot", "2024-03-06T09:00:00-05:00"]},
+    "traceId": "abc",
+}
+
+
+def epoch_ms(slot_str):
+    return int(datetime.fromisoformat(slot_str).timestamp() * 1000)
+
+
+def test_slot_epoch_ms_matches_fromisoformat():
+    for slot_str in (
+        "2024-03-04T09:00:00-05:00",
+        "2024-07-01T23:30:00+05:30",
+        "1999-12-31T00:00:00+00:00",
+        "2024-03-04T09:00:00.500-05:00",
+    ):
+        assert slot_epoch_ms(slot_str) == epoch_ms(slot_str)
+
+
+def test_slot_epoch_ms_rejects_out_of_range_fields():
+    for slot_str in (
+        "2024-13-45T25:00:00-04:00",
+        "2024-02-30T09:00:00-05:00",
+        "2023-02-29T09:00:00-05:00",
+        "2024-03-04T09:60:00-05:00",
+        "2024-03-04T09:00:00-24:00",
+        "2024-+3-04T09:00:00-05:00",
+    ):
+        with pytest.raises(ValueError):
+            slot_epoch_ms(slot_str)
+
+
+def test_slot_epoch_ms_accepts_leap_days():
+    for slot_str in ("2024-02-29T09:00:00-05:00", "2000-02-29T09:00:00+00:00"):
+        assert slot_epoch_ms(slot_str) == epoch_ms(slot_str)
+
+
+def test_first_slots_leaves_an_hour_and_falls_back_to_the_last_slot():
+    index = SlotIndex(SLOT_DATA)
+
+    at_half_past_eight = index.first_slots(epoch_ms("2024-03-04T08:30:00-05:00"))
+    after_hours = index.first_slots(epoch_ms("2024-03-04T12:00:00-05:00"))
+
+    assert at_half_past_eight == [
+        ("2024-03-04", "2024-03-04T10:00:00-05:00"),
+        ("2024-03-05", "2024-03-05T09:00:00-05:00"),
+    ]
+    # No slot is an hour away any more: the day's last slot in API order
+    assert after_hours[0] == ("2024-03-04", "2024-03-04T10:00:00-05:00")
+
+
+def test_trim_keeps_only_the_window():
+    index = SlotIndex(SLOT_DATA)
+
+    trimmed = index.trim(
+        epoch_ms("2024-03-04T10:00:00-05:00"), epoch_ms("2024-03-05T09:00:00-05:00")
+    )
+
+    assert trimmed == {
+        "2024-03-04": {
+            "slots": ["2024-03-04T10:00:00-05:00", "2024-03-04T11:00:00-05:00"]
+        },
+        "2024-03-05": {"slots": ["2024-03-05T09:00:00-05:00"]},
+    }
+    assert index.trim(0, 1) == {}
+
+
+def test_nearest_skips_the_taken_slot_and_returns_time_order():
+    index = SlotIndex(SLOT_DATA)
+    taken = epoch_ms("2024-03-04T10:00:00-05:00")
+
+    assert index.nearest(taken, 3) == [
+        "2024-03-04T09:00:00-05:00",
+        "2024-03-04T11:00:00-05:00",
+        "2024-03-05T09:00:00-05:00",
+    ]
+    assert index.nearest(taken, 0) == []
+    # Everything but the taken slot and the one that does not parse
+    assert len(index.nearest(taken, 100)) == len(index) - 2
@@ -0,0 +1,100 @@
+from datetime import date, time
+
+import httpx
+
+from ghl_cls import GoHighLevelClient
+from utils.api import ToolSettings, fetch_and_process_slots
+from utils.ghl import add_business_days
+from utils.tz import epoch_ms_to_date, local_to_epoch_ms
+
+TIMEZONE = "America/New_York"
+
+
+def search(ghl, start, **settings):
+    start_ms = local_to_epoch_ms(start, time(9, 0), TIMEZONE)
+    return fetch_and_process_slots(start_ms, ghl, settings=ToolSettings(**settings))
+
+
+async def test_empty_calendar_stops_at_the_horizon(ghl):
+    assert await search(ghl, date(2024, 3, 4)) == []
+
+    # The horizon doubles 1, 2, 4, 8 business days, then the search gives up
+    assert len(ghl.windows) == 4
+    last_day = epoch_ms_to_date(ghl.windows[-1][1], TIMEZONE)
+    assert last_day == add_business_days(date(2024, 3, 4), 8) == date(2024, 3, 14)
+
+
+async def test_windows_continue_where_the_previous_one_ended(ghl):
+    await search(ghl, date(2024, 3, 4))
+
+    for (_, previous_end), (start, _) in zip(ghl.windows, ghl.windows[1:]):
+        assert start == previous_end + 1
+
+
+async def test_stops_once_enough_slots_are_found(ghl):
+    ghl.slot_data = {
+        "2024-03-06": {
+            "slots": ["2024-03-06T10:00:00-05:00", "2024-03-06T11:00:00-05:00"]
+        },
+        "2024-03-07": {"slots": ["2024-03-07T09:00:00-05:00"]},
+    }
+
+    slots = await search(ghl, date(2024, 3, 4))
+
+    assert slots == ["2024-03-06T10:00:00-05:00", "2024-03-07T09:00:00-05:00"]
+    assert len(ghl.windows) == 3  # 1 day, 2 days, then 4 days reaches Mar 7
+
+
+async def test_weekend_start_searches_from_monday_opening(ghl):
+    ghl.holidays = frozenset({date(2024, 3, 11)})
+
+    await search(ghl, date(2024, 3, 9))
+
+    assert ghl.windows[0][0] == local_to_epoch_ms(date(2024, 3, 11), time(8), TIMEZONE)
+    # The holiday is skipped when counting business days
+    last_day = epoch_ms_to_date(ghl.windows[-1][1], TIMEZONE)
+    assert last_day == date(2024, 3, 21)
+
+
+async def test_single_window_when_initial_horizon_is_the_cap(ghl):
+    await search(ghl, date(2024, 3, 4), slot_search_initial_days=8)
+
+    assert len(ghl.windows) == 1
+
+
+async def test_min_slots_above_what_is_offered_is_clamped(ghl):
+    ghl.slot_data = {
+        "2024-03-04": {"slots": ["2024-03-04T11:00:00-05:00"]},
+        "2024-03-05": {"slots": ["2024-03-05T09:00:00-05:00"]},
+    }
+
+    slots = await search(ghl, date(2024, 3, 4), slot_search_min_slots=5)
+
+    # Two slots is all first_slots picks, so the search stops instead of running on
+    assert slots == ["2024-03-04T11:00:00-05:00", "2024-03-05T09:00:00-05:00"]
+    assert len(ghl.windows) == 1
+
+
+def test_search_settings_are_read_from_the_environment(monkeypatch):
+    monkeypatch.setenv("SLOT_SEARCH_INITIAL_DAYS", "0")
+    monkeypatch.setenv("SLOT_SEARCH_MAX_DAYS", "4")
+    monkeypatch.setenv("SLOT_SEARCH_MIN_SLOTS", "1")
+
+    settings = ToolSettings.from_env()
+
+    assert settings.slot_search_initial_days == 1
+    assert settings.slot_search_max_days == 4
+    assert settings.slot_search_min_slots == 1
+
+
+def test_holidays_are_parsed_once_per_client(monkeypatch):
+    monkeypatch.setenv("BUSINESS_HOLIDAYS", "2024-03-11, 2024-12-25")
+    ghl = GoHighLevelClient(http_client=httpx.AsyncClient())
+    monkeypatch.setenv("BUSINESS_HOLIDAYS", "")
+
+    assert ghl.holidays == frozenset({date(2024, 3, 11), date(2024, 12, 25)})
+
+
+def test_add_business_days_crosses_the_year_end():
+    assert add_business_days(date(2024, 12, 27), 3, frozenset()) == date(2025, 1, 1)
+    assert add_business_days(date(2024, 12, 28), 0, frozenset()) == date(2024, 12, 28)
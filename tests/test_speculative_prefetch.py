@@ -0,0 +1,96 @@
+import asyncio
+
+from fastapi import HTTPException
+
+from utils.api import (
+    BOOK_SLOT_TOOL,
+    FETCH_SLOTS_TOOL,
+    ToolSettings,
+    answer_tool_calls,
+    run_with_slot_prefetch,
+    window_end_epoch_ms,
+)
+from utils.codec import ToolCall
+from utils.tz import now_epoch_ms
+
+SELECTED = "2030-03-04T10:00:00-05:00"
+
+
+class ShedGHL:
+    """Sheds every slot query, like a saturated GoHighLevel limiter."""
+
+    timezone = "America/New_York"
+
+    def __init__(self, ghl):
+        self.ghl = ghl
+        self.business_hours = ghl.business_hours
+        self.holidays = ghl.holidays
+
+    async def get_appointment_slots(self, start_epoch_ms, end_epoch_ms, use_cache=True):
+        raise HTTPException(status_code=503, detail="GoHighLevel is overloaded")
+
+
+class BrokenPrefetcher:
+    def snapshot(self):
+        raise RuntimeError("snapshot is corrupt")
+
+
+async def test_shed_prefetch_falls_back_to_a_targeted_fetch(ghl):
+    async def resolve():
+        await asyncio.sleep(0)
+        return "resolved"
+
+    result, prefetched, trace = await run_with_slot_prefetch(
+        resolve(), ShedGHL(ghl), now_epoch_ms()
+    )
+
+    assert (result, prefetched) == ("resolved", None)
+    assert trace["wall_ms"] >= 0
+
+
+async def test_prefetch_days_come_from_the_settings(ghl):
+    settings = ToolSettings(
+        date_fast_path=True, speculative_prefetch=True, speculative_prefetch_days=1
+    )
+    tool_call = ToolCall("fetch", FETCH_SLOTS_TOOL, {"selectedSlot": SELECTED})
+
+    await answer_tool_calls(
+        FETCH_SLOTS_TOOL, [tool_call], None, None, ghl, settings=settings
+    )
+
+    # The speculative window covers one business day after the first one
+    start_epoch_ms, end_epoch_ms = ghl.windows[0]
+    assert end_epoch_ms == window_end_epoch_ms(
+        start_epoch_ms, 1, ghl.timezone, ghl.business_hours[1]
+    )
+
+
+async def test_failed_branch_does_not_lose_the_other_branch(ghl):
+    fetch = ToolCall("fetch", FETCH_SLOTS_TOOL, {"selectedSlot": SELECTED})
+    book = ToolCall(
+        "book",
+        BOOK_SLOT_TOOL,
+        {"selectedSlot": SELECTED, "firstName": "Ada", "phone": "+15550000000"},
+    )
+
+    results = await answer_tool_calls(
+        FETCH_SLOTS_TOOL,
+        [fetch, book],
+        None,
+        None,
+        ghl,
+        slot_prefetcher=BrokenPrefetcher(),
+        settings=ToolSettings(alternative_slots=0),
+    )
+
+    assert results == [
+        {
+            "toolCallId": "fetch",
+            "error": {"message": "Something went wrong while fetching slots."},
+        },
+        {
+            "toolCallId": "book",
+            "result": {"message": "Appointment booked successfully."},
+        },
+    ]
+    assert len(ghl.bookings) == 1
@@ -0,0 +1,68 @@
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from utils.cache import SlotCache
+from utils.registry import Registry
+from utils.tenants import Tenant, TenantDirectory
+
+TIMEZONE = "America/New_York"
+DAY = date(2024, 3, 4)
+
+
+def tenant(id, assistant_id):
+    return Tenant(id, "calendar", "token", assistant_ids=[assistant_id])
+
+
+def webhook(assistant_id=None, phone_number_id=None):
+    return SimpleNamespace(assistant_id=assistant_id, phone_number_id=phone_number_id)
+
+
+@pytest.fixture
+def slot_cache():
+    return SlotCache(ttl=60, maxsize=16)
+
+
+def test_unknown_assistant_resolves_to_the_default_tenant():
+    tenants = [tenant("smith-law", "a1"), tenant("jones-dental", "a2")]
+    directory = TenantDirectory(tenants, default="jones-dental")
+
+    assert directory.resolve("a1").id == "smith-law"
+    assert directory.resolve("unknown").id == "jones-dental"
+    assert TenantDirectory(tenants).resolve("unknown") is None
+
+
+def test_default_tenant_must_be_configured():
+    with pytest.raises(ValueError):
+        TenantDirectory([tenant("smith-law", "a1")], default="jones-dental")
+
+
+async def test_unknown_assistant_is_rejected_without_a_default():
+    registry = Registry()
+    registry.tenants = TenantDirectory([tenant("smith-law", "a1")])
+
+    with pytest.raises(HTTPException) as rejected:
+        await registry.clients_for(webhook("unknown", "unknown"))
+
+    assert rejected.value.status_code == 404
+
+
+async def test_tenants_sharing_a_calendar_do_not_share_entries(slot_cache):
+    await slot_cache.set("smith-law", "calendar", TIMEZONE, DAY, DAY, {"a": 1})
+
+    assert await slot_cache.get("jones-dental", "calendar", TIMEZONE, DAY, DAY) is None
+    assert await slot_cache.get("smith-law", "calendar", TIMEZONE, DAY, DAY) == {"a": 1}
+
+
+async def test_invalidation_is_scoped_to_the_tenant(slot_cache):
+    for tenant_id in ("smith-law", "jones-dental"):
+        await slot_cache.set(tenant_id, "calendar", TIMEZONE, DAY, DAY, {"a": 1})
+
+    await slot_cache.invalidate_day("smith-law", "calendar", TIMEZONE, DAY)
+
+    assert await slot_cache.get("smith-law", "calendar", TIMEZONE, DAY, DAY) is None
+    assert await slot_cache.get("jones-dental", "calendar", TIMEZONE, DAY, DAY)
+    assert await slot_cache.generation("smith-law", "calendar") == 1
+    assert await slot_cache.generation("jones-dental", "calendar") == 0
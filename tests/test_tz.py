@@ -0,0 +1,105 @@
+import random
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from utils.tz import (
+    civil_from_days,
+    days_from_civil,
+    epoch_ms_to_date,
+    epoch_ms_to_isoformat,
+    get_zone,
+    local_to_epoch_ms,
+    offset_table,
+)
+
+TIMEZONES = (
+    "America/New_York",
+    "America/Chicago",
+    "America/Phoenix",  # No DST
+    "Europe/London",
+    "Australia/Sydney",  # DST in the southern summer
+    "Australia/Lord_Howe",  # 30 minute DST
+    "Asia/Kolkata",  # Half-hour offset
+)
+EPOCH = date(1970, 1, 1)
+
+
+def zone_offset(epoch_seconds, timezone_str):
+    moment = datetime.fromtimestamp(epoch_seconds, get_zone(timezone_str))
+    return int(moment.utcoffset().total_seconds())
+
+
+def sample_instants(timezone_str, count=500):
+    """Instants on both sides of every transition, plus random ones in and out of range."""
+    table = offset_table(timezone_str)
+    instants = [
+        instant + delta
+        for instant in table.transitions
+        for delta in (-3600, -1, 0, 1, 3600)
+    ]
+    rng = random.Random(timezone_str)
+    instants += [rng.randrange(table.start, table.end) for _ in range(count)]
+    instants += [table.start - 1, table.end, table.end + 86400 * 400, 0]
+    return instants
+
+
+@pytest.mark.parametrize("timezone_str", TIMEZONES)
+def test_offsets_match_zoneinfo(timezone_str):
+    table = offset_table(timezone_str)
+
+    for instant in sample_instants(timezone_str):
+        assert table.offset(instant) == zone_offset(instant, timezone_str), instant
+
+
+@pytest.mark.parametrize("timezone_str", TIMEZONES)
+def test_epoch_to_local_matches_zoneinfo(timezone_str):
+    zone = get_zone(timezone_str)
+
+    for instant in sample_instants(timezone_str, count=200):
+        expected = datetime.fromtimestamp(instant, zone)
+        assert epoch_ms_to_isoformat(instant * 1000, timezone_str) == (
+            expected.isoformat()
+        )
+        assert epoch_ms_to_date(instant * 1000, timezone_str) == expected.date()
+
+
+@pytest.mark.parametrize("timezone_str", TIMEZONES)
+def test_local_to_epoch_matches_zoneinfo_in_gaps_and_folds(timezone_str):
+    zone = get_zone(timezone_str)
+    table = offset_table(timezone_str)
+    wall_times = []
+    for transition in table.transitions[:20]:
+        local = datetime.fromtimestamp(transition, zone).replace(tzinfo=None)
+        wall_times += [
+            local + timedelta(minutes=delta) for delta in (-90, -30, 0, 30, 90)
+        ]
+    wall_times += [datetime(1999, 7, 1, 12), datetime(2070, 1, 1, 9)]
+
+    for wall in wall_times:
+        expected = int(wall.replace(tzinfo=zone).timestamp() * 1000)
+        epoch_ms = local_to_epoch_ms(wall.date(), wall.time(), timezone_str)
+        assert epoch_ms == expected, wall
+
+
+def test_new_york_switches_to_edt_at_two_in_the_morning():
+    table = offset_table("America/New_York")
+    switch = local_to_epoch_ms(date(2024, 3, 10), time(3, 0), "America/New_York")
+
+    assert table.offset(switch // 1000 - 1) == -5 * 3600
+    assert table.offset(switch // 1000) == -4 * 3600
+    # 02:30 does not exist that night; like zoneinfo, it is read with the EST offset
+    assert local_to_epoch_ms(date(2024, 3, 10), time(2, 30)) == switch + 30 * 60_000
+
+
+def test_civil_day_arithmetic_matches_date():
+    for day in (
+        date(1, 1, 1),
+        date(1900, 3, 1),
+        EPOCH,
+        date(2000, 2, 29),
+        date(9999, 12, 31),
+    ):
+        days = (day - EPOCH).days
+        assert days_from_civil(day.year, day.month, day.day) == days
+        assert civil_from_days(days) == (day.year, day.month, day.day)
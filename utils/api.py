@@ -1,32 +1,140 @@
+import asyncio
 import logging
-from datetime import datetime, time, timedelta
+import os
+import time as time_module
+from datetime import datetime, time
 
-import pytz
 from fastapi import HTTPException, Request
 
-from ghl_cls import GoHighLevelClient
-from utils.ghl import datetime_str_to_epoch_ms, get_first_slots, get_next_business_day
+from chat_gpt_agent import user_message
+from ghl_cls import MISSING_FIELDS_MESSAGE
+from utils.codec import parse_webhook
+from utils.date_parser import localize_wall_time, parse_selected_slot
+from utils.ghl import add_business_days, trim_slot_data
+from utils.idempotency import booking_key
+from utils.metrics import add_server_timing, span
+from utils.slot_index import FIRST_SLOT_DAYS, SlotIndex, slot_epoch_ms
+from utils.tz import (
+    DEFAULT_TIMEZONE,
+    epoch_ms_to_date,
+    get_zone,
+    local_to_epoch_ms,
+    next_business_day_start_ms,
+    now_epoch_ms,
+)
 
 logger = logging.getLogger(__name__)
 
+# Vapi function names answered by this server
+FETCH_SLOTS_TOOL = "fetchSlots"
+BOOK_SLOT_TOOL = "bookSlot"
+TOOLS = (FETCH_SLOTS_TOOL, BOOK_SLOT_TOOL)
 
-def parse_datetime_string(datetime_str):
-    """Parses a datetime string with ISO 8601 format and returns a datetime object."""
+
+def env_flag(name, default):
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+class ToolSettings:
+    """
+    How the tool call handlers behave, resolved once at startup.
+
+    Args:
+        date_fast_path (bool): Resolve simple phrases with the rule-based parser
+            before asking the LLM.
+        speculative_prefetch (bool): Fetch the next business days while a requested
+            slot is being resolved.
+        speculative_prefetch_days (int): Business days the speculative prefetch covers
+            after the first one.
+        slot_search_initial_days (int): Business days the first search window covers
+            after the start; at least 1.
+        slot_search_max_days (int): Horizon at which the search gives up; at least
+            the initial days.
+        slot_search_min_slots (int): Picked slots that end the search; at most the
+            FIRST_SLOT_DAYS slots SlotIndex.first_slots can pick.
+        alternative_slots (int): Alternatives a refused booking offers; 0 disables
+            them.
+        alternative_slot_days (int): Business days after the requested one searched
+            for alternatives.
+    """
+
+    def __init__(
+        self,
+        date_fast_path=True,
+        speculative_prefetch=False,
+        speculative_prefetch_days=3,
+        slot_search_initial_days=1,
+        slot_search_max_days=8,
+        slot_search_min_slots=2,
+        alternative_slots=3,
+        alternative_slot_days=1,
+    ):
+        self.date_fast_path = date_fast_path
+        self.speculative_prefetch = speculative_prefetch
+        self.speculative_prefetch_days = speculative_prefetch_days
+        self.slot_search_initial_days = max(slot_search_initial_days, 1)
+        self.slot_search_max_days = max(
+            slot_search_max_days, self.slot_search_initial_days
+        )
+        if slot_search_min_slots > FIRST_SLOT_DAYS:
+            # More could never be picked, so the search would always run to the cap
+            logger.warning(
+                "SLOT_SEARCH_MIN_SLOTS=%s is more than the %s slots offered, using %s",
+                slot_search_min_slots,
+                FIRST_SLOT_DAYS,
+                FIRST_SLOT_DAYS,
+            )
+        self.slot_search_min_slots = min(slot_search_min_slots, FIRST_SLOT_DAYS)
+        self.alternative_slots = alternative_slots
+        self.alternative_slot_days = max(alternative_slot_days, 0)
+
+    @classmethod
+    def from_env(cls):
+        """
+        Reads the settings from the environment:
+            DATE_FAST_PATH (bool): default true.
+            SPECULATIVE_PREFETCH (bool): default false.
+            SPECULATIVE_PREFETCH_DAYS (int): default 3.
+            SLOT_SEARCH_INITIAL_DAYS (int): default 1.
+            SLOT_SEARCH_MAX_DAYS (int): default 8.
+            SLOT_SEARCH_MIN_SLOTS (int): default 2.
+            ALTERNATIVE_SLOTS (int): default 3.
+            ALTERNATIVE_SLOT_DAYS (int): default 1.
+        """
+        return cls(
+            date_fast_path=env_flag("DATE_FAST_PATH", "true"),
+            speculative_prefetch=env_flag("SPECULATIVE_PREFETCH", "false"),
+            speculative_prefetch_days=int(os.getenv("SPECULATIVE_PREFETCH_DAYS", "3")),
+            slot_search_initial_days=int(os.getenv("SLOT_SEARCH_INITIAL_DAYS", "1")),
+            slot_search_max_days=int(os.getenv("SLOT_SEARCH_MAX_DAYS", "8")),
+            slot_search_min_slots=int(os.getenv("SLOT_SEARCH_MIN_SLOTS", "2")),
+            alternative_slots=int(os.getenv("ALTERNATIVE_SLOTS", "3")),
+            alternative_slot_days=int(os.getenv("ALTERNATIVE_SLOT_DAYS", "1")),
+        )
+
+
+DEFAULT_SETTINGS = ToolSettings()
+
+
+def parse_datetime_string(datetime_str, timezone_str=DEFAULT_TIMEZONE):
+    """
+    Parses a datetime string with ISO 8601 format and returns a datetime object.
+
+    Naive strings are taken as wall time in `timezone_str`; times in the past are
+    replaced by now.
+    """
 
     try:
         # Use ISO 8601 format for parsing
         parsed_datetime = datetime.fromisoformat(datetime_str)
-        now_edt = datetime.now(pytz.timezone("America/New_York"))
-        # Localize the parsed datetime to EDT (if it doesn't have a timezone)
+        now_local = datetime.now(get_zone(timezone_str))
+        # Localize the parsed datetime to the tenant's timezone (if it has none)
         if parsed_datetime.tzinfo is None:
-            parsed_datetime = pytz.timezone("America/New_York").localize(
-                parsed_datetime
-            )
+            parsed_datetime = parsed_datetime.replace(tzinfo=get_zone(timezone_str))
 
-        # Compare in EDT timezone
-        # INFO: dependant on internal python comparison, didn't checked their algos
-        if parsed_datetime < now_edt:
-            return now_edt
+        # Aware datetimes compare as instants, whatever their offsets
+        if parsed_datetime < now_local:
+            return now_local
         else:
             return parsed_datetime
     except ValueError:
@@ -35,6 +143,150 @@ def parse_datetime_string(datetime_str):
         )
 
 
+async def resolve_selected_slot(
+    chat_gpt_agent,
+    user_selected_slot,
+    date_cache=None,
+    request_class="fetch",
+    timezone_str=DEFAULT_TIMEZONE,
+    fast_path=True,
+):
+    """
+    Turns the user's requested slot into an ISO 8601 datetime string.
+
+    Simple phrases and ISO timestamps are resolved locally by the rule-based parser;
+    only input it does not understand is sent to the LLM. Pass fast_path=False
+    (DATE_FAST_PATH=false) to always use the LLM. Successful LLM answers are memoized
+    in `date_cache`.
+
+    Args:
+        chat_gpt_agent (ChatGPTAgent): The agent used for the LLM fallback.
+        user_selected_slot (str): The slot as the user phrased it.
+        date_cache (DateExtractionCache): Optional cache of earlier LLM answers.
+        request_class (str): "fetch" or "book", selecting the LLM model.
+        timezone_str (str): The tenant's timezone. Phrases are read as wall time
+            there, and the LLM's answer is re-localized to it, whatever offset the
+            model picked.
+        fast_path (bool): Try the rule-based parser first.
+
+    Returns:
+        tuple: (success, slot) as returned by ChatGPTAgent.extract_date_time.
+    """
+    now = datetime.now(get_zone(timezone_str))
+    if fast_path:
+        with span("date_fast_path"):
+            selected_slot = parse_selected_slot(user_selected_slot, now, timezone_str)
+        if selected_slot:
+            logger.info(
+                "date fast path hit: %s -> %s", user_selected_slot, selected_slot
+            )
+            return True, selected_slot
+        logger.info("date fast path miss: %s", user_selected_slot)
+
+    use_cache = date_cache is not None and date_cache.enabled and user_selected_slot
+    if use_cache:
+        selected_slot = await date_cache.get(user_selected_slot, now, timezone_str)
+        if selected_slot:
+            logger.info("date cache hit: %s -> %s", user_selected_slot, selected_slot)
+            return True, selected_slot
+
+    final_user_prompt = replace_placeholders(
+        user_message, format_current_time(timezone_str), user_selected_slot
+    )
+    logger.info("user_message %s", final_user_prompt)
+    success, selected_slot = await chat_gpt_agent.extract_date_time(
+        final_user_prompt, request_class
+    )
+    if success:
+        selected_slot = localize_wall_time(selected_slot, timezone_str)
+    if success and use_cache:
+        await date_cache.set(user_selected_slot, now, selected_slot, timezone_str)
+    return success, selected_slot
+
+
+async def prefetch_slot_window(ghl, current_epoch_ms, days=3):
+    """
+    Fetches availability for the next few business days, starting now.
+
+    Args:
+        ghl (GoHighLevelClient): The client used for the fetch.
+        current_epoch_ms (int): The current time in epoch milliseconds.
+        days (int): Business days covered after the first one.
+
+    Returns:
+        tuple: (start_epoch_ms, end_epoch_ms, slot_data), or None if the fetch failed.
+    """
+    start_epoch_ms = next_business_day_start_ms(
+        current_epoch_ms, ghl.timezone, ghl.business_hours[0]
+    )
+    end_epoch_ms = window_end_epoch_ms(
+        start_epoch_ms, days, ghl.timezone, ghl.business_hours[1], ghl.holidays
+    )
+    result, status_code = await ghl.get_appointment_slots(start_epoch_ms, end_epoch_ms)
+    if status_code != 200:
+        logger.info("slot prefetch failed with %s: %s", status_code, result)
+        return None
+    return start_epoch_ms, end_epoch_ms, result
+
+
+async def run_with_slot_prefetch(awaitable, ghl, current_epoch_ms, days=3):
+    """
+    Awaits `awaitable` while speculatively prefetching availability.
+
+    The slot resolution (fast path or LLM) and a GoHighLevel fetch for the next few
+    business days run at the same time, so the request waits for max(LLM, GHL)
+    instead of their sum when the resolved time falls inside the prefetched window.
+    A failed or shed prefetch only costs that overlap: the request falls back to a
+    targeted fetch.
+
+    Returns:
+        tuple: (result, prefetched, trace) where result is what `awaitable` returned,
+        prefetched is the result of prefetch_slot_window (or None) and trace holds
+        the stage timings in milliseconds, including how long the two overlapped.
+    """
+    timings = {}
+
+    async def timed(name, awaitable):
+        started = time_module.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            timings[name] = (time_module.perf_counter() - started) * 1000
+
+    started = time_module.perf_counter()
+    prefetch_task = asyncio.ensure_future(
+        timed(
+            "ghl_ms",
+            prefetch_slot_window(ghl, current_epoch_ms, days),
+        )
+    )
+    try:
+        result = await timed("llm_ms", awaitable)
+    except BaseException:
+        prefetch_task.cancel()
+        raise
+    try:
+        prefetched = await prefetch_task
+    except Exception:  # Including load shedding
+        logger.warning(
+            "slot prefetch raised, falling back to a targeted fetch", exc_info=True
+        )
+        prefetched = None
+
+    wall_ms = (time_module.perf_counter() - started) * 1000
+    trace = {
+        "llm_ms": round(timings.get("llm_ms", 0.0), 1),
+        "ghl_ms": round(timings.get("ghl_ms", 0.0), 1),
+        "wall_ms": round(wall_ms, 1),
+    }
+    trace["overlap_ms"] = round(
+        max(trace["llm_ms"] + trace["ghl_ms"] - trace["wall_ms"], 0.0), 1
+    )
+    logger.info("speculative prefetch trace: %s", trace)
+    add_server_timing("speculative_overlap", trace["overlap_ms"])
+    return result, prefetched, trace
+
+
 # Extract request data and validation logic
 async def process_request(request: Request):
     """
@@ -44,71 +296,633 @@ async def process_request(request: Request):
         request (Request): The incoming FastAPI Request object.
 
     Returns:
-        dict: The first tool call dictionary from the request body.
+        Webhook: Every tool call in the request body, in order, and the assistant and
+        phone number ids used to pick the tenant.
 
     Raises:
         HTTPException: If the request body is missing or has an invalid format.
     """
-    request_body = await request.json()
-    message = request_body.get("message", {})
-    tool_calls = message.get("toolCalls", [])
+    return parse_webhook(await request.body())
 
-    if not tool_calls:
-        return None
 
-    return tool_calls[0]  # Assuming only the first tool call is relevant
+def tool_call_result(tool_call, outcome, error_message):
+    """
+    Builds the result entry for one tool call.
+
+    Args:
+        tool_call (ToolCall): The tool call being answered.
+        outcome: The call's result, or the exception it raised.
+        error_message (str): Message returned for unexpected exceptions.
+
+    Returns:
+        dict: {"toolCallId": ..., "result": ...} or {"toolCallId": ..., "error": {...}}.
+    """
+    tool_call_id = tool_call.id
+    if isinstance(outcome, HTTPException):
+        logger.error("An HTTPException occurred: %s", outcome, exc_info=outcome)
+        return {"toolCallId": tool_call_id, "error": {"message": outcome.detail}}
+    if isinstance(outcome, Exception):
+        logger.error(error_message, exc_info=outcome)
+        return {"toolCallId": tool_call_id, "error": {"message": error_message}}
+    return {"toolCallId": tool_call_id, "result": outcome}
+
+
+def window_end_epoch_ms(
+    start_epoch_ms, days, timezone_str, close_time, holidays=frozenset()
+):
+    """
+    Returns closing time on the `days`-th business day after start_epoch_ms's day,
+    skipping weekends and `holidays`.
+    """
+    start_day = epoch_ms_to_date(start_epoch_ms, timezone_str)
+    return local_to_epoch_ms(
+        add_business_days(start_day, days, holidays), close_time, timezone_str
+    )
+
+
+def first_search_window(
+    search_start_ms,
+    timezone_str,
+    close_time=time(17, 0),
+    open_time=time(8, 0),
+    initial_days=1,
+    holidays=frozenset(),
+):
+    """
+    Returns the (start_epoch_ms, end_epoch_ms) window fetch_and_process_slots fetches
+    first, covering `initial_days` business days after the start; a weekend start
+    moves to the next business day at `open_time`.
+    """
+    # Whole seconds, the precision of GoHighLevel slots
+    start_epoch_ms = next_business_day_start_ms(
+        search_start_ms, timezone_str, open_time
+    )
+    start_epoch_ms -= start_epoch_ms % 1000
+    return start_epoch_ms, window_end_epoch_ms(
+        start_epoch_ms, initial_days, timezone_str, close_time, holidays
+    )
+
+
+def merge_slot_data(merged, slot_data):
+    """Appends the slots of a later window to an accumulated slot response, in date order."""
+    for date, slots_info in slot_data.items():
+        if date in merged and isinstance(slots_info, dict) and "slots" in slots_info:
+            merged[date] = {
+                **merged[date],
+                "slots": merged[date]["slots"] + slots_info["slots"],
+            }
+        else:
+            merged[date] = slots_info
+    return merged
 
 
 # Handle slot fetching and processing
-async def fetch_and_process_slots(current_datetime_edt, edt_timezone, days=1):
-    start_date = get_next_business_day(current_datetime_edt, is_start_date=True)
-    next_day_end_time = edt_timezone.localize(
-        datetime.combine(start_date.date() + timedelta(days=days), time(17, 0))
+async def fetch_and_process_slots(
+    search_start_ms, ghl, prefetched=None, settings=DEFAULT_SETTINGS
+):
+    """
+    Searches forward from the requested time for the slots to offer.
+
+    The first window ends at closing time (5:00 PM unless the tenant's business hours
+    say otherwise) on the SLOT_SEARCH_INITIAL_DAYS-th business day
+    (default: 1) after the start. While fewer than SLOT_SEARCH_MIN_SLOTS candidates
+    (default: 2) are picked, the next window picks up where the last one ended and the
+    horizon doubles, up to SLOT_SEARCH_MAX_DAYS business days (default: 8). Weekends
+    and the client's holidays (BUSINESS_HOLIDAYS) are skipped using the precomputed
+    business-day calendar.
+    Windows are computed on epoch milliseconds in the tenant's timezone throughout.
+
+    Args:
+        search_start_ms (int): The time to search from, in epoch milliseconds.
+        ghl (GoHighLevelClient): The client used for the fetches.
+        prefetched (tuple): Optional (start_epoch_ms, end_epoch_ms, slot_data) from
+            prefetch_slot_window, used instead of fetching when it covers a window.
+        settings (ToolSettings): The search parameters resolved at startup.
+
+    Returns:
+        list: The picked slots as ISO 8601 strings.
+
+    Raises:
+        HTTPException: If GoHighLevel answers with anything but 200.
+    """
+    initial_days = settings.slot_search_initial_days
+    max_days = settings.slot_search_max_days
+    min_slots = settings.slot_search_min_slots
+    start_epoch_ms, end_epoch_ms = first_search_window(
+        search_start_ms,
+        ghl.timezone,
+        ghl.business_hours[1],
+        ghl.business_hours[0],
+        initial_days,
+        ghl.holidays,
+    )
+    window_start_epoch_ms = start_epoch_ms
+    merged = {}
+    days = initial_days
+    while True:
+        logger.info(
+            "slot window start_epoch_ms: %s end_epoch_ms: %s",
+            window_start_epoch_ms,
+            end_epoch_ms,
+        )
+        if (
+            prefetched
+            and prefetched[0] <= window_start_epoch_ms
+            and end_epoch_ms <= prefetched[1]
+        ):
+            # Answer from the speculative prefetch instead of another round trip
+            logger.info("serving slots from speculative prefetch")
+            result = trim_slot_data(prefetched[2], window_start_epoch_ms, end_epoch_ms)
+            status_code = 200
+        else:
+            result, status_code = await ghl.get_appointment_slots(
+                window_start_epoch_ms, end_epoch_ms
+            )
+
+        if status_code != 200:
+            raise HTTPException(
+                status_code=status_code, detail=result
+            )  # Use more specific exceptions
+        logger.info("result: %s", result)
+        merge_slot_data(merged, result)
+        with span("select_slots"):
+            slots = SlotIndex(merged).first_slots(start_epoch_ms)
+        if len(slots) >= min_slots or days >= max_days:
+            break
+        window_start_epoch_ms = end_epoch_ms + 1
+        days = min(days * 2, max_days)
+        end_epoch_ms = window_end_epoch_ms(
+            start_epoch_ms, days, ghl.timezone, ghl.business_hours[1], ghl.holidays
+        )
+
+    picked_slots = [item[1] for item in slots]
+    logger.info("slots: %s picked_slots: %s", slots, picked_slots)
+    return picked_slots
+
+
+async def resolve_search_start(
+    chat_gpt_agent,
+    user_selected_slot,
+    date_cache,
+    timezone_str=DEFAULT_TIMEZONE,
+    fast_path=True,
+):
+    """
+    Returns the time to search slots from, in epoch milliseconds: the requested slot
+    if it resolves (read in `timezone_str`), else now.
+    """
+    current_epoch_ms = now_epoch_ms()
+    if not user_selected_slot:
+        return current_epoch_ms
+    selected_slot_success, user_selected_slot_dt = await resolve_selected_slot(
+        chat_gpt_agent,
+        user_selected_slot,
+        date_cache,
+        timezone_str=timezone_str,
+        fast_path=fast_path,
     )
-    end_date = get_next_business_day(next_day_end_time, is_start_date=False)
     logger.info(
-        f"start_date: {start_date} next_day_end_time:{next_day_end_time} end_date: {end_date}"
+        "selected_slot_success: %s user_selected_slot_date_time: %s",
+        selected_slot_success,
+        user_selected_slot_dt,
     )
-    formatted_start_date = (
-        start_date.strftime("%Y-%m-%d %H:%M:%S")
-        + start_date.strftime("%z")[:3]
-        + ":"
-        + start_date.strftime("%z")[3:]
+    if not selected_slot_success:
+        return current_epoch_ms
+    return int(
+        parse_datetime_string(user_selected_slot_dt, timezone_str).timestamp() * 1000
     )
-    formatted_end_date = (
-        end_date.strftime("%Y-%m-%d %H:%M:%S")
-        + end_date.strftime("%z")[:3]
-        + ":"
-        + end_date.strftime("%z")[3:]
+
+
+async def share_slot_fetches(search_starts, ghl, prefetched=None, initial_days=1):
+    """
+    Fetches availability once for every group of tool calls with overlapping windows.
+
+    Args:
+        search_starts (list): The start epoch milliseconds of each call, or None to
+            skip it.
+        ghl (GoHighLevelClient): The client used for the fetches.
+        prefetched (tuple): A speculative prefetch; groups it covers are not fetched.
+        initial_days (int): Business days of each call's first search window.
+
+    Returns:
+        list: For each call, a (start_epoch_ms, end_epoch_ms, slot_data) tuple to pass
+        as `prefetched` to fetch_and_process_slots, or the given prefetched.
+    """
+    windows = {
+        index: first_search_window(
+            start,
+            ghl.timezone,
+            ghl.business_hours[1],
+            ghl.business_hours[0],
+            initial_days,
+            ghl.holidays,
+        )
+        for index, start in enumerate(search_starts)
+        if start is not None
+    }
+    groups = []  # [window_start, window_end, [indexes]]
+    for index in sorted(windows, key=lambda index: windows[index]):
+        window_start, window_end = windows[index]
+        if groups and window_start <= groups[-1][1]:
+            groups[-1][1] = max(groups[-1][1], window_end)
+            groups[-1][2].append(index)
+        else:
+            groups.append([window_start, window_end, [index]])
+
+    shared = [prefetched] * len(search_starts)
+    groups = [
+        group
+        for group in groups
+        if len(group[2]) > 1
+        and not (prefetched and prefetched[0] <= group[0] and group[1] <= prefetched[1])
+    ]
+    fetched = await asyncio.gather(
+        *(ghl.get_appointment_slots(group[0], group[1]) for group in groups),
+        return_exceptions=True,
     )
-    logger.info(
-        f"formatted_start_date: {formatted_start_date} formatted_end_date: {formatted_end_date}"
+    for (window_start, window_end, indexes), outcome in zip(groups, fetched):
+        if isinstance(outcome, Exception):
+            # Shed or failed: each call fetches (and reports) on its own
+            logger.warning("shared slot fetch failed: %r", outcome)
+            continue
+        result, status_code = outcome
+        if status_code != 200:
+            continue  # each call fetches (and reports) on its own
+        for index in indexes:
+            shared[index] = (window_start, window_end, result)
+    return shared
+
+
+async def fetch_slots_for_tool_calls(
+    tool_calls,
+    chat_gpt_agent,
+    date_cache,
+    ghl,
+    slot_prefetcher=None,
+    settings=DEFAULT_SETTINGS,
+):
+    """
+    Answers every fetchSlots tool call of a request concurrently.
+
+    Date resolutions run in parallel, calls whose search windows overlap share one
+    GoHighLevel fetch, and each call gets its own result or error entry. When the
+    background SlotPrefetcher holds a fresh snapshot, windows inside it are served
+    from the snapshot without going upstream.
+
+    Returns:
+        list: One result entry per tool call, in request order.
+    """
+    selected_slots = [
+        tool_call.arguments.get("selectedSlot") for tool_call in tool_calls
+    ]
+    resolutions = asyncio.gather(
+        *(
+            resolve_search_start(
+                chat_gpt_agent,
+                selected_slot,
+                date_cache,
+                ghl.timezone,
+                settings.date_fast_path,
+            )
+            for selected_slot in selected_slots
+        ),
+        return_exceptions=True,
     )
-    start_epoch_ms = datetime_str_to_epoch_ms(formatted_start_date)
-    end_epoch_ms = datetime_str_to_epoch_ms(formatted_end_date)
-    logger.info(f"start_epoch_ms {start_epoch_ms} end_epoch_ms  {end_epoch_ms}")
-    ghl = GoHighLevelClient()
-    result, status_code = await ghl.get_appointment_slots(start_epoch_ms, end_epoch_ms)
+    prefetched = slot_prefetcher.snapshot() if slot_prefetcher is not None else None
+    if prefetched is None and settings.speculative_prefetch and any(selected_slots):
+        # Fetch the next business days while the slots are being resolved
+        search_starts, prefetched, _ = await run_with_slot_prefetch(
+            resolutions, ghl, now_epoch_ms(), settings.speculative_prefetch_days
+        )
+    else:
+        search_starts = await resolutions
 
-    if status_code != 200:
-        raise HTTPException(
-            status_code=status_code, detail=result
-        )  # Use more specific exceptions
-    logger.info(f"result: {result}")
-    slots = get_first_slots(result, formatted_start_date)
-    if len(slots) < 2:
+    valid_starts = [
+        None if isinstance(start, BaseException) else start for start in search_starts
+    ]
+    shared = await share_slot_fetches(
+        valid_starts, ghl, prefetched, settings.slot_search_initial_days
+    )
+
+    async def pick_slots(start, shared_slots):
+        if isinstance(start, BaseException):
+            raise start
         return await fetch_and_process_slots(
-            current_datetime_edt=current_datetime_edt, edt_timezone=edt_timezone, days=2
+            start, ghl, prefetched=shared_slots, settings=settings
         )
-    picked_slots = [item[1] for item in slots]
-    logger.info(f"slots: {slots} picked_slots: {picked_slots}")
-    return picked_slots
+
+    outcomes = await asyncio.gather(
+        *(pick_slots(start, slots) for start, slots in zip(search_starts, shared)),
+        return_exceptions=True,
+    )
+    return [
+        tool_call_result(
+            tool_call, outcome, "Something went wrong while fetching slots."
+        )
+        for tool_call, outcome in zip(tool_calls, outcomes)
+    ]
+
+
+async def fetch_alternative_slots(selected_slot_ms, ghl, prefetched=None, days=1):
+    """
+    Loads the availability around a slot that is being booked, from now on.
+
+    The prefetcher snapshot or the slot cache answer when they hold the window.
+    Otherwise GoHighLevel is asked without going through the cache: this runs
+    alongside the booking POST, so the answer may predate the booking and must not
+    be cached after the booking invalidated its day.
+
+    Args:
+        selected_slot_ms (int): The slot being booked, in epoch milliseconds.
+        ghl (GoHighLevelClient): The client used for the fetch.
+        prefetched (tuple): Optional (start_epoch_ms, end_epoch_ms, slot_data)
+            snapshot of the background prefetcher.
+        days (int): Business days searched after the slot's day.
+
+    Returns:
+        dict: Slot data for the slot's day and the next `days` business days, or None
+        if the fetch failed.
+    """
+    day = epoch_ms_to_date(selected_slot_ms, ghl.timezone)
+    start_epoch_ms = max(local_to_epoch_ms(day, time.min, ghl.timezone), now_epoch_ms())
+    end_epoch_ms = window_end_epoch_ms(
+        start_epoch_ms, days, ghl.timezone, ghl.business_hours[1], ghl.holidays
+    )
+    if prefetched and prefetched[0] <= start_epoch_ms and end_epoch_ms <= prefetched[1]:
+        return trim_slot_data(prefetched[2], start_epoch_ms, end_epoch_ms)
+    slot_data = await ghl.cached_appointment_slots(start_epoch_ms, end_epoch_ms)
+    if slot_data is not None:
+        return slot_data
+    result, status_code = await ghl.get_appointment_slots(
+        start_epoch_ms, end_epoch_ms, use_cache=False
+    )
+    if status_code != 200:
+        logger.info("alternative slot fetch failed with %s: %s", status_code, result)
+        return None
+    return result
+
+
+def start_alternative_slots(selected_slot, ghl, slot_prefetcher=None, count=3, days=1):
+    """
+    Starts looking up the slots to offer in case booking `selected_slot` is refused.
+
+    Started together with the booking POST, so a conflict is answered with
+    alternatives in the same round trip instead of another fetchSlots turn.
+
+    Args:
+        count (int): Alternatives to offer; 0 disables them.
+        days (int): Business days searched after the selected slot's day.
+
+    Returns:
+        asyncio.Task: Resolves to the `count` slots nearest to the selected one as
+        ISO 8601 strings (empty if the lookup failed), or None when alternatives are
+        disabled or the slot has no timezone offset.
+    """
+    if count <= 0:
+        return None
+    try:
+        selected_slot_ms = slot_epoch_ms(selected_slot)
+    except (TypeError, ValueError):
+        return None
+    prefetched = slot_prefetcher.snapshot() if slot_prefetcher is not None else None
+
+    async def nearest_slots():
+        try:
+            slot_data = await fetch_alternative_slots(
+                selected_slot_ms, ghl, prefetched, days
+            )
+        except Exception:  # Including load shedding: only the suggestions are lost
+            logger.warning("alternative slot lookup failed", exc_info=True)
+            return []
+        if not slot_data:
+            return []
+        with span("select_alternatives"):
+            return SlotIndex(slot_data).nearest(selected_slot_ms, count)
+
+    return asyncio.ensure_future(nearest_slots())
+
+
+async def book_slot(
+    tool_call,
+    chat_gpt_agent,
+    date_cache,
+    ghl,
+    idempotency=None,
+    slot_prefetcher=None,
+    settings=DEFAULT_SETTINGS,
+):
+    """
+    Resolves and books the slot of one bookSlot tool call.
+
+    With a BookingIdempotency store, a retried tool call (same toolCallId) or another
+    booking of the same phone and slot waits for, or replays, the first booking
+    instead of extracting and posting again.
+
+    The slots nearest to the selected one are looked up while the booking is posted;
+    when GoHighLevel refuses the slot they are returned as "alternativeSlots", so the
+    caller can offer them without another fetchSlots call.
+
+    Returns:
+        dict: {"message": ...} describing the booking outcome, plus
+        {"alternativeSlots": [...]} when the slot was taken.
+    """
+    function_arguments = tool_call.arguments
+
+    async def book():
+        user_selected_slot = function_arguments.get("selectedSlot")
+        logger.info("user_selected_slot: %s", user_selected_slot)
+        selected_slot_success, selected_slot = await resolve_selected_slot(
+            chat_gpt_agent,
+            user_selected_slot,
+            date_cache,
+            request_class="book",
+            timezone_str=ghl.timezone,
+            fast_path=settings.date_fast_path,
+        )
+        logger.info(
+            "user_selected_slot_success %s and user_selected_slot %s",
+            selected_slot_success,
+            selected_slot,
+        )
+        if not selected_slot_success:
+            return {"message": selected_slot}, False  # A retry may resolve it
+
+        appointment_details = {
+            "selectedSlot": selected_slot,
+            "firstName": function_arguments.get("firstName"),
+            "lastName": function_arguments.get("lastName"),
+            "phone": function_arguments.get("phone"),
+            "phoneToText": function_arguments.get("phone"),
+        }
+
+        async def post():
+            result, status_code = await ghl.check_slot_bookable(**appointment_details)
+            # Booked or definitively refused; anything else may succeed on retry
+            return (result, status_code), status_code in (200, 422)
+
+        alternatives = start_alternative_slots(
+            selected_slot,
+            ghl,
+            slot_prefetcher,
+            settings.alternative_slots,
+            settings.alternative_slot_days,
+        )
+        try:
+            if idempotency is not None:
+                result, status_code = await idempotency.run(
+                    booking_key(
+                        ghl.calendar_id, appointment_details["phone"], selected_slot
+                    ),
+                    post,
+                )
+            else:
+                (result, status_code), _ = await post()
+        except BaseException:
+            if alternatives is not None:
+                alternatives.cancel()
+            raise
+        slot_taken = status_code == 422 and not str(result).startswith(
+            MISSING_FIELDS_MESSAGE
+        )
+        if status_code == 200:
+            message = "Appointment booked successfully."
+        else:
+            message = result  # Use the API error message directly
+        logger.info(
+            "appointment booking result %s and appointment booking message %s",
+            result,
+            message,
+        )
+        outcome = {"message": message}
+        if alternatives is not None:
+            if slot_taken:
+                outcome["alternativeSlots"] = await alternatives
+                logger.info("alternative slots: %s", outcome["alternativeSlots"])
+            else:
+                alternatives.cancel()
+        return outcome, status_code in (200, 422)
+
+    if idempotency is None or not tool_call.id:
+        message, _ = await book()
+        return message
+    return await idempotency.run(("call", ghl.tenant_id, tool_call.id), book)
+
+
+async def book_slots_for_tool_calls(
+    tool_calls,
+    chat_gpt_agent,
+    date_cache,
+    ghl,
+    idempotency=None,
+    slot_prefetcher=None,
+    settings=DEFAULT_SETTINGS,
+):
+    """Books the slots of every bookSlot tool call concurrently, one result entry each."""
+    outcomes = await asyncio.gather(
+        *(
+            book_slot(
+                tool_call,
+                chat_gpt_agent,
+                date_cache,
+                ghl,
+                idempotency,
+                slot_prefetcher,
+                settings,
+            )
+            for tool_call in tool_calls
+        ),
+        return_exceptions=True,
+    )
+    return [
+        tool_call_result(tool_call, outcome, "Something went wrong when booking slot.")
+        for tool_call, outcome in zip(tool_calls, outcomes)
+    ]
+
+
+async def answer_tool_calls(
+    default_tool,
+    tool_calls,
+    chat_gpt_agent,
+    date_cache,
+    ghl,
+    idempotency=None,
+    slot_prefetcher=None,
+    settings=DEFAULT_SETTINGS,
+):
+    """
+    Answers a batch of tool calls, each by the handler its function name selects.
+
+    A "check availability + book" batch can arrive on either endpoint: fetchSlots
+    calls are answered like /fetchslots and bookSlot calls like /bookslot, both
+    concurrently. Calls with another or no name get the endpoint's own handler. A
+    branch that fails as a whole only fails its own calls; the other branch's
+    results are still returned.
+
+    Args:
+        default_tool (str): FETCH_SLOTS_TOOL or BOOK_SLOT_TOOL, for the endpoint.
+        settings (ToolSettings): The handler settings resolved at startup.
+
+    Returns:
+        list: One result entry per tool call, in request order.
+    """
+    kinds = [
+        tool_call.name if tool_call.name in TOOLS else default_tool
+        for tool_call in tool_calls
+    ]
+    fetches = [
+        call for call, kind in zip(tool_calls, kinds) if kind == FETCH_SLOTS_TOOL
+    ]
+    bookings = [call for call, kind in zip(tool_calls, kinds) if kind == BOOK_SLOT_TOOL]
+
+    async def no_calls():
+        return []
+
+    fetched, booked = await asyncio.gather(
+        (
+            fetch_slots_for_tool_calls(
+                fetches, chat_gpt_agent, date_cache, ghl, slot_prefetcher, settings
+            )
+            if fetches
+            else no_calls()
+        ),
+        (
+            book_slots_for_tool_calls(
+                bookings,
+                chat_gpt_agent,
+                date_cache,
+                ghl,
+                idempotency,
+                slot_prefetcher,
+                settings,
+            )
+            if bookings
+            else no_calls()
+        ),
+        return_exceptions=True,
+    )
+    for outcome in (fetched, booked):
+        if isinstance(outcome, BaseException) and not isinstance(outcome, Exception):
+            raise outcome  # Cancelled: nobody is waiting for the results
+    if isinstance(fetched, Exception):
+        fetched = [
+            tool_call_result(
+                call, fetched, "Something went wrong while fetching slots."
+            )
+            for call in fetches
+        ]
+    if isinstance(booked, Exception):
+        booked = [
+            tool_call_result(call, booked, "Something went wrong when booking slot.")
+            for call in bookings
+        ]
+    results = {FETCH_SLOTS_TOOL: iter(fetched), BOOK_SLOT_TOOL: iter(booked)}
+    return [next(results[kind]) for kind in kinds]
 
 
-def get_current_time_america_new_york():
-    tz = pytz.timezone("America/New_York")
-    now = datetime.now(tz)
-    return now.strftime("%Y-%m-%d %H:%M:%S %Z")
+def format_current_time(timezone_str=DEFAULT_TIMEZONE):
+    """Returns the {{now}} prompt value: the local time, zone name and UTC offset."""
+    now = datetime.now(get_zone(timezone_str))
+    return now.strftime(f"%Y-%m-%d %H:%M:%S %Z ({timezone_str}, UTC%z)")
 
 
 def replace_placeholders(prompt, now, user_response):
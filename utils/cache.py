@@ -0,0 +1,524 @@
+import asyncio
+import os
+import pickle
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+
+from utils.tz import DEFAULT_TIMEZONE, get_zone
+
+CACHE_BACKENDS = ("memory", "redis")
+
+
+class TTLCache:
+    """
+    A bounded in-process cache with per-entry expiry and LRU eviction.
+
+    Args:
+        maxsize (int): Maximum number of entries kept before the least recently used is evicted.
+        ttl (float): Seconds an entry stays valid. A ttl of 0 disables the cache.
+        clock (callable): Monotonic clock returning seconds (default: time.monotonic).
+    """
+
+    def __init__(self, maxsize, ttl, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.maxsize > 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = (self.clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def delete_where(self, predicate):
+        """Deletes every entry whose key matches `predicate` and returns how many were removed."""
+        with self._lock:
+            stale = [key for key in self._data if predicate(key)]
+            for key in stale:
+                del self._data[key]
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        """True if `key` has an unexpired entry; does not count as a hit or miss."""
+        entry = self._data.get(key)
+        return entry is not None and entry[0] > self.clock()
+
+    def stats(self):
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class MemoryNamespace:
+    """
+    One named cache of a MemoryBackend: a TTLCache (or SqliteTTLCache) plus a tag index.
+
+    Tags group entries for invalidation, e.g. every slot window covering one day.
+    Generations are counters bumped on invalidation, so a write can be made
+    conditional on nothing having been invalidated since its value was read.
+    A SqliteTTLCache does disk I/O on every call, so it runs in a worker thread
+    instead of blocking the event loop.
+    """
+
+    shared = False
+
+    def __init__(self, cache):
+        self._cache = cache
+        self._tags = {}
+        self._generations = {}
+        self._blocking = isinstance(cache, SqliteTTLCache)
+
+    @property
+    def enabled(self):
+        return self._cache.enabled
+
+    async def _call(self, method, *args):
+        if self._blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def get(self, key):
+        return await self._call(self._cache.get, key)
+
+    async def generation(self, name):
+        """Returns how often the generation `name` was bumped."""
+        return self._generations.get(name, 0)
+
+    async def bump(self, name):
+        self._generations[name] = self._generations.get(name, 0) + 1
+
+    async def set(self, key, value, tags=(), generation=None):
+        """
+        Stores `value` under `key`, indexed by each of `tags`.
+
+        Args:
+            generation (tuple): Optional (name, expected): the value is only stored
+                while generation(name) is still `expected`.
+
+        Returns:
+            bool: Whether the value was stored.
+        """
+        if not self.enabled:
+            return False
+        if generation is not None and await self.generation(generation[0]) != (
+            generation[1]
+        ):
+            return False
+        await self._call(self._cache.set, key, value)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        if len(self._tags) > 4 * self._cache.maxsize:
+            self._prune_tags()
+        if generation is not None and await self.generation(generation[0]) != (
+            generation[1]
+        ):
+            # Bumped while a sqlite write was in flight
+            await self.delete(key)
+            return False
+        return True
+
+    async def delete(self, key):
+        return await self._call(self._cache.delete, key)
+
+    async def invalidate_tag(self, tag):
+        """Deletes every entry set with `tag` and returns how many were removed."""
+        removed = 0
+        for key in self._tags.pop(tag, ()):
+            removed += await self.delete(key)
+        return removed
+
+    def _prune_tags(self):
+        # Evicted and expired entries leave their keys behind in the index
+        self._tags = {
+            tag: live
+            for tag, keys in self._tags.items()
+            if (live := {key for key in keys if key in self._cache})
+        }
+
+    def close(self):
+        if isinstance(self._cache, SqliteTTLCache):
+            self._cache.close()
+
+    def stats(self):
+        return self._cache.stats()
+
+
+class MemoryBackend:
+    """Keeps every cache in this process; the default, and right for a single worker."""
+
+    shared = False
+
+    def namespace(self, name, maxsize, ttl, path=None):
+        """
+        Returns the cache called `name`.
+
+        Args:
+            name (str): Cache name.
+            maxsize (int): Entries kept before the least recently used is evicted.
+            ttl (float): Seconds an entry stays valid; 0 disables the cache.
+            path (str): Optional sqlite file to persist the entries in.
+        """
+        if path:
+            return MemoryNamespace(SqliteTTLCache(path, maxsize=maxsize, ttl=ttl))
+        return MemoryNamespace(TTLCache(maxsize=maxsize, ttl=ttl))
+
+    async def publish(self, channel, message):
+        """Nothing to do: there are no other workers to tell."""
+
+    async def subscribe(self, channel, handler):
+        """Nothing to do: every invalidation already happened in this process."""
+
+    async def close(self):
+        pass
+
+
+def create_cache_backend():
+    """
+    Builds the backend selected by CACHE_BACKEND:
+        memory (default): Per-process caches.
+        redis: Caches shared through REDIS_URL (default: redis://localhost:6379/0),
+            with keys and channels prefixed by CACHE_KEY_PREFIX (default: ghl:).
+    """
+    backend = os.getenv("CACHE_BACKEND", "memory").lower()
+    if backend not in CACHE_BACKENDS:
+        raise ValueError(
+            f"Unknown CACHE_BACKEND {backend!r}, expected one of {CACHE_BACKENDS}"
+        )
+    if backend == "redis":
+        # Imported here so the redis client is only loaded when it is used
+        from utils.cache_backend import RedisBackend
+
+        return RedisBackend(
+            os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            prefix=os.getenv("CACHE_KEY_PREFIX", "ghl:"),
+        )
+    return MemoryBackend()
+
+
+class SlotCache:
+    """
+    Caches GoHighLevel slot responses by (tenant_id, calendar_id, timezone, start_day,
+    end_day).
+
+    Entries hold the availability of whole days, so any window inside those days is
+    served from the same entry. Keys, invalidation tags and generations are scoped to
+    the tenant, so tenants never read or drop each other's entries, even when they
+    name the same calendar. Configured by SLOT_CACHE_TTL_SECONDS (default: 30)
+    and SLOT_CACHE_MAX_ENTRIES (default: 512); a TTL of 0 disables caching. With a
+    shared backend every worker reads the same entries and generations, so a
+    response fetched before a booking on any worker is not stored after it, and
+    invalidations are broadcast so other workers can drop what they derived from
+    them.
+    """
+
+    INVALIDATION_CHANNEL = "slot-invalidations"
+
+    def __init__(self, ttl=None, maxsize=None, backend=None):
+        if ttl is None:
+            ttl = float(os.getenv("SLOT_CACHE_TTL_SECONDS", "30"))
+        if maxsize is None:
+            maxsize = int(os.getenv("SLOT_CACHE_MAX_ENTRIES", "512"))
+        self.backend = backend or MemoryBackend()
+        self._cache = self.backend.namespace("slots", maxsize=maxsize, ttl=ttl)
+
+    @property
+    def enabled(self):
+        return self._cache.enabled
+
+    async def get(self, tenant_id, calendar_id, timezone, start_day, end_day):
+        return await self._cache.get(
+            (tenant_id, calendar_id, timezone, start_day, end_day)
+        )
+
+    async def generation(self, tenant_id, calendar_id):
+        """
+        Returns a number that changes whenever availability of the tenant's calendar
+        is invalidated, by this worker or (with a shared backend) another one.
+        """
+        return await self._cache.generation(("generation", tenant_id, calendar_id))
+
+    async def set(
+        self,
+        tenant_id,
+        calendar_id,
+        timezone,
+        start_day,
+        end_day,
+        slot_data,
+        generation=None,
+    ):
+        """
+        Stores a slot response for whole days.
+
+        Args:
+            generation (int): generation() from before the response was fetched. If
+                a booking invalidated the calendar since, the response may still
+                offer the booked slot and is not stored.
+
+        Returns:
+            bool: Whether the response was stored.
+        """
+        tags = [("calendar", tenant_id, calendar_id)]
+        day = start_day
+        while day <= end_day:
+            tags.append(("day", tenant_id, calendar_id, timezone, day))
+            day += timedelta(days=1)
+        if generation is not None:
+            generation = (("generation", tenant_id, calendar_id), generation)
+        return await self._cache.set(
+            (tenant_id, calendar_id, timezone, start_day, end_day),
+            slot_data,
+            tags=tags,
+            generation=generation,
+        )
+
+    async def invalidate_day(self, tenant_id, calendar_id, timezone, day):
+        """Drops every cached window of the tenant's calendar that covers `day`."""
+        await self._cache.bump(("generation", tenant_id, calendar_id))
+        removed = await self._cache.invalidate_tag(
+            ("day", tenant_id, calendar_id, timezone, day)
+        )
+        await self._announce(tenant_id, calendar_id, day)
+        return removed
+
+    async def invalidate_calendar(self, tenant_id, calendar_id):
+        await self._cache.bump(("generation", tenant_id, calendar_id))
+        removed = await self._cache.invalidate_tag(("calendar", tenant_id, calendar_id))
+        await self._announce(tenant_id, calendar_id, None)
+        return removed
+
+    async def _announce(self, tenant_id, calendar_id, day):
+        await self.backend.publish(
+            self.INVALIDATION_CHANNEL,
+            {
+                "tenant_id": tenant_id,
+                "calendar_id": calendar_id,
+                "day": day.isoformat() if day is not None else None,
+            },
+        )
+
+    async def subscribe(self, handler):
+        """
+        Calls `handler(tenant_id, calendar_id, day)` when another worker invalidates
+        a day.
+        """
+
+        def on_message(message):
+            # The generation lives in the shared backend and was bumped there
+            day = message.get("day")
+            handler(
+                message["tenant_id"],
+                message["calendar_id"],
+                date.fromisoformat(day) if day else None,
+            )
+
+        await self.backend.subscribe(self.INVALIDATION_CHANNEL, on_message)
+
+    def stats(self):
+        return self._cache.stats()
+
+
+class SqliteTTLCache:
+    """
+    A TTLCache-compatible cache persisted in a sqlite file, so entries survive restarts.
+
+    Expiry uses wall-clock time. Reads bump the entry's last access time, and the least
+    recently used entries are evicted once the table grows beyond `maxsize`.
+
+    Args:
+        path (str): Path of the sqlite database file.
+        maxsize (int): Maximum number of entries kept.
+        ttl (float): Seconds an entry stays valid. A ttl of 0 disables the cache.
+    """
+
+    def __init__(self, path, maxsize, ttl, clock=time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key BLOB PRIMARY KEY, value BLOB, expires_at REAL, accessed_at REAL)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.maxsize > 0
+
+    def get(self, key, default=None):
+        now = self.clock()
+        key_blob = pickle.dumps(key)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key_blob,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (key_blob,))
+                    self._conn.commit()
+                self.misses += 1
+                return default
+            self._conn.execute(
+                "UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key_blob)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return pickle.loads(row[0])
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        now = self.clock()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                (pickle.dumps(key), pickle.dumps(value), now + self.ttl, now),
+            )
+            evicted = self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache "
+                "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,),
+            ).rowcount
+            self._conn.commit()
+            self.evictions += max(evicted, 0)
+
+    def delete(self, key):
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM cache WHERE key = ?", (pickle.dumps(key),)
+            ).rowcount
+            self._conn.commit()
+            return deleted > 0
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def stats(self):
+        return {
+            "size": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class DateExtractionCache:
+    """
+    Memoizes successful LLM date extractions by (normalized user text, timezone,
+    local date, time bucket).
+
+    Relative phrases like "tomorrow" depend on the current time, so the local date in
+    the timezone and the local time of day floored to LLM_CACHE_BUCKET_SECONDS
+    (default: 3600) are part of the key. Buckets follow the tenant's wall clock, so
+    none spans local midnight, even in zones with a fractional-hour offset. Entries
+    expire after LLM_CACHE_TTL_SECONDS (default: 3600) and at most
+    LLM_CACHE_MAX_ENTRIES (default: 1024) are kept. When LLM_CACHE_PATH is set the
+    entries are stored in that sqlite file instead of in memory, unless a shared
+    backend holds them.
+    """
+
+    def __init__(
+        self, ttl=None, maxsize=None, bucket_seconds=None, path=None, backend=None
+    ):
+        if ttl is None:
+            ttl = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+        if maxsize is None:
+            maxsize = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+        if bucket_seconds is None:
+            bucket_seconds = int(os.getenv("LLM_CACHE_BUCKET_SECONDS", "3600"))
+        if path is None:
+            path = os.getenv("LLM_CACHE_PATH")
+        self.bucket_seconds = max(bucket_seconds, 1)
+        self._cache = (backend or MemoryBackend()).namespace(
+            "dates", maxsize=maxsize, ttl=ttl, path=path
+        )
+
+    @property
+    def enabled(self):
+        return self._cache.enabled
+
+    def make_key(self, user_response, now, timezone_str=DEFAULT_TIMEZONE):
+        # The same phrase means another instant in another timezone
+        normalized = re.sub(r"\s+", " ", user_response.strip().lower()).strip(" .!?,")
+        local = now.astimezone(get_zone(timezone_str))
+        local_seconds = local.hour * 3600 + local.minute * 60 + local.second
+        bucket = local_seconds // self.bucket_seconds
+        return normalized, timezone_str, local.date().isoformat(), bucket
+
+    async def get(self, user_response, now, timezone_str=DEFAULT_TIMEZONE):
+        return await self._cache.get(self.make_key(user_response, now, timezone_str))
+
+    async def set(
+        self, user_response, now, selected_slot, timezone_str=DEFAULT_TIMEZONE
+    ):
+        await self._cache.set(
+            self.make_key(user_response, now, timezone_str), selected_slot
+        )
+
+    def close(self):
+        self._cache.close()
+
+    def stats(self):
+        return self._cache.stats()
@@ -0,0 +1,243 @@
+import asyncio
+import logging
+import uuid
+from datetime import date
+
+from utils.cache import MemoryBackend
+from utils.codec import dumps, loads
+
+try:
+    import redis.asyncio as redis_asyncio
+    from redis.exceptions import RedisError, WatchError
+except ImportError:  # Optional: only needed for CACHE_BACKEND=redis
+    redis_asyncio = None
+    RedisError = OSError
+
+    class WatchError(Exception):
+        pass
+
+
+logger = logging.getLogger(__name__)
+
+
+def _key_string(key):
+    parts = key if isinstance(key, tuple) else (key,)
+    return ":".join(
+        part.isoformat() if isinstance(part, date) else str(part) for part in parts
+    )
+
+
+class RedisNamespace:
+    """
+    One named cache stored in Redis and shared by every worker.
+
+    Values are JSON encoded (tuples come back as lists). Expiry is Redis' own;
+    size is bounded by the server's maxmemory policy rather than `maxsize`.
+    Generations are Redis counters, so every worker sees every bump, and a
+    conditional set WATCHes the counter so it fails if a bump lands before the
+    write. Redis errors are logged and treated as cache misses (or a lost
+    conditional write), so an outage only costs upstream calls.
+    """
+
+    shared = True
+
+    def __init__(self, client, prefix, ttl):
+        self.client = client
+        self.prefix = prefix
+        self.ttl_ms = int(ttl * 1000)
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @property
+    def enabled(self):
+        return self.ttl_ms > 0
+
+    def _key(self, key):
+        return f"{self.prefix}{_key_string(key)}"
+
+    def _tag_key(self, tag):
+        return f"{self.prefix}tag:{_key_string(tag)}"
+
+    def _generation_key(self, name):
+        return f"{self.prefix}gen:{_key_string(name)}"
+
+    def _failed(self, operation):
+        self.errors += 1
+        logger.warning("redis %s failed", operation, exc_info=True)
+
+    async def get(self, key):
+        if not self.enabled:
+            return None
+        try:
+            raw = await self.client.get(self._key(key))
+        except (RedisError, OSError):
+            self._failed("get")
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return loads(raw)
+
+    async def generation(self, name):
+        """Returns the shared generation `name`, or None if Redis is unreachable."""
+        try:
+            return int(await self.client.get(self._generation_key(name)) or 0)
+        except (RedisError, OSError):
+            self._failed("generation")
+            return None
+
+    async def bump(self, name):
+        try:
+            await self.client.incr(self._generation_key(name))
+        except (RedisError, OSError):
+            self._failed("bump")
+
+    async def set(self, key, value, tags=(), generation=None):
+        """
+        Stores `value` under `key`, indexed by each of `tags`; see MemoryNamespace.set.
+
+        A conditional write runs as a MULTI transaction that WATCHes the generation,
+        so Redis discards it if another worker bumps the generation in between.
+        """
+        if not self.enabled:
+            return False
+        redis_key = self._key(key)
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                if generation is not None:
+                    name, expected = generation
+                    generation_key = self._generation_key(name)
+                    await pipe.watch(generation_key)
+                    current = int(await pipe.get(generation_key) or 0)
+                    if expected is None or current != expected:
+                        return False
+                    pipe.multi()
+                pipe.set(redis_key, dumps(value), px=self.ttl_ms)
+                for tag in tags:
+                    tag_key = self._tag_key(tag)
+                    pipe.sadd(tag_key, redis_key)
+                    pipe.pexpire(tag_key, self.ttl_ms)
+                await pipe.execute()
+            return True
+        except WatchError:
+            return False
+        except (RedisError, OSError):
+            self._failed("set")
+            return False
+
+    async def delete(self, key):
+        try:
+            return await self.client.delete(self._key(key)) > 0
+        except (RedisError, OSError):
+            self._failed("delete")
+            return False
+
+    async def invalidate_tag(self, tag):
+        """Deletes every entry set with `tag` and returns how many were removed."""
+        tag_key = self._tag_key(tag)
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.smembers(tag_key)
+                pipe.delete(tag_key)
+                members, _ = await pipe.execute()
+            return await self.client.delete(*members) if members else 0
+        except (RedisError, OSError):
+            self._failed("invalidate")
+            return 0
+
+    def close(self):
+        pass  # The connection pool belongs to the backend
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+
+class RedisBackend:
+    """
+    Keeps caches in Redis (or any server speaking its protocol) so workers share them.
+
+    Invalidations are broadcast on a pub/sub channel; each worker ignores its own
+    messages, which it has already applied.
+
+    Args:
+        url (str): Redis URL, e.g. redis://localhost:6379/0.
+        prefix (str): Prefix of every key and channel.
+        client: A redis.asyncio client to use instead of connecting to `url`.
+    """
+
+    shared = True
+
+    def __init__(self, url=None, prefix="ghl:", client=None):
+        if client is None:
+            if redis_asyncio is None:
+                raise RuntimeError(
+                    "CACHE_BACKEND=redis needs the redis package (pip install redis)"
+                )
+            client = redis_asyncio.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self.origin = uuid.uuid4().hex
+        self._listeners = []
+
+    def namespace(self, name, maxsize, ttl, path=None):
+        """Returns the cache called `name`; see MemoryBackend.namespace."""
+        return RedisNamespace(self.client, f"{self.prefix}{name}:", ttl)
+
+    async def publish(self, channel, message):
+        try:
+            await self.client.publish(
+                f"{self.prefix}{channel}", dumps({**message, "origin": self.origin})
+            )
+        except (RedisError, OSError):
+            logger.warning("redis publish on %s failed", channel, exc_info=True)
+
+    async def subscribe(self, channel, handler):
+        """
+        Calls `handler(message)` for every message other workers publish on `channel`.
+
+        Subscribing happens in the background and is retried, so an unreachable Redis
+        does not keep the app from starting.
+        """
+        self._listeners.append(
+            asyncio.create_task(self._listen(f"{self.prefix}{channel}", handler))
+        )
+
+    async def _listen(self, channel, handler):
+        pubsub = self.client.pubsub()
+        delay = 1.0
+        try:
+            while True:
+                try:
+                    if not pubsub.subscribed:
+                        await pubsub.subscribe(channel)
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=1.0
+                    )
+                    delay = 1.0
+                    if message is None:
+                        continue
+                    payload = loads(message["data"])
+                    if payload.get("origin") != self.origin:
+                        handler(payload)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.warning(
+                        "redis listener on %s failed", channel, exc_info=True
+                    )
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 30.0)
+        finally:
+            await pubsub.aclose()
+
+    async def close(self):
+        for task in self._listeners:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._listeners = []
+        await self.client.aclose()
@@ -0,0 +1,149 @@
+import json
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data):
+    """Decodes JSON bytes or str, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(content):
+    """Encodes `content` to compact UTF-8 JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """A JSONResponse rendered with orjson, falling back to the stdlib encoder."""
+
+    def render(self, content):
+        return dumps(content)
+
+
+class ToolCall:
+    """
+    One Vapi tool call, validated once at the edge of the request.
+
+    Args:
+        id (str): The toolCallId results are reported against.
+        name (str): The called function's name.
+        arguments (dict): The function arguments.
+    """
+
+    __slots__ = ("id", "name", "arguments")
+
+    def __init__(self, id, name=None, arguments=None):
+        self.id = id
+        self.name = name
+        self.arguments = arguments if arguments is not None else {}
+
+    def __repr__(self):
+        return f"ToolCall(id={self.id!r}, name={self.name!r})"
+
+    @classmethod
+    def from_dict(cls, tool_call):
+        """
+        Builds a ToolCall from its payload entry.
+
+        `function.arguments` may be an object or, as OpenAI sends it, a JSON string.
+
+        Raises:
+            HTTPException: If the entry or its arguments are not JSON objects.
+        """
+        if not isinstance(tool_call, dict):
+            raise HTTPException(status_code=400, detail="Invalid tool call")
+        function = tool_call.get("function") or {}
+        if not isinstance(function, dict):
+            raise HTTPException(status_code=400, detail="Invalid tool call function")
+        arguments = function.get("arguments") or {}
+        if isinstance(arguments, (str, bytes)):
+            try:
+                arguments = loads(arguments)
+            except ValueError:
+                raise HTTPException(
+                    status_code=400, detail="Tool call arguments are not valid JSON"
+                )
+        if not isinstance(arguments, dict):
+            raise HTTPException(
+                status_code=400, detail="Tool call arguments must be an object"
+            )
+        return cls(tool_call.get("id"), function.get("name"), arguments)
+
+
+class Webhook:
+    """
+    The parts of a Vapi tool-call webhook the handlers use.
+
+    Args:
+        tool_calls (list): ToolCall objects, in request order.
+        assistant_id (str): The Vapi assistant that made the call, if present.
+        phone_number_id (str): The Vapi phone number the call came in on, if present.
+    """
+
+    __slots__ = ("tool_calls", "assistant_id", "phone_number_id")
+
+    def __init__(self, tool_calls, assistant_id=None, phone_number_id=None):
+        self.tool_calls = tool_calls
+        self.assistant_id = assistant_id
+        self.phone_number_id = phone_number_id
+
+
+def _field(container, *path):
+    for key in path:
+        if not isinstance(container, dict):
+            return None
+        container = container.get(key)
+    return container
+
+
+def parse_webhook(body):
+    """
+    Decodes a Vapi webhook body into its tool calls and routing ids.
+
+    Only `message.toolCalls` is turned into objects, plus the assistant and phone
+    number ids (from `message.call`, or `message.assistant` / `message.phoneNumber`);
+    the rest of the envelope (transcripts, artifacts) is decoded by orjson and dropped.
+
+    Args:
+        body (bytes): The raw request body.
+
+    Returns:
+        Webhook: The tool calls and routing ids.
+
+    Raises:
+        HTTPException: If the body is not JSON or the tool calls are malformed.
+    """
+    try:
+        payload = loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body is not valid JSON")
+    message = _field(payload, "message")
+    tool_calls = _field(message, "toolCalls")
+    if not tool_calls:
+        tool_calls = []
+    elif not isinstance(tool_calls, list):
+        raise HTTPException(status_code=400, detail="toolCalls must be a list")
+    return Webhook(
+        [ToolCall.from_dict(tool_call) for tool_call in tool_calls],
+        assistant_id=_field(message, "call", "assistantId")
+        or _field(message, "assistant", "id"),
+        phone_number_id=_field(message, "call", "phoneNumberId")
+        or _field(message, "phoneNumber", "id"),
+    )
+
+
+def parse_tool_calls(body):
+    """Decodes a Vapi webhook body and returns its ToolCall objects, in request order."""
+    return parse_webhook(body).tool_calls
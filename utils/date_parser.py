@@ -0,0 +1,206 @@
+import re
+from datetime import date, datetime, time, timedelta
+
+from utils.tz import DEFAULT_TIMEZONE, get_zone
+
+# Mirrors the rules given to the model in chat_gpt_agent.system_message
+DEFAULT_TIME = time(8, 0)
+PERIOD_TIMES = {
+    "morning": time(8, 0),
+    "afternoon": time(13, 0),
+    "evening": time(16, 0),
+}
+NAMED_TIMES = {"noon": time(12, 0), "midday": time(12, 0)}
+WEEKDAYS = {
+    "monday": 0,
+    "mon": 0,
+    "tuesday": 1,
+    "tue": 1,
+    "tues": 1,
+    "wednesday": 2,
+    "wed": 2,
+    "thursday": 3,
+    "thu": 3,
+    "thurs": 3,
+    "friday": 4,
+    "fri": 4,
+    "saturday": 5,
+    "sat": 5,
+    "sunday": 6,
+    "sun": 6,
+}
+RELATIVE_DAYS = {"today": 0, "tomorrow": 1, "tmrw": 1}
+FILLER_WORDS = {"at", "on", "in", "the", "around", "about", "for", "by", "o'clock"}
+WEEKDAY_MODIFIERS = {"this", "next", "coming"}
+
+_MERIDIEM_RE = re.compile(r"\b([ap])\.?m\b\.?")
+_SPLIT_MERIDIEM_RE = re.compile(r"(\d)\s+([ap]m)\b")
+_TIME_RE = re.compile(r"^(\d{1,2})(?::(\d{2}))?([ap]m)?$")
+
+_stats = {"hits": 0, "misses": 0}
+
+
+def stats():
+    """Returns how many inputs the fast path resolved (hits) or left to the LLM (misses)."""
+    return dict(_stats)
+
+
+def _tokenize(text):
+    text = _MERIDIEM_RE.sub(r"\1m", text.lower())
+    text = _SPLIT_MERIDIEM_RE.sub(r"\1\2", text)
+    return re.sub(r"[,!?;]|\.(?!\d)", " ", text).split()
+
+
+def _is_date_only(text):
+    # Also true for week dates such as 2024-W10, which name that week's Monday
+    try:
+        date.fromisoformat(text)
+    except ValueError:
+        return False
+    return True
+
+
+def _parse_iso(text, tz):
+    text = text.strip()
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if _is_date_only(text):
+        parsed = datetime.combine(parsed.date(), DEFAULT_TIME)
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=tz)
+    return parsed.astimezone(tz)
+
+
+def _parse_phrase(text, now):
+    tokens = _tokenize(text)
+    if not tokens:
+        return None
+
+    day = None
+    clock = None  # (hour, minute, meridiem)
+    period = None
+    modifier = None
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in FILLER_WORDS:
+            pass
+        elif token in WEEKDAY_MODIFIERS and modifier is None:
+            modifier = token
+        elif token == "day" and tokens[i + 1 : i + 3] == ["after", "tomorrow"]:
+            if day is not None:
+                return None
+            day = now.date() + timedelta(days=2)
+            i += 2
+        elif token in RELATIVE_DAYS:
+            if day is not None:
+                return None
+            day = now.date() + timedelta(days=RELATIVE_DAYS[token])
+        elif token in WEEKDAYS:
+            if day is not None:
+                return None
+            days_ahead = (WEEKDAYS[token] - now.weekday()) % 7
+            if modifier == "next" and days_ahead == 0:
+                days_ahead = 7
+            day = now.date() + timedelta(days=days_ahead)
+            modifier = None
+        elif token in PERIOD_TIMES:
+            if period is not None:
+                return None
+            period = token
+            if modifier == "this":
+                if day is not None:
+                    return None
+                day = now.date()
+            modifier = None
+        elif token in NAMED_TIMES:
+            if clock is not None:
+                return None
+            named = NAMED_TIMES[token]
+            clock = (named.hour, named.minute, "pm")
+        else:
+            match = _TIME_RE.match(token)
+            if not match or clock is not None:
+                return None
+            hour, minute, meridiem = match.groups()
+            clock = (int(hour), int(minute or 0), meridiem)
+        i += 1
+
+    if modifier is not None or (day is None and clock is None and period is None):
+        return None
+
+    if clock is not None:
+        hour, minute, meridiem = clock
+        if meridiem:
+            if not 1 <= hour <= 12:
+                return None
+            hour = hour % 12 + (12 if meridiem == "pm" else 0)
+        elif period in ("afternoon", "evening") and hour < 12:
+            hour += 12
+        elif period is None and hour < 13:
+            # "at 2" could be either half of the day, leave it to the model
+            return None
+        if hour > 23 or minute > 59:
+            return None
+        slot_time = time(hour, minute)
+    elif period is not None:
+        slot_time = PERIOD_TIMES[period]
+    else:
+        slot_time = DEFAULT_TIME
+
+    return datetime.combine(day or now.date(), slot_time)
+
+
+def parse_selected_slot(user_response, now, timezone_str=DEFAULT_TIMEZONE):
+    """
+    Resolves common slot phrases to ISO 8601 without calling the LLM.
+
+    Handles ISO 8601 timestamps and simple phrases such as "tomorrow at 2 PM",
+    "Monday morning" or "next Friday afternoon", following the same rules the model
+    is given: a date alone means 08:00, a time alone means today, morning/afternoon/
+    evening mean 08:00/13:00/16:00, the EDT/EST offset follows the date, and a
+    Saturday or Sunday rolls forward to Monday.
+
+    Args:
+        user_response (str): What the user said they would like to book.
+        now (datetime): The current timezone-aware datetime.
+        timezone_str: A string representing the timezone (default: 'America/New_York').
+
+    Returns:
+        str: The slot in ISO 8601 format (e.g. "2024-04-04T14:30:00-04:00"), or None
+        if the input is not understood and should go to the LLM.
+    """
+    tz = get_zone(timezone_str)
+    slot = None
+    if user_response and user_response.strip():
+        slot = _parse_iso(user_response, tz)
+        if slot is None:
+            naive_slot = _parse_phrase(user_response, now.astimezone(tz))
+            slot = naive_slot.replace(tzinfo=tz) if naive_slot is not None else None
+
+    if slot is None:
+        _stats["misses"] += 1
+        return None
+
+    if slot.weekday() >= 5:
+        rolled = slot.replace(tzinfo=None) + timedelta(days=7 - slot.weekday())
+        slot = rolled.replace(tzinfo=tz)
+    _stats["hits"] += 1
+    return slot.isoformat()
+
+
+def localize_wall_time(slot, timezone_str=DEFAULT_TIMEZONE):
+    """
+    Re-reads an ISO 8601 slot's wall-clock time in `timezone_str`.
+
+    The user names a local time, so "14:00-04:00" from the model means 14:00 in the
+    tenant's timezone whatever offset it picked. Strings that do not parse are
+    returned unchanged.
+    """
+    try:
+        parsed = datetime.fromisoformat(slot)
+    except (TypeError, ValueError):
+        return slot
+    return parsed.replace(tzinfo=get_zone(timezone_str)).isoformat()
@@ -1,6 +1,10 @@
-from datetime import datetime, time, timedelta
+import os
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
 
-import pytz
+from utils.slot_index import SlotIndex, slot_epoch_ms
+from utils.tz import get_zone, local_to_epoch_ms
 
 
 def get_first_slots(slot_data, current_datetime_str):
@@ -16,43 +20,8 @@ def get_first_slots(slot_data, current_datetime_str):
         list: A list of tuples where each tuple contains a date string and its first available slot.
     """
 
-    first_slots = []
-    edt_timezone = pytz.timezone("America/New_York")
-    current_datetime = datetime.strptime(
-        current_datetime_str, "%Y-%m-%d %H:%M:%S%z"
-    ).astimezone(edt_timezone)
-
-    key_count = 0  # Track the key index
-    for date, slots_info in slot_data.items():
-        if key_count == 0:  # First key
-            found_slot = False
-            for slot_str in slots_info["slots"]:
-                try:
-                    slot_datetime = datetime.strptime(
-                        slot_str, "%Y-%m-%dT%H:%M:%S%z"
-                    ).astimezone(edt_timezone)
-                    if slot_datetime >= current_datetime + timedelta(hours=1):
-                        first_slots.append((date, slot_str))
-                        found_slot = True
-                        break
-                except ValueError:
-                    print(f"Invalid slot format: {slot_str}")
-
-            if (
-                not found_slot and slots_info["slots"]
-            ):  # Pick the last slot if no suitable slot found
-                print(f"No slots available for date: {date}")
-                first_slots.append((date, slots_info["slots"][-1]))
-
-        elif key_count == 1:  # Second key
-            if slots_info["slots"]:
-                first_slots.append((date, slots_info["slots"][0]))
-            else:
-                print(f"No slots available for date: {date}")
-
-        key_count += 1  # Increment the key counter
-
-    return first_slots
+    current_epoch_ms = slot_epoch_ms(current_datetime_str)
+    return SlotIndex(slot_data).first_slots(current_epoch_ms)
 
 
 def datetime_str_to_epoch_ms(datetime_str, timezone_str="America/New_York"):
@@ -69,11 +38,7 @@ def datetime_str_to_epoch_ms(datetime_str, timezone_str="America/New_York"):
     try:
         # Parse the datetime string, including the timezone information
         dt = datetime.strptime(datetime_str, "%Y-%m-%d %H:%M:%S%z")
-        # Get the specified timezone using pytz
-        tz = pytz.timezone(timezone_str)
-        if dt.tzinfo != tz:
-            dt = dt.astimezone(tz)
-        # Calculate the epoch timestamp in milliseconds
+        # The offset in the string fixes the instant; timezone_str cannot change it
         epoch_timestamp_ms = int(dt.timestamp() * 1000)
 
         return epoch_timestamp_ms
@@ -112,8 +77,7 @@ def get_next_business_day(datetime_edt, is_start_date=True):
     Returns:
         datetime: A datetime object representing the next business day with appropriate time in EDT.
     """
-    # Get EDT timezone using pytz
-    edt_timezone = pytz.timezone("America/New_York")
+    edt_timezone = get_zone("America/New_York")
     # TODO: check for both date and time if less than current date and time
     # INFO: temporarily removing current business hours logic
     #  is_within_business_hours(
@@ -128,10 +92,101 @@ def get_next_business_day(datetime_edt, is_start_date=True):
 
         # Set the time to 8:00 AM for sta   rt dates, 5:00 PM for end dates
         if is_start_date:
-            return edt_timezone.localize(
-                datetime.combine(next_weekday, time(8, 0))
+            return datetime.combine(
+                next_weekday, time(8, 0), tzinfo=edt_timezone
             )  # 8:00 AM EDT
         else:
-            return edt_timezone.localize(
-                datetime.combine(next_weekday, time(17, 0))
+            return datetime.combine(
+                next_weekday, time(17, 0), tzinfo=edt_timezone
             )  # 5:00 PM EDT
+
+
+def get_holidays():
+    """Returns the dates listed in BUSINESS_HOLIDAYS (comma separated YYYY-MM-DD) as a frozenset."""
+    raw = os.getenv("BUSINESS_HOLIDAYS", "")
+    return frozenset(
+        date.fromisoformat(value.strip()) for value in raw.split(",") if value.strip()
+    )
+
+
+@lru_cache(maxsize=8)
+def business_day_calendar(year, holidays=frozenset()):
+    """
+    Precomputes the business days (Monday to Friday, excluding holidays) of a year.
+
+    Args:
+        year (int): The calendar year.
+        holidays (frozenset): Dates that are not business days.
+
+    Returns:
+        tuple: The year's business days as sorted date objects.
+    """
+    day = date(year, 1, 1)
+    days = []
+    while day.year == year:
+        if day.weekday() < 5 and day not in holidays:
+            days.append(day)
+        day += timedelta(days=1)
+    return tuple(days)
+
+
+def add_business_days(start_date, count, holidays=frozenset()):
+    """
+    Returns the date `count` business days after start_date, skipping weekends and holidays.
+
+    Args:
+        start_date (date): The date to count from; it is day 0 even on a weekend.
+        count (int): Number of business days to move forward.
+        holidays (frozenset): Dates to skip, e.g. GoHighLevelClient.holidays
+            (default: none).
+
+    Returns:
+        date: The resulting business day, or start_date when count is 0.
+    """
+    year = start_date.year
+    calendar = business_day_calendar(year, holidays)
+    index = bisect_right(calendar, start_date) + count - 1
+    while count > 0 and index >= len(calendar):
+        index -= len(calendar)
+        year += 1
+        calendar = business_day_calendar(year, holidays)
+    return calendar[index] if count > 0 else start_date
+
+
+def day_window_epoch_ms(start_day, end_day, timezone_str="America/New_York"):
+    """
+    Returns the epoch window (milliseconds) spanning whole days from start_day to end_day.
+
+    Args:
+        start_day (date): First day of the window, starting at 00:00.
+        end_day (date): Last day of the window, ending at 23:59:59.999.
+        timezone_str: A string representing the timezone (default: 'America/New_York').
+
+    Returns:
+        tuple: (start_epoch_ms, end_epoch_ms)
+    """
+    return (
+        local_to_epoch_ms(start_day, time.min, timezone_str),
+        local_to_epoch_ms(end_day + timedelta(days=1), time.min, timezone_str) - 1,
+    )
+
+
+def trim_slot_data(slot_data, start_epoch_ms, end_epoch_ms):
+    """
+    Narrows a GoHighLevel slot response to the slots inside [start_epoch_ms, end_epoch_ms].
+
+    Dates left without slots are dropped, matching what the API returns for the narrower window.
+
+    Args:
+        slot_data (dict): A dictionary containing dates as keys and slot lists as values.
+        start_epoch_ms (int): Window start in epoch milliseconds.
+        end_epoch_ms (int): Window end in epoch milliseconds.
+
+    Returns:
+        dict: A new dictionary in the same format as slot_data.
+    """
+    trimmed = SlotIndex(slot_data).trim(start_epoch_ms, end_epoch_ms)
+    for date, value in slot_data.items():
+        if not isinstance(value, dict) or "slots" not in value:
+            trimmed[date] = value
+    return trimmed
@@ -0,0 +1,66 @@
+import logging
+import os
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+_http_client = None
+
+
+def _http2_available():
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def create_http_client():
+    """
+    Builds the keep-alive connection pool used for all upstream HTTP calls.
+
+    Pool size, timeouts and HTTP/2 are read from the environment:
+        HTTP_POOL_SIZE (int): Maximum open connections (default: 100).
+        HTTP_KEEPALIVE_CONNECTIONS (int): Idle connections kept alive (default: 20).
+        HTTP_CONNECT_TIMEOUT (float): Connect timeout in seconds (default: 3.0).
+        HTTP_READ_TIMEOUT (float): Read timeout in seconds (default: 10.0).
+        HTTP_HTTP2 (bool): Use HTTP/2 when the `h2` package is installed (default: true).
+
+    Returns:
+        httpx.AsyncClient: A client that must be closed with `aclose()` at shutdown.
+    """
+    pool_size = int(os.getenv("HTTP_POOL_SIZE", "100"))
+    keepalive = int(os.getenv("HTTP_KEEPALIVE_CONNECTIONS", "20"))
+    connect_timeout = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.0"))
+    read_timeout = float(os.getenv("HTTP_READ_TIMEOUT", "10.0"))
+    http2 = os.getenv("HTTP_HTTP2", "true").lower() in ("1", "true", "yes")
+    if http2 and not _http2_available():
+        logger.info("h2 is not installed, falling back to HTTP/1.1")
+        http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=pool_size, max_keepalive_connections=keepalive
+        ),
+        timeout=httpx.Timeout(
+            read_timeout, connect=connect_timeout, pool=connect_timeout
+        ),
+    )
+
+
+def get_http_client():
+    """Returns the process-wide HTTP client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+    return _http_client
+
+
+async def close_http_client():
+    """Closes the process-wide HTTP client and drops its pooled connections."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
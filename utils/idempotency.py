@@ -0,0 +1,77 @@
+import os
+import re
+
+from utils.cache import MemoryBackend
+from utils.singleflight import SingleFlight
+from utils.slot_index import slot_epoch_ms
+
+
+def booking_key(calendar_id, phone, selected_slot):
+    """Identifies one booking of a calendar slot by one caller, whatever the formatting."""
+    digits = re.sub(r"\D", "", phone or "")
+    try:
+        slot = slot_epoch_ms(selected_slot)
+    except (TypeError, ValueError):
+        slot = selected_slot
+    return "slot", calendar_id, digits, slot
+
+
+class BookingIdempotency:
+    """
+    Makes retried bookings safe and cheap.
+
+    Voice agents retry bookSlot when a webhook is slow. run() executes a booking once
+    per key: concurrent duplicates wait on the in-flight execution, and later ones get
+    the stored result until it expires. Keys are ("call", tenant, toolCallId) for a
+    whole tool call and booking_key() for the GoHighLevel POST itself, so a retry with
+    a new toolCallId still cannot book the same caller into the same slot twice.
+
+    Results are kept for BOOKING_IDEMPOTENCY_TTL_SECONDS (default: 600), at most
+    BOOKING_IDEMPOTENCY_MAX_ENTRIES (default: 4096) of them, in the cache backend, so
+    with a shared backend a retry landing on another worker is answered too.
+    Concurrent duplicates are only joined within one worker.
+    """
+
+    def __init__(self, ttl=None, maxsize=None, backend=None):
+        if ttl is None:
+            ttl = float(os.getenv("BOOKING_IDEMPOTENCY_TTL_SECONDS", "600"))
+        if maxsize is None:
+            maxsize = int(os.getenv("BOOKING_IDEMPOTENCY_MAX_ENTRIES", "4096"))
+        self._results = (backend or MemoryBackend()).namespace(
+            "bookings", maxsize=maxsize, ttl=ttl
+        )
+        self._flight = SingleFlight()
+        self.replayed = 0
+
+    async def run(self, key, fn):
+        """
+        Runs `fn()` once per key.
+
+        Args:
+            key: Hashable idempotency key.
+            fn: A zero-argument callable returning an awaitable of (result, keep);
+                only results with `keep` set are stored, so transient failures can
+                be retried.
+
+        Returns:
+            The result of this or an earlier execution for the same key.
+        """
+        stored = await self._results.get(key)
+        if stored is not None:
+            self.replayed += 1
+            return stored
+
+        async def execute():
+            result, keep = await fn()
+            if keep:
+                await self._results.set(key, result)
+            return result
+
+        return await self._flight.do(key, execute)
+
+    def stats(self):
+        return {
+            **self._results.stats(),
+            "replayed": self.replayed,
+            "coalesced": self._flight.coalesced,
+        }
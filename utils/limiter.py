@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+OVERLOADED_MESSAGE = "The scheduling service is busy. Please try again in a moment."
+
+# Upstream answers that mean "too much load", as opposed to a bad request
+OVERLOAD_STATUS = (429, 502, 503, 504)
+
+MODES = ("off", "fixed", "aimd", "gradient")
+
+
+class Permit:
+    """
+    One acquired unit of upstream concurrency; use through ConcurrencyLimiter.permit().
+
+    Set `status` to the upstream status code inside the block so adaptive limiters can
+    tell rate limiting (429/5xx) apart from success. An exception raised out of the
+    block also counts as overload.
+    """
+
+    __slots__ = ("limiter", "status", "_started")
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+        self.status = None
+
+    async def __aenter__(self):
+        await self.limiter.acquire()
+        self._started = time.perf_counter()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.limiter.release(
+            time.perf_counter() - self._started,
+            overloaded=exc_type is not None or self.status in OVERLOAD_STATUS,
+        )
+        return False
+
+
+class ConcurrencyLimiter:
+    """
+    Caps concurrent calls to one upstream, with a bounded FIFO wait queue.
+
+    Calls over the limit wait in the queue for at most `queue_timeout` seconds; when
+    the queue is full, or the wait runs out, acquire() raises HTTPException(503) so the
+    caller answers with an error right away instead of piling onto a saturated upstream.
+
+    Modes:
+        off: No limit.
+        fixed: At most `max_limit` calls in flight.
+        aimd: Starts at half of `max_limit`, adds one while the limit is in use and
+            multiplies it by `backoff_ratio` when a call is rate limited, fails or
+            takes longer than `latency_target` seconds.
+        gradient: Scales the limit by the ratio of the long-term to the recent
+            latency, so it shrinks as soon as the upstream slows down.
+
+    Args:
+        name (str): Upstream name used in logs and stats.
+        mode (str): One of MODES.
+        max_limit (int): Upper bound of the limit.
+        min_limit (int): Lower bound of an adaptive limit.
+        max_queue (int): Calls allowed to wait for a permit.
+        queue_timeout (float): Seconds a call may wait for a permit.
+        latency_target (float): AIMD latency above which a call counts as overload.
+        backoff_ratio (float): AIMD multiplicative decrease.
+    """
+
+    def __init__(
+        self,
+        name,
+        mode="fixed",
+        max_limit=32,
+        min_limit=1,
+        max_queue=128,
+        queue_timeout=2.0,
+        latency_target=2.0,
+        backoff_ratio=0.9,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown limiter mode {mode!r}, expected one of {MODES}")
+        self.name = name
+        self.mode = mode
+        self.max_limit = max(max_limit, 1)
+        self.min_limit = max(min(min_limit, self.max_limit), 1)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.latency_target = latency_target
+        self.backoff_ratio = backoff_ratio
+        if mode == "off":
+            self.limit = math.inf
+        elif mode == "fixed":
+            self.limit = float(self.max_limit)
+        else:
+            self.limit = float(max(self.max_limit // 2, self.min_limit))
+        self.in_flight = 0
+        self._waiters = deque()
+        self._short_latency = None
+        self._long_latency = None
+        self.acquired = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.overloads = 0
+
+    @classmethod
+    def from_env(cls, name, prefix, max_limit, latency_target):
+        """
+        Builds a limiter from <prefix>_* environment variables:
+            <prefix>_LIMIT_MODE (str): off, fixed, aimd or gradient (default: fixed).
+            <prefix>_MAX_CONCURRENCY (int): Upper bound of the limit.
+            <prefix>_MIN_CONCURRENCY (int): Lower bound of an adaptive limit (default: 1).
+            <prefix>_QUEUE_SIZE (int): Calls allowed to wait (default: 4x the limit).
+            <prefix>_QUEUE_TIMEOUT_SECONDS (float): Longest wait (default: 2.0).
+            <prefix>_LATENCY_TARGET_SECONDS (float): AIMD latency target.
+        """
+        max_limit = int(os.getenv(f"{prefix}_MAX_CONCURRENCY", str(max_limit)))
+        return cls(
+            name,
+            mode=os.getenv(f"{prefix}_LIMIT_MODE", "fixed").lower(),
+            max_limit=max_limit,
+            min_limit=int(os.getenv(f"{prefix}_MIN_CONCURRENCY", "1")),
+            max_queue=int(os.getenv(f"{prefix}_QUEUE_SIZE", str(max_limit * 4))),
+            queue_timeout=float(os.getenv(f"{prefix}_QUEUE_TIMEOUT_SECONDS", "2.0")),
+            latency_target=float(
+                os.getenv(f"{prefix}_LATENCY_TARGET_SECONDS", str(latency_target))
+            ),
+        )
+
+    def permit(self):
+        """
+        Returns a Permit to hold for the duration of one upstream call.
+
+            async with limiter.permit() as permit:
+                response = await ...
+                permit.status = response.status_code
+        """
+        return Permit(self)
+
+    def _has_capacity(self):
+        # A fractional adaptive limit admits only whole calls
+        return self.in_flight + 1 <= max(self.limit, self.min_limit)
+
+    async def acquire(self):
+        if self._has_capacity() and not self._waiters:
+            self.in_flight += 1
+            self.acquired += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            logger.debug("%s limiter rejected a call, queue is full", self.name)
+            raise HTTPException(status_code=503, detail=OVERLOADED_MESSAGE)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                return  # Granted just as the wait ran out
+            self.timed_out += 1
+            logger.debug("%s limiter timed out a queued call", self.name)
+            raise HTTPException(status_code=503, detail=OVERLOADED_MESSAGE)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(0.0, overloaded=False, observe=False)
+            raise
+        finally:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def release(self, latency, overloaded=False, observe=True):
+        self.in_flight -= 1
+        if observe:
+            if overloaded:
+                self.overloads += 1
+            self._adapt(latency, overloaded)
+        self._grant()
+
+    def _grant(self):
+        # Hand freed capacity to the oldest waiters; the permit moves with the wakeup
+        while self._waiters and self._has_capacity():
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            self.acquired += 1
+            waiter.set_result(None)
+
+    def _adapt(self, latency, overloaded):
+        if self.mode == "aimd":
+            if overloaded or latency > self.latency_target:
+                self.limit = max(self.limit * self.backoff_ratio, self.min_limit)
+            elif self.in_flight + 1 >= self.limit / 2:
+                self.limit = min(self.limit + 1, self.max_limit)
+        elif self.mode == "gradient":
+            if self._short_latency is None:
+                self._short_latency = self._long_latency = latency
+            self._short_latency += (latency - self._short_latency) * 0.5
+            self._long_latency += (latency - self._long_latency) * 0.01
+            if overloaded:
+                gradient = 0.5
+            else:
+                # Tolerate 50% latency drift before shrinking the limit
+                gradient = max(
+                    0.5,
+                    min(1.0, 1.5 * self._long_latency / max(self._short_latency, 1e-6)),
+                )
+            target = self.limit * gradient + math.sqrt(self.limit)
+            self.limit = min(
+                max(self.limit * 0.8 + target * 0.2, self.min_limit), self.max_limit
+            )
+
+    def stats(self):
+        return {
+            "limit": self.limit if self.limit != math.inf else -1,
+            "in_flight": self.in_flight,
+            "queue_depth": len(self._waiters),
+            "acquired": self.acquired,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "overloads": self.overloads,
+        }
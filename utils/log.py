@@ -0,0 +1,89 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+LOG_DATE_FORMAT = "%d-%b-%y %H:%M:%S"
+
+_configured = False
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, LOG_DATE_FORMAT),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def _create_file_handler(filename):
+    max_bytes = int(os.getenv("LOG_ROTATE_BYTES", "0"))
+    when = os.getenv("LOG_ROTATE_WHEN")
+    backups = int(os.getenv("LOG_ROTATE_BACKUPS", "5"))
+    if when:
+        return logging.handlers.TimedRotatingFileHandler(
+            filename, when=when, backupCount=backups, delay=True
+        )
+    if max_bytes > 0:
+        return logging.handlers.RotatingFileHandler(
+            filename, maxBytes=max_bytes, backupCount=backups, delay=True
+        )
+    return logging.FileHandler(filename, delay=True)
+
+
+def configure_logging():
+    """
+    Configures the root logger from the environment.
+
+    By default records are handed to a QueueHandler and written by a QueueListener
+    thread, so request handlers never block on file I/O. Settings:
+        LOG_LEVEL (str): Root log level (default: INFO).
+        LOG_FILE (str): File to write to (default: debug.log).
+        LOG_QUEUE (bool): Write through the background queue (default: true).
+        LOG_ROTATE_BYTES (int): Rotate when the file reaches this size (default: 0, off).
+        LOG_ROTATE_WHEN (str): Rotate on a schedule instead, e.g. "midnight" or "H".
+        LOG_ROTATE_BACKUPS (int): Rotated files kept (default: 5).
+        LOG_JSON (bool): Emit structured JSON lines (default: false).
+    """
+    global _configured, _listener
+    if _configured:
+        return
+    _configured = True
+
+    handler = _create_file_handler(os.getenv("LOG_FILE", "debug.log"))
+    if os.getenv("LOG_JSON", "false").lower() in ("1", "true", "yes"):
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT))
+
+    root = logging.getLogger()
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    if os.getenv("LOG_QUEUE", "true").lower() in ("1", "true", "yes"):
+        log_queue = queue.SimpleQueue()
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+        _listener = logging.handlers.QueueListener(
+            log_queue, handler, respect_handler_level=True
+        )
+        _listener.start()
+        atexit.register(shutdown_logging)
+    else:
+        root.addHandler(handler)
+
+
+def shutdown_logging():
+    """Flushes queued records and stops the background writer."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,211 @@
+import contextvars
+import time
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Per-request state set by ServerTimingMiddleware: (route, [(stage, duration_ms), ...])
+_request_trace = contextvars.ContextVar("request_trace", default=None)
+
+
+class Histogram:
+    """
+    A Prometheus-style histogram with fixed buckets and a fixed set of label names.
+
+    Args:
+        name (str): Metric name.
+        documentation (str): Help text shown on /metrics.
+        labelnames (tuple): Label names; observe() takes their values in this order.
+        buckets (tuple): Sorted upper bounds in seconds.
+    """
+
+    def __init__(self, name, documentation, labelnames, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series = {}
+
+    def observe(self, value, *labelvalues):
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [[0] * len(self.buckets), 0.0, 0]
+        position = bisect_left(self.buckets, value)
+        if position < len(self.buckets):
+            series[0][position] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for labelvalues, (counts, total, count) in sorted(self._series.items()):
+            labels = ",".join(
+                f'{name}="{value}"' for name, value in zip(self.labelnames, labelvalues)
+            )
+            separator = "," if labels else ""
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(
+                    f'{self.name}_bucket{{{labels}{separator}le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'{self.name}_bucket{{{labels}{separator}le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return "\n".join(lines)
+
+
+stage_duration = Histogram(
+    "ghl_server_stage_duration_seconds",
+    "Latency of request stages and upstream calls.",
+    ("route", "stage", "upstream", "status"),
+)
+request_duration = Histogram(
+    "ghl_server_request_duration_seconds",
+    "End-to-end latency of HTTP requests.",
+    ("route", "status"),
+)
+
+
+class span:
+    """
+    Times a block as one stage of the current request.
+
+    The duration is recorded in `stage_duration` and added to the request's
+    Server-Timing header. `status` defaults to "ok", or "error" if the block raises;
+    set it inside the block to record an upstream status code instead.
+
+        with span("ghl_slots", upstream="ghl") as current:
+            response = await ...
+            current.status = response.status_code
+    """
+
+    __slots__ = ("stage", "upstream", "status", "_started")
+
+    def __init__(self, stage, upstream=""):
+        self.stage = stage
+        self.upstream = upstream
+        self.status = None
+
+    def __enter__(self):
+        self._started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed_ms = (time.perf_counter_ns() - self._started) / 1e6
+        if self.status is None:
+            self.status = "error" if exc_type is not None else "ok"
+        trace = _request_trace.get()
+        route = ""
+        if trace is not None:
+            route = trace[0]
+            trace[1].append((self.stage, elapsed_ms))
+        stage_duration.observe(
+            elapsed_ms / 1000, route, self.stage, self.upstream, str(self.status)
+        )
+        return False
+
+
+def add_server_timing(name, duration_ms):
+    """Adds an entry to the current request's Server-Timing header without recording it."""
+    trace = _request_trace.get()
+    if trace is not None:
+        trace[1].append((name, duration_ms))
+
+
+def _format_server_timing(entries, total_ms):
+    parts = [f"{name};dur={duration_ms:.1f}" for name, duration_ms in entries]
+    parts.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(parts)
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware that traces each HTTP request.
+
+    Collects the spans recorded while handling the request into a `Server-Timing`
+    response header and records the end-to-end latency in `request_duration`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = scope.get("path", "")
+        entries = []
+        token = _request_trace.set((route, entries))
+        started = time.perf_counter_ns()
+        status = {"code": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                total_ms = (time.perf_counter_ns() - started) / 1e6
+                headers = list(message.get("headers", []))
+                headers.append(
+                    (
+                        b"server-timing",
+                        _format_server_timing(entries, total_ms).encode("latin-1"),
+                    )
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            # Unrouted paths share one label so scanners cannot blow up cardinality
+            if "endpoint" not in scope:
+                route = "unmatched"
+            request_duration.observe(
+                (time.perf_counter_ns() - started) / 1e9, route, str(status["code"])
+            )
+            _request_trace.reset(token)
+
+
+def _render_stats(prefix, stats):
+    lines = []
+    for name, value in stats.items():
+        if isinstance(value, dict):
+            lines.extend(_render_stats(f"{prefix}_{name}", value))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f"{prefix}_{name} {value}")
+    return lines
+
+
+def render_metrics(stats=None):
+    """
+    Renders all histograms, plus component counters, in the Prometheus text format.
+
+    Args:
+        stats (dict): Nested counters, e.g. {"slot_cache": {"hits": 3}}, rendered as
+            untyped samples named ghl_server_<component>_<counter>.
+
+    Returns:
+        str: The exposition text.
+    """
+    sections = [stage_duration.render(), request_duration.render()]
+    if stats:
+        sections.append("\n".join(_render_stats("ghl_server", stats)))
+    return "\n".join(section for section in sections if section) + "\n"
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import os
+import random
+import time as time_module
+from datetime import datetime
+
+from utils.ghl import add_business_days
+from utils.tz import (
+    epoch_ms_to_date,
+    get_zone,
+    local_to_epoch_ms,
+    next_business_day_start_ms,
+    now_epoch_ms,
+)
+
+logger = logging.getLogger(__name__)
+
+# Status codes that mean "slow down" rather than "this request is wrong"
+RETRYABLE_STATUS = (None, 429, 500, 502, 503, 504)
+
+
+def slot_prefetch_enabled():
+    return os.getenv("SLOT_PREFETCH", "false").lower() in ("1", "true", "yes")
+
+
+class SlotPrefetcher:
+    """
+    Keeps the availability of the next business days warm in the background.
+
+    A task started in the app lifespan refreshes one GoHighLevel window covering the
+    next SLOT_PREFETCH_DAYS business days and publishes it as a snapshot that
+    fetch_and_process_slots serves from before going upstream. Settings:
+        SLOT_PREFETCH_DAYS (int): Business days covered after the first one (default: 5).
+        SLOT_PREFETCH_INTERVAL_SECONDS (float): Refresh cadence during business
+            hours (default: 30).
+        SLOT_PREFETCH_IDLE_INTERVAL_SECONDS (float): Refresh cadence outside business
+            hours and on weekends (default: 120).
+        SLOT_PREFETCH_JITTER (float): Random fraction added to each delay, so workers
+            do not refresh in lockstep (default: 0.1).
+        SLOT_PREFETCH_MAX_BACKOFF_SECONDS (float): Cap of the exponential backoff
+            applied while GoHighLevel answers 429/5xx (default: 600).
+        SLOT_PREFETCH_MAX_AGE_SECONDS (float): Snapshots older than this are not
+            served, so request-time fetching takes over (default: 180).
+
+    Args:
+        ghl (GoHighLevelClient): The client the snapshot is fetched with.
+        timezone (str): Timezone used for business hours and the window.
+        clock (callable): Monotonic clock returning seconds (default: time.monotonic).
+    """
+
+    def __init__(self, ghl, timezone="America/New_York", clock=time_module.monotonic):
+        self.ghl = ghl
+        self.timezone = timezone
+        self.clock = clock
+        self.days = int(os.getenv("SLOT_PREFETCH_DAYS", "5"))
+        self.interval = float(os.getenv("SLOT_PREFETCH_INTERVAL_SECONDS", "30"))
+        self.idle_interval = float(
+            os.getenv("SLOT_PREFETCH_IDLE_INTERVAL_SECONDS", "120")
+        )
+        self.jitter = float(os.getenv("SLOT_PREFETCH_JITTER", "0.1"))
+        self.max_backoff = float(os.getenv("SLOT_PREFETCH_MAX_BACKOFF_SECONDS", "600"))
+        self.max_age = float(os.getenv("SLOT_PREFETCH_MAX_AGE_SECONDS", "180"))
+        # (start_epoch_ms, end_epoch_ms, slot_data, fetched_at)
+        self._snapshot = None
+        self._task = None
+        self._wake = asyncio.Event()
+        # Bumped by invalidate(), so a refresh racing a booking is not published
+        self._generation = 0
+        self.failures = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="slot-prefetch")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def snapshot(self):
+        """
+        Returns the latest window if it is fresh enough to serve.
+
+        Returns:
+            tuple: (start_epoch_ms, end_epoch_ms, slot_data) in the shape
+            fetch_and_process_slots takes as `prefetched`, or None.
+        """
+        snapshot = self._snapshot
+        if snapshot is None or self.clock() - snapshot[3] > self.max_age:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return snapshot[:3]
+
+    def invalidate(self, day=None):
+        """
+        Drops the snapshot after a booking changed availability and refreshes soon.
+
+        Dropping the whole window rather than one day keeps fetch_and_process_slots
+        from reading a missing day as a fully booked one. The generation is bumped
+        even when there is no snapshot to drop, so a refresh already in flight (the
+        first one, or one re-running after an earlier invalidation) is not published
+        with the pre-booking availability.
+        """
+        self._generation += 1
+        self._wake.set()
+        snapshot = self._snapshot
+        if snapshot is None:
+            return
+        if day is not None:
+            start_day = epoch_ms_to_date(snapshot[0], self.timezone)
+            end_day = epoch_ms_to_date(snapshot[1], self.timezone)
+            if not start_day <= day <= end_day:
+                return
+        self._snapshot = None
+
+    async def refresh(self):
+        """
+        Fetches the window once and publishes it.
+
+        Returns:
+            The GoHighLevel status code of the fetch.
+        """
+        start_epoch_ms = next_business_day_start_ms(
+            now_epoch_ms(), self.timezone, self.ghl.business_hours[0]
+        )
+        end_epoch_ms = local_to_epoch_ms(
+            add_business_days(
+                epoch_ms_to_date(start_epoch_ms, self.timezone),
+                self.days,
+                self.ghl.holidays,
+            ),
+            self.ghl.business_hours[1],
+            self.timezone,
+        )
+        fetched_at = self.clock()
+        generation = self._generation
+        result, status_code = await self.ghl.get_appointment_slots(
+            start_epoch_ms, end_epoch_ms, use_cache=False
+        )
+        if status_code == 200 and generation != self._generation:
+            logger.info("slot prefetch raced a booking, refreshing again")
+        elif status_code == 200:
+            self._snapshot = (start_epoch_ms, end_epoch_ms, result, fetched_at)
+            self.refreshes += 1
+        else:
+            self.refresh_errors += 1
+            logger.warning("slot prefetch failed with %s: %s", status_code, result)
+        return status_code
+
+    def next_delay(self, status_code):
+        """Returns the seconds to wait after a refresh that ended with `status_code`."""
+        now = datetime.now(get_zone(self.timezone))
+        opens_at, closes_at = self.ghl.business_hours
+        if now.weekday() < 5 and opens_at <= now.time() <= closes_at:
+            delay = self.interval
+        else:
+            delay = self.idle_interval
+        if status_code in RETRYABLE_STATUS:
+            self.failures += 1
+            delay = min(self.interval * 2**self.failures, self.max_backoff)
+        else:
+            self.failures = 0
+        return delay * (1 + random.uniform(0, self.jitter))
+
+    async def _run(self):
+        # Spread the first refresh of every worker over a short window
+        await asyncio.sleep(random.uniform(0, self.jitter * self.interval))
+        while True:
+            self._wake.clear()
+            try:
+                status_code = await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("slot prefetch raised")
+                status_code = None
+            delay = self.next_delay(status_code)
+            if self.failures:
+                # Bookings do not cut a backoff short
+                await asyncio.sleep(delay)
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "consecutive_failures": self.failures,
+            "age_seconds": (
+                round(self.clock() - snapshot[3], 3) if snapshot is not None else -1
+            ),
+        }
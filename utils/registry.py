@@ -0,0 +1,301 @@
+import asyncio
+import logging
+import os
+import time
+
+from fastapi import HTTPException, Request
+
+import ghl_cls
+from chat_gpt_agent import ChatGPTAgent
+from ghl_cls import GoHighLevelClient
+from utils import date_parser
+from utils.api import ToolSettings
+from utils.cache import DateExtractionCache, SlotCache, create_cache_backend
+from utils.http import close_http_client, get_http_client
+from utils.idempotency import BookingIdempotency
+from utils.limiter import ConcurrencyLimiter
+from utils.prefetch import SlotPrefetcher, slot_prefetch_enabled
+from utils.resilience import Resilience
+from utils.tenants import TenantDirectory
+from utils.tz import offset_table
+
+logger = logging.getLogger(__name__)
+
+
+class Registry:
+    """
+    Holds the process-wide upstream clients.
+
+    Everything here is created once in the app lifespan, so environment variables
+    are only read at startup and handlers share one connection pool per upstream.
+    When TENANTS_FILE is set, each tenant gets its own GoHighLevelClient (and slot
+    prefetcher) on first use; they share the connection pool and the slot cache,
+    whose entries are keyed by tenant and calendar id. The caches live in the backend chosen by
+    CACHE_BACKEND, which other workers may share. The tool call handlers' settings
+    (feature flags and search parameters) are resolved here too.
+    """
+
+    def __init__(self):
+        self.http_client = None
+        self.cache_backend = None
+        self.slot_cache = None
+        self.date_cache = None
+        self.ghl_client = None
+        self.chat_gpt_agent = None
+        self.slot_prefetcher = None
+        self.booking_idempotency = None
+        self.tenants = None
+        self.tool_settings = None
+        self.limiters = {}
+        self.resilience = {}
+        # tenant id -> (GoHighLevelClient, SlotPrefetcher or None)
+        self._tenant_clients = {}
+
+    async def startup(self):
+        self.http_client = get_http_client()
+        self.cache_backend = create_cache_backend()
+        self.slot_cache = SlotCache(backend=self.cache_backend)
+        self.limiters = {
+            "ghl": ConcurrencyLimiter.from_env(
+                "ghl", "GHL", max_limit=32, latency_target=2.0
+            ),
+            "openai": ConcurrencyLimiter.from_env(
+                "openai", "OPENAI", max_limit=64, latency_target=8.0
+            ),
+        }
+        self.resilience = {
+            "ghl": Resilience.from_env(
+                "ghl",
+                "GHL",
+                attempts=3,
+                deadline=5.0,
+                retryable_errors=ghl_cls.RETRYABLE_ERRORS,
+                unsent_errors=ghl_cls.UNSENT_ERRORS,
+            ),
+            "openai": Resilience.from_env(
+                "openai",
+                "OPENAI",
+                attempts=2,
+                deadline=8.0,
+                # ChatGPTAgent adds the SDK's errors when it imports openai
+            ),
+        }
+        self.tenants = TenantDirectory.from_env()
+        self.tool_settings = ToolSettings.from_env()
+        self.ghl_client, self.slot_prefetcher = self._create_clients(None)
+        self.chat_gpt_agent = ChatGPTAgent(
+            limiter=self.limiters["openai"], resilience=self.resilience["openai"]
+        )
+        self.date_cache = DateExtractionCache(backend=self.cache_backend)
+        self.booking_idempotency = BookingIdempotency(backend=self.cache_backend)
+        # Bookings on other workers invalidate the slots this worker prefetched
+        await self.slot_cache.subscribe(self._on_slot_invalidation)
+        if self.slot_prefetcher is not None:
+            await self.slot_prefetcher.start()
+        logger.info("Registry started")
+
+    async def warm_up(self, timeout=None, connections=None):
+        """
+        Opens upstream connections, imports the openai SDK and builds the timezone
+        tables before the first request, so it does not pay for them.
+
+        Failures are only logged: an upstream that is down at startup costs the first
+        request some latency, nothing more.
+
+        Args:
+            timeout (float): Seconds to wait for the warm-up (default:
+                WARMUP_TIMEOUT_SECONDS or 5).
+            connections (int): Connections opened to GoHighLevel (default:
+                WARMUP_CONNECTIONS or 4).
+        """
+        if timeout is None:
+            timeout = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "5"))
+        if connections is None:
+            connections = int(os.getenv("WARMUP_CONNECTIONS", "4"))
+        timezones = {self.ghl_client.timezone}
+        if self.tenants is not None:
+            timezones.update(
+                tenant.timezone for tenant in self.tenants.tenants.values()
+            )
+        for timezone_str in timezones - {None}:
+            offset_table(timezone_str)
+
+        async def connect_ghl():
+            # Any status will do; the connection stays in the keep-alive pool
+            await self.http_client.head(self.ghl_client.base_url)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            asyncio.wait_for(self.chat_gpt_agent.warm_up(), timeout),
+            *(asyncio.wait_for(connect_ghl(), timeout) for _ in range(connections)),
+            return_exceptions=True,
+        )
+        failures = [result for result in results if isinstance(result, BaseException)]
+        for failure in failures[:1]:
+            logger.warning("Warm-up failed: %r", failure)
+        logger.info(
+            "Warm-up finished in %.0f ms (%d of %d connections)",
+            (time.perf_counter() - started) * 1000,
+            len(results) - len(failures),
+            len(results),
+        )
+
+    async def shutdown(self):
+        for _, slot_prefetcher in self._all_clients():
+            if slot_prefetcher is not None:
+                await slot_prefetcher.stop()
+        if self.chat_gpt_agent is not None:
+            await self.chat_gpt_agent.close()
+        if self.date_cache is not None:
+            self.date_cache.close()
+        await close_http_client()
+        if self.cache_backend is not None:
+            await self.cache_backend.close()
+        self.http_client = None
+        self.cache_backend = None
+        self.slot_cache = None
+        self.date_cache = None
+        self.ghl_client = None
+        self.chat_gpt_agent = None
+        self.slot_prefetcher = None
+        self.booking_idempotency = None
+        self.tenants = None
+        self.tool_settings = None
+        self.limiters = {}
+        self.resilience = {}
+        self._tenant_clients = {}
+        logger.info("Registry stopped")
+
+    def _create_clients(self, tenant):
+        ghl_client = GoHighLevelClient(
+            http_client=self.http_client,
+            slot_cache=self.slot_cache,
+            tenant=tenant,
+            limiter=self.limiters["ghl"],
+            resilience=self.resilience["ghl"],
+        )
+        slot_prefetcher = None
+        configured = ghl_client.calendar_id and ghl_client.auth_token
+        if configured and slot_prefetch_enabled():
+            slot_prefetcher = SlotPrefetcher(ghl_client, timezone=ghl_client.timezone)
+            ghl_client.invalidation_callbacks.append(slot_prefetcher.invalidate)
+        return ghl_client, slot_prefetcher
+
+    def _on_slot_invalidation(self, tenant_id, calendar_id, day):
+        for ghl_client, slot_prefetcher in self._all_clients():
+            if (
+                slot_prefetcher is not None
+                and ghl_client.tenant_id == tenant_id
+                and ghl_client.calendar_id == calendar_id
+            ):
+                slot_prefetcher.invalidate(day)
+
+    async def clients_for(self, webhook):
+        """
+        Returns the clients of the tenant a webhook belongs to.
+
+        Args:
+            webhook (Webhook): The parsed request, carrying its assistant and phone
+                number ids.
+
+        Returns:
+            tuple: (GoHighLevelClient, SlotPrefetcher or None). Without TENANTS_FILE
+            every request uses the calendar configured in the environment.
+
+        Raises:
+            HTTPException: 404 if TENANTS_FILE is set, no tenant claims the webhook
+                and the file names no default tenant.
+        """
+        if self.tenants is None:
+            return self.ghl_client, self.slot_prefetcher
+        tenant = self.tenants.resolve(webhook.assistant_id, webhook.phone_number_id)
+        if tenant is None:
+            logger.warning(
+                "No tenant for assistant %s, phone number %s",
+                webhook.assistant_id,
+                webhook.phone_number_id,
+            )
+            raise HTTPException(
+                status_code=404,
+                detail="No calendar is configured for this assistant or phone number",
+            )
+        clients = self._tenant_clients.get(tenant.id)
+        if clients is None:
+            # Stored before the first await, so concurrent requests share one client
+            clients = self._tenant_clients[tenant.id] = self._create_clients(tenant)
+            logger.info("Created clients for tenant %s", tenant.id)
+            if clients[1] is not None:
+                await clients[1].start()
+        return clients
+
+    def _all_clients(self):
+        clients = list(self._tenant_clients.values())
+        if self.ghl_client is not None:
+            clients.insert(0, (self.ghl_client, self.slot_prefetcher))
+        return clients
+
+    def all_ghl_clients(self):
+        return [ghl_client for ghl_client, _ in self._all_clients()]
+
+    def stats(self):
+        """Returns the counters of the shared components, for /metrics."""
+        stats = {"date_parser": date_parser.stats()}
+        if self.slot_cache is not None:
+            stats["slot_cache"] = self.slot_cache.stats()
+        if self.date_cache is not None:
+            stats["date_cache"] = self.date_cache.stats()
+        if self.chat_gpt_agent is not None:
+            stats["llm"] = self.chat_gpt_agent.stats()
+        if self.booking_idempotency is not None:
+            stats["booking_idempotency"] = self.booking_idempotency.stats()
+        if self.limiters:
+            stats["limiter"] = {
+                name: limiter.stats() for name, limiter in self.limiters.items()
+            }
+        if self.resilience:
+            stats["resilience"] = {
+                name: policy.stats() for name, policy in self.resilience.items()
+            }
+        clients = self._all_clients()
+        if clients:
+            # Summed over tenants, so /metrics does not grow with the tenant count
+            stats["slot_flight"] = _sum_stats(
+                ghl_client.slot_flight.stats() for ghl_client, _ in clients
+            )
+        slot_prefetchers = [
+            slot_prefetcher for _, slot_prefetcher in clients if slot_prefetcher
+        ]
+        if slot_prefetchers:
+            stats["slot_prefetch"] = _sum_stats(
+                slot_prefetcher.stats() for slot_prefetcher in slot_prefetchers
+            )
+        if self.tenants is not None:
+            stats["tenants"] = {
+                "configured": len(self.tenants),
+                "active": len(self._tenant_clients),
+            }
+        return stats
+
+
+def _sum_stats(all_stats):
+    """Adds up counters; ages take the maximum, i.e. the stalest."""
+    total = {}
+    for stats in all_stats:
+        for name, value in stats.items():
+            if name.endswith("age_seconds"):
+                total[name] = max(total.get(name, value), value)
+            else:
+                total[name] = total.get(name, 0) + value
+    return total
+
+
+def get_registry(request: Request) -> Registry:
+    return request.app.state.registry
+
+
+def get_chat_gpt_agent(request: Request) -> ChatGPTAgent:
+    return get_registry(request).chat_gpt_agent
+
+
+def get_date_cache(request: Request) -> DateExtractionCache:
+    return get_registry(request).date_cache
@@ -0,0 +1,349 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+UNAVAILABLE_MESSAGE = (
+    "The scheduling service is temporarily unavailable. Please try again shortly."
+)
+
+# Response status codes worth another attempt
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+
+class CircuitBreaker:
+    """
+    Fails fast while an upstream is down.
+
+    After `failure_threshold` consecutive failed attempts the breaker opens and calls
+    are refused for `reset_timeout` seconds. Then one probe is let through (half-open):
+    its success closes the breaker, its failure opens it again. A threshold of 0
+    disables the breaker.
+
+    Args:
+        name (str): Upstream name used in logs.
+        failure_threshold (int): Consecutive failures that open the breaker.
+        reset_timeout (float): Seconds the breaker stays open before probing.
+        clock (callable): Monotonic clock returning seconds (default: time.monotonic).
+    """
+
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0, clock=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock or time.monotonic
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self.opens = 0
+        self.short_circuited = 0
+
+    def allow(self):
+        """
+        Raises:
+            HTTPException: 503 while the breaker is open, or a probe is already out.
+        """
+        if self.state == self.CLOSED:
+            return
+        if (
+            self.state == self.OPEN
+            and self.clock() - self.opened_at >= self.reset_timeout
+        ):
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        self.short_circuited += 1
+        raise HTTPException(status_code=503, detail=UNAVAILABLE_MESSAGE)
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info("%s circuit breaker closed", self.name)
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def cancel_probe(self):
+        """Lets another probe through after a half-open attempt was cancelled."""
+        if self.state == self.HALF_OPEN:
+            self._probing = False
+
+    def record_failure(self):
+        if self.failure_threshold <= 0:
+            return
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.opens += 1
+                logger.warning(
+                    "%s circuit breaker opened after %s failures",
+                    self.name,
+                    self.failures,
+                )
+            self.state = self.OPEN
+            self.opened_at = self.clock()
+            self._probing = False
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "opens": self.opens,
+            "short_circuited": self.short_circuited,
+        }
+
+
+class Resilience:
+    """
+    Retries, hedging and a circuit breaker around calls to one upstream.
+
+    call() runs an attempt function under a total deadline. Failed attempts of
+    idempotent calls are retried with full-jitter exponential backoff while the
+    deadline leaves room; a Retry-After header longer than the backoff is honoured.
+    Non-idempotent calls (bookings) are only retried when the attempt failed before
+    the request was sent. Hedged calls start a second attempt when the first has not
+    answered after the observed p95 latency, and take whichever succeeds first.
+
+    Args:
+        name (str): Upstream name used in logs and stats.
+        attempts (int): Attempts per call, including the first.
+        base_delay (float): Backoff before the first retry, in seconds.
+        max_delay (float): Cap of a single backoff, in seconds.
+        deadline (float): Seconds a call may take across all attempts, or None.
+        hedge (bool): Allow hedging for calls that ask for it.
+        hedge_delay (float): Fixed hedge delay in seconds; None uses the p95.
+        retryable_errors (tuple): Exceptions worth another attempt.
+        unsent_errors (tuple): Exceptions raised before the request left, so even
+            non-idempotent calls may retry them.
+        breaker (CircuitBreaker): Breaker consulted before every attempt.
+    """
+
+    def __init__(
+        self,
+        name,
+        attempts=1,
+        base_delay=0.1,
+        max_delay=1.0,
+        deadline=None,
+        hedge=False,
+        hedge_delay=None,
+        retryable_errors=(),
+        unsent_errors=(),
+        breaker=None,
+    ):
+        self.name = name
+        self.attempts = max(attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.retryable_errors = tuple(retryable_errors) + (TimeoutError,)
+        self.unsent_errors = tuple(unsent_errors)
+        self.breaker = breaker or CircuitBreaker(name, failure_threshold=0)
+        self._latencies = deque(maxlen=256)
+        self._p95 = None
+        self.calls = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.deadline_exceeded = 0
+
+    @classmethod
+    def from_env(
+        cls,
+        name,
+        prefix,
+        attempts,
+        deadline,
+        retryable_errors=(),
+        unsent_errors=(),
+    ):
+        """
+        Builds the policy from <prefix>_* environment variables:
+            <prefix>_RETRY_ATTEMPTS (int): Attempts per call, including the first.
+            <prefix>_RETRY_BASE_DELAY_SECONDS (float): First backoff (default: 0.1).
+            <prefix>_RETRY_MAX_DELAY_SECONDS (float): Backoff cap (default: 1.0).
+            <prefix>_DEADLINE_SECONDS (float): Budget per call across all attempts.
+            <prefix>_HEDGE (bool): Hedge calls that allow it (default: false).
+            <prefix>_HEDGE_DELAY_SECONDS (float): Fixed hedge delay instead of the p95.
+            <prefix>_BREAKER_THRESHOLD (int): Consecutive failures that open the
+                breaker; 0 disables it (default: 5).
+            <prefix>_BREAKER_RESET_SECONDS (float): Open time before a probe (default: 30).
+        """
+        hedge_delay = os.getenv(f"{prefix}_HEDGE_DELAY_SECONDS")
+        return cls(
+            name,
+            attempts=int(os.getenv(f"{prefix}_RETRY_ATTEMPTS", str(attempts))),
+            base_delay=float(os.getenv(f"{prefix}_RETRY_BASE_DELAY_SECONDS", "0.1")),
+            max_delay=float(os.getenv(f"{prefix}_RETRY_MAX_DELAY_SECONDS", "1.0")),
+            deadline=float(os.getenv(f"{prefix}_DEADLINE_SECONDS", str(deadline))),
+            hedge=os.getenv(f"{prefix}_HEDGE", "false").lower() in ("1", "true", "yes"),
+            hedge_delay=float(hedge_delay) if hedge_delay else None,
+            retryable_errors=retryable_errors,
+            unsent_errors=unsent_errors,
+            breaker=CircuitBreaker(
+                name,
+                failure_threshold=int(os.getenv(f"{prefix}_BREAKER_THRESHOLD", "5")),
+                reset_timeout=float(os.getenv(f"{prefix}_BREAKER_RESET_SECONDS", "30")),
+            ),
+        )
+
+    def _failed(self, outcome):
+        """True if an attempt's outcome (result or exception) is worth retrying."""
+        if isinstance(outcome, BaseException):
+            return isinstance(outcome, self.retryable_errors)
+        return getattr(outcome, "status_code", None) in RETRYABLE_STATUS
+
+    def _retry_after(self, outcome):
+        response = outcome if not isinstance(outcome, BaseException) else None
+        response = response or getattr(outcome, "response", None)
+        headers = getattr(response, "headers", None)
+        try:
+            return float(headers.get("retry-after")) if headers else None
+        except (TypeError, ValueError):
+            return None
+
+    def _observe(self, latency):
+        self._latencies.append(latency)
+        if self._p95 is None or len(self._latencies) % 32 == 0:
+            if len(self._latencies) >= 20:
+                ordered = sorted(self._latencies)
+                self._p95 = ordered[int(len(ordered) * 0.95) - 1]
+
+    def current_hedge_delay(self):
+        """The fixed hedge delay, or the observed p95 once there are enough samples."""
+        return self.hedge_delay if self.hedge_delay is not None else self._p95
+
+    async def _attempt(self, send):
+        self.breaker.allow()
+        started = time.perf_counter()
+        try:
+            result = await send()
+        except asyncio.CancelledError:
+            self.breaker.cancel_probe()
+            raise
+        except Exception as exc:
+            if isinstance(exc, self.retryable_errors):
+                self.breaker.record_failure()
+            elif getattr(exc, "response", None) is not None:
+                self.breaker.record_success()  # The upstream answered, with an error
+            else:
+                # Raised locally (a shed permit, missing configuration): the upstream
+                # was never asked, so its health is unknown and a probe is still owed
+                self.breaker.cancel_probe()
+            raise
+        if self._failed(result):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+            self._observe(time.perf_counter() - started)
+        return result
+
+    async def _hedged_attempt(self, send, hedge_delay):
+        first = asyncio.ensure_future(self._attempt(send))
+        done, _ = await asyncio.wait({first}, timeout=hedge_delay)
+        if done:
+            return first.result()
+        self.hedges += 1
+        pending = {first, asyncio.ensure_future(self._attempt(send))}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None and not self._failed(task.result()):
+                        if task is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+            return task.result()  # Both failed; report the later one
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def call(self, send, idempotent=True, hedge=False):
+        """
+        Runs `send()` with retries, hedging and the circuit breaker.
+
+        Args:
+            send: A zero-argument callable returning an awaitable for one attempt.
+            idempotent (bool): Whether a failed attempt may be repeated.
+            hedge (bool): Whether a slow attempt may be hedged (idempotent calls only).
+
+        Returns:
+            The result of the first successful attempt, or of the last attempt when
+            every attempt answered with a retryable status.
+
+        Raises:
+            HTTPException: 503 while the circuit breaker is open.
+            Exception: The last attempt's exception when retries run out.
+        """
+        self.calls += 1
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + self.deadline if self.deadline else None
+        attempt = 0
+        while True:
+            attempt += 1
+            hedge_delay = self.current_hedge_delay()
+            try:
+                async with asyncio.timeout_at(deadline_at):
+                    if hedge and self.hedge and idempotent and hedge_delay:
+                        outcome = await self._hedged_attempt(send, hedge_delay)
+                    else:
+                        outcome = await self._attempt(send)
+            except HTTPException:
+                raise
+            except TimeoutError as exc:
+                self.deadline_exceeded += 1
+                self.breaker.record_failure()
+                outcome = exc
+            except Exception as exc:
+                outcome = exc
+
+            if not self._failed(outcome):
+                if isinstance(outcome, BaseException):
+                    raise outcome
+                return outcome
+            retryable = idempotent or isinstance(outcome, self.unsent_errors)
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+            retry_after = self._retry_after(outcome)
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            out_of_time = deadline_at is not None and loop.time() + delay >= deadline_at
+            if attempt >= self.attempts or not retryable or out_of_time:
+                if isinstance(outcome, BaseException):
+                    raise outcome
+                return outcome
+            self.retries += 1
+            logger.info(
+                "%s attempt %s failed (%r), retrying in %.3fs",
+                self.name,
+                attempt,
+                getattr(outcome, "status_code", outcome),
+                delay,
+            )
+            await asyncio.sleep(delay)
+
+    def stats(self):
+        p95 = self.current_hedge_delay()
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "deadline_exceeded": self.deadline_exceeded,
+            "hedge_delay_ms": round(p95 * 1000, 1) if p95 is not None else -1,
+            "breaker": self.breaker.stats(),
+        }
@@ -0,0 +1,207 @@
+import heapq
+import logging
+from array import array
+from bisect import bisect_left, bisect_right
+from calendar import isleap
+from datetime import datetime
+from functools import lru_cache
+
+from utils.tz import days_from_civil
+
+logger = logging.getLogger(__name__)
+
+ONE_HOUR_MS = 3_600_000
+# first_slots offers one slot on each of this many dates
+FIRST_SLOT_DAYS = 2
+# Indexed by month; February is checked against the leap year separately
+DAYS_IN_MONTH = (0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+@lru_cache(maxsize=65536)
+def slot_epoch_ms(slot_str):
+    """
+    Converts a GoHighLevel slot string to epoch milliseconds.
+
+    Slots in the "YYYY-MM-DDTHH:MM:SS+HH:MM" form GoHighLevel returns are converted
+    with integer arithmetic once their fields are checked to be in range; anything
+    else goes through datetime.fromisoformat, which rejects out-of-range fields.
+    Results are memoized because the same slot strings come back on every request.
+
+    Raises:
+        ValueError: If the string is not a timezone-aware ISO 8601 datetime.
+    """
+    if (
+        len(slot_str) == 25
+        and slot_str[4] == slot_str[7] == "-"
+        and slot_str[10] in "T "
+        and slot_str[13] == slot_str[16] == slot_str[22] == ":"
+        and slot_str[19] in "+-"
+    ):
+        fields = (
+            slot_str[0:4],
+            slot_str[5:7],
+            slot_str[8:10],
+            slot_str[11:13],
+            slot_str[14:16],
+            slot_str[17:19],
+            slot_str[20:22],
+            slot_str[23:25],
+        )
+        digits = "".join(fields)
+        if digits.isascii() and digits.isdigit():
+            year, month, day, hour, minute, second, offset_hours, offset_minutes = map(
+                int, fields
+            )
+            if (
+                year >= 1
+                and 1 <= month <= 12
+                and 1 <= day <= DAYS_IN_MONTH[month]
+                and (month != 2 or day < 29 or isleap(year))
+                and hour < 24
+                and minute < 60
+                and second < 60
+                and offset_hours < 24
+                and offset_minutes < 60
+            ):
+                offset = offset_hours * 3600 + offset_minutes * 60
+                seconds = (
+                    days_from_civil(year, month, day) * 86400
+                    + hour * 3600
+                    + minute * 60
+                    + second
+                )
+                return (
+                    seconds - offset if slot_str[19] == "+" else seconds + offset
+                ) * 1000
+    parsed = datetime.fromisoformat(slot_str)
+    if parsed.tzinfo is None:
+        raise ValueError(f"Slot has no timezone offset: {slot_str}")
+    return int(parsed.timestamp() * 1000)
+
+
+class SlotIndex:
+    """
+    A GoHighLevel slot response parsed once into sorted epoch arrays per day.
+
+    Each day keeps its slot strings in API order next to an `array('q')` of their
+    epoch milliseconds sorted ascending, so selections are binary searches instead of
+    a strptime per slot. Days are parsed on first use, so picking from the first two
+    days of a long response does not pay for the rest.
+
+    Args:
+        slot_data (dict): A dictionary containing dates as keys and slot lists as values.
+    """
+
+    __slots__ = ("dates", "raw_slots", "_epochs", "_sorted_slots")
+
+    def __init__(self, slot_data):
+        self.dates = []
+        self.raw_slots = {}
+        self._epochs = {}
+        self._sorted_slots = {}
+        for date, slots_info in slot_data.items():
+            if isinstance(slots_info, dict) and "slots" in slots_info:
+                self.dates.append(date)
+                self.raw_slots[date] = slots_info["slots"]
+
+    def _parse_day(self, date):
+        parsed = []
+        for slot_str in self.raw_slots.get(date, ()):
+            try:
+                parsed.append((slot_epoch_ms(slot_str), slot_str))
+            except ValueError:
+                logger.warning("Invalid slot format: %s", slot_str)
+        parsed.sort()
+        epochs = array("q", (epoch for epoch, _ in parsed))
+        self._epochs[date] = epochs
+        self._sorted_slots[date] = [slot_str for _, slot_str in parsed]
+        return epochs
+
+    def __len__(self):
+        return sum(len(slots) for slots in self.raw_slots.values())
+
+    def epochs(self, date):
+        """Returns the sorted epoch milliseconds of `date`'s valid slots."""
+        epochs = self._epochs.get(date)
+        if epochs is None:
+            epochs = self._parse_day(date)
+        return epochs
+
+    def first_at_or_after(self, date, epoch_ms):
+        """Returns the first slot of `date` at or after epoch_ms, or None."""
+        epochs = self.epochs(date)
+        if not epochs:
+            return None
+        position = bisect_left(epochs, epoch_ms)
+        if position == len(epochs):
+            return None
+        return self._sorted_slots[date][position]
+
+    def slots_in_range(self, start_epoch_ms, end_epoch_ms, date=None):
+        """Returns the slots inside [start_epoch_ms, end_epoch_ms], for one date or all of them."""
+        selected = []
+        for current_date in [date] if date is not None else self.dates:
+            epochs = self.epochs(current_date)
+            if not epochs:
+                continue
+            low = bisect_left(epochs, start_epoch_ms)
+            high = bisect_right(epochs, end_epoch_ms)
+            selected.extend(self._sorted_slots[current_date][low:high])
+        return selected
+
+    def first_and_third(self, date):
+        """Returns the first and third slots of `date`, as many as exist."""
+        self.epochs(date)
+        return self._sorted_slots.get(date, [])[0:3:2]
+
+    def first_slots(self, current_epoch_ms, gap_ms=ONE_HOUR_MS):
+        """
+        Picks the slots to offer, with the same rules as utils.ghl.get_first_slots.
+
+        For the first date: the first slot at least `gap_ms` after current_epoch_ms,
+        or its last slot if none is that late. For the second date: its first slot.
+
+        Returns:
+            list: Tuples of (date, slot_str).
+        """
+        first_slots = []
+        for date in self.dates[:FIRST_SLOT_DAYS]:
+            raw_slots = self.raw_slots[date]
+            if not raw_slots:
+                logger.info("No slots available for date: %s", date)
+                continue
+            if date == self.dates[0]:
+                slot_str = self.first_at_or_after(date, current_epoch_ms + gap_ms)
+                if slot_str is None:
+                    logger.info("No slots available for date: %s", date)
+                    slot_str = raw_slots[-1]
+            else:
+                slot_str = raw_slots[0]
+            first_slots.append((date, slot_str))
+        return first_slots
+
+    def nearest(self, epoch_ms, count):
+        """
+        Returns the `count` slots closest to epoch_ms, earlier or later, in time order.
+
+        A slot at exactly epoch_ms is skipped: it is the one being replaced.
+        """
+        candidates = (
+            (abs(slot_epoch - epoch_ms), slot_epoch, slot_str)
+            for date in self.dates
+            for slot_epoch, slot_str in zip(self.epochs(date), self._sorted_slots[date])
+            if slot_epoch != epoch_ms
+        )
+        closest = heapq.nsmallest(count, candidates)
+        return [
+            slot_str for _, _, slot_str in sorted(closest, key=lambda item: item[1])
+        ]
+
+    def trim(self, start_epoch_ms, end_epoch_ms):
+        """Returns a slot response holding only the dates and slots inside the window."""
+        trimmed = {}
+        for date in self.dates:
+            slots = self.slots_in_range(start_epoch_ms, end_epoch_ms, date)
+            if slots:
+                trimmed[date] = {"slots": slots}
+        return trimmed
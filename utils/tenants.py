@@ -0,0 +1,193 @@
+import json
+import logging
+import os
+from datetime import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUSINESS_HOURS = (time(8, 0), time(17, 0))
+
+
+def parse_business_hours(business_hours):
+    """
+    Parses {"start": "HH:MM", "end": "HH:MM"} into a (start, end) pair of times.
+
+    Raises:
+        ValueError: If a time is malformed or the day does not end after it starts.
+    """
+    if not business_hours:
+        return DEFAULT_BUSINESS_HOURS
+    start = time.fromisoformat(business_hours.get("start", "08:00"))
+    end = time.fromisoformat(business_hours.get("end", "17:00"))
+    if end <= start:
+        raise ValueError(f"Business hours end before they start: {business_hours}")
+    return start, end
+
+
+class Tenant:
+    """
+    One customer calendar served by this process.
+
+    Args:
+        id (str): Stable tenant name, used for logs, metrics and client caching.
+        calendar_id (str): GoHighLevel calendar id.
+        auth_token (str): GoHighLevel API token.
+        timezone (str): Timezone the calendar's slots are requested in.
+        business_hours (tuple): (start, end) times of the business day.
+        assistant_ids (list): Vapi assistant ids routed to this tenant.
+        phone_number_ids (list): Vapi phone number ids routed to this tenant.
+    """
+
+    __slots__ = (
+        "id",
+        "calendar_id",
+        "auth_token",
+        "timezone",
+        "business_hours",
+        "assistant_ids",
+        "phone_number_ids",
+    )
+
+    def __init__(
+        self,
+        id,
+        calendar_id,
+        auth_token,
+        timezone="America/New_York",
+        business_hours=DEFAULT_BUSINESS_HOURS,
+        assistant_ids=(),
+        phone_number_ids=(),
+    ):
+        self.id = id
+        self.calendar_id = calendar_id
+        self.auth_token = auth_token
+        self.timezone = timezone
+        self.business_hours = business_hours
+        self.assistant_ids = list(assistant_ids)
+        self.phone_number_ids = list(phone_number_ids)
+
+    def __repr__(self):
+        return f"Tenant(id={self.id!r}, calendar_id={self.calendar_id!r})"
+
+    @classmethod
+    def from_dict(cls, entry):
+        """
+        Builds a tenant from one entry of the tenants file.
+
+        The token is read from `auth_token`, or from the environment variable named by
+        `auth_token_env` so secrets can stay out of the file.
+
+        Raises:
+            ValueError: If the entry is missing its id, calendar or token.
+        """
+        auth_token = entry.get("auth_token")
+        if not auth_token and entry.get("auth_token_env"):
+            auth_token = os.getenv(entry["auth_token_env"])
+        missing = [
+            field
+            for field, value in (
+                ("id", entry.get("id")),
+                ("calendar_id", entry.get("calendar_id")),
+                ("auth_token", auth_token),
+            )
+            if not value
+        ]
+        if missing:
+            raise ValueError(
+                f"Tenant {entry.get('id')!r} is missing: {', '.join(missing)}"
+            )
+        return cls(
+            id=entry["id"],
+            calendar_id=entry["calendar_id"],
+            auth_token=auth_token,
+            timezone=entry.get("timezone", "America/New_York"),
+            business_hours=parse_business_hours(entry.get("business_hours")),
+            assistant_ids=entry.get("assistant_ids", ()),
+            phone_number_ids=entry.get("phone_number_ids", ()),
+        )
+
+
+class TenantDirectory:
+    """
+    Resolves the tenant of a webhook from its Vapi assistant or phone number id.
+
+    Args:
+        tenants (list): The configured Tenant objects.
+        default (str): Id of the tenant serving webhooks no tenant claims, or None to
+            leave them unresolved.
+
+    Raises:
+        ValueError: If two tenants claim the same id, assistant id or phone number id,
+            or the default tenant is not one of them.
+    """
+
+    def __init__(self, tenants, default=None):
+        self.tenants = {}
+        self._by_assistant_id = {}
+        self._by_phone_number_id = {}
+        for tenant in tenants:
+            self._claim(self.tenants, tenant.id, tenant, "tenant id")
+            for assistant_id in tenant.assistant_ids:
+                self._claim(self._by_assistant_id, assistant_id, tenant, "assistant id")
+            for phone_number_id in tenant.phone_number_ids:
+                self._claim(
+                    self._by_phone_number_id, phone_number_id, tenant, "phone number id"
+                )
+        if default is not None and default not in self.tenants:
+            raise ValueError(f"Default tenant {default!r} is not configured")
+        self.default = self.tenants.get(default)
+
+    @staticmethod
+    def _claim(index, key, tenant, kind):
+        if key in index:
+            raise ValueError(
+                f"Duplicate {kind} {key!r} in tenants {index[key].id!r} and {tenant.id!r}"
+            )
+        index[key] = tenant
+
+    def __len__(self):
+        return len(self.tenants)
+
+    def resolve(self, assistant_id=None, phone_number_id=None):
+        """
+        Returns the tenant owning the assistant id, else the phone number id, else the
+        default tenant, or None when there is no default.
+        """
+        tenant = self._by_assistant_id.get(assistant_id)
+        if tenant is None:
+            tenant = self._by_phone_number_id.get(phone_number_id)
+        if tenant is None:
+            tenant = self.default
+        return tenant
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads tenants from a JSON file of the form:
+
+            {"tenants": [{"id": "smith-law", "calendar_id": "...",
+                          "auth_token_env": "SMITH_LAW_GHL_TOKEN",
+                          "timezone": "America/Chicago",
+                          "business_hours": {"start": "09:00", "end": "18:00"},
+                          "assistant_ids": ["..."], "phone_number_ids": ["..."]}],
+             "default_tenant": "smith-law"}
+
+        `default_tenant` is optional; without it, webhooks no tenant claims are
+        rejected.
+        """
+        with open(path, encoding="utf-8") as tenants_file:
+            config = json.load(tenants_file)
+        directory = cls(
+            [Tenant.from_dict(entry) for entry in config["tenants"]],
+            default=config.get("default_tenant"),
+        )
+        logger.info("Loaded %s tenants from %s", len(directory), path)
+        return directory
+
+    @classmethod
+    def from_env(cls):
+        """Loads the file named by TENANTS_FILE, or returns None when it is not set."""
+        path = os.getenv("TENANTS_FILE")
+        if not path:
+            return None
+        return cls.load(path)
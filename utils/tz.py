@@ -0,0 +1,204 @@
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+DEFAULT_TIMEZONE = "America/New_York"
+
+# Years covered by the precomputed offset tables; other instants ask zoneinfo
+FIRST_YEAR = 2000
+LAST_YEAR = 2060
+
+DAY_SECONDS = 86400
+
+
+def days_from_civil(year, month, day):
+    """Days since 1970-01-01 for a proleptic Gregorian date (Howard Hinnant's algorithm)."""
+    year -= month <= 2
+    era = (year if year >= 0 else year - 399) // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def civil_from_days(days):
+    """Inverse of days_from_civil: returns (year, month, day)."""
+    days += 719468
+    era = (days if days >= 0 else days - 146096) // 146097
+    day_of_era = days - era * 146097
+    year_of_era = (
+        day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096
+    ) // 365
+    day_of_year = day_of_era - (
+        365 * year_of_era + year_of_era // 4 - year_of_era // 100
+    )
+    month_index = (5 * day_of_year + 2) // 153
+    day = day_of_year - (153 * month_index + 2) // 5 + 1
+    month = month_index + 3 if month_index < 10 else month_index - 9
+    return year_of_era + era * 400 + (month <= 2), month, day
+
+
+@lru_cache(maxsize=64)
+def get_zone(timezone_str=DEFAULT_TIMEZONE):
+    """Returns the (cached) ZoneInfo for a timezone name."""
+    return ZoneInfo(timezone_str)
+
+
+class OffsetTable:
+    """
+    The UTC offsets of one timezone between its transitions (DST changes).
+
+    The transition instants from FIRST_YEAR to LAST_YEAR are found once, so
+    converting between epoch time and local wall time is a binary search plus integer
+    arithmetic, with no datetime objects or strings in between. Instants outside the
+    covered years are handed to zoneinfo.
+
+    Args:
+        timezone_str (str): IANA timezone name.
+    """
+
+    __slots__ = ("zone", "start", "end", "transitions", "offsets", "local_ends")
+
+    def __init__(self, timezone_str):
+        self.zone = get_zone(timezone_str)
+        self.start = days_from_civil(FIRST_YEAR, 1, 1) * DAY_SECONDS
+        self.end = days_from_civil(LAST_YEAR + 1, 1, 1) * DAY_SECONDS
+        # Transitions are months apart, so weekly samples cannot miss one
+        self.transitions = []
+        self.offsets = [self._zone_offset(self.start)]
+        previous = self.start
+        for instant in range(self.start + 7 * DAY_SECONDS, self.end, 7 * DAY_SECONDS):
+            offset = self._zone_offset(instant)
+            if offset != self.offsets[-1]:
+                self.transitions.append(self._find_transition(previous, instant))
+                self.offsets.append(offset)
+            previous = instant
+        # Local wall time at which each offset stops applying
+        self.local_ends = [
+            transition + offset
+            for transition, offset in zip(self.transitions, self.offsets)
+        ]
+
+    def _zone_offset(self, epoch_seconds):
+        return int(
+            datetime.fromtimestamp(epoch_seconds, self.zone).utcoffset().total_seconds()
+        )
+
+    def _find_transition(self, low, high):
+        """Returns the first second in (low, high] with the offset in force at high."""
+        offset = self._zone_offset(high)
+        while high - low > 1:
+            middle = (low + high) // 2
+            if self._zone_offset(middle) == offset:
+                high = middle
+            else:
+                low = middle
+        return high
+
+    def offset(self, epoch_seconds):
+        """Returns the UTC offset in seconds in force at an epoch instant."""
+        if not self.start <= epoch_seconds < self.end:
+            return self._zone_offset(epoch_seconds)
+        return self.offsets[bisect_right(self.transitions, epoch_seconds)]
+
+    def local_seconds(self, epoch_seconds):
+        """Returns an epoch instant as seconds since 1970-01-01 00:00 local wall time."""
+        return epoch_seconds + self.offset(epoch_seconds)
+
+    def epoch_seconds(self, local_seconds):
+        """
+        Returns the epoch instant of a local wall time given as seconds since
+        1970-01-01 00:00, resolving gaps and folds like zoneinfo does with fold=0:
+        the offset in force before the transition applies.
+        """
+        if not self.start <= local_seconds < self.end:
+            year, month, day = civil_from_days(local_seconds // DAY_SECONDS)
+            seconds = local_seconds % DAY_SECONDS
+            wall = datetime(
+                year, month, day, seconds // 3600, seconds // 60 % 60, seconds % 60
+            )
+            return int(wall.replace(tzinfo=self.zone).timestamp())
+        index = bisect_right(self.local_ends, local_seconds)
+        if index and local_seconds < self.transitions[index - 1] + self.offsets[index]:
+            index -= 1  # Skipped by a forward transition
+        return local_seconds - self.offsets[index]
+
+
+@lru_cache(maxsize=64)
+def offset_table(timezone_str=DEFAULT_TIMEZONE):
+    """Returns the (cached) OffsetTable of a timezone."""
+    return OffsetTable(timezone_str)
+
+
+def now_epoch_ms():
+    return int(datetime.now(timezone.utc).timestamp() * 1000)
+
+
+def local_to_epoch_ms(day, wall_time=time.min, timezone_str=DEFAULT_TIMEZONE):
+    """Returns the epoch milliseconds of a wall-clock date and time in a timezone."""
+    local_seconds = (
+        days_from_civil(day.year, day.month, day.day) * DAY_SECONDS
+        + wall_time.hour * 3600
+        + wall_time.minute * 60
+        + wall_time.second
+    )
+    return (
+        offset_table(timezone_str).epoch_seconds(local_seconds) * 1000
+        + wall_time.microsecond // 1000
+    )
+
+
+def epoch_ms_to_local(epoch_ms, timezone_str=DEFAULT_TIMEZONE):
+    """
+    Splits an epoch instant into its local calendar fields.
+
+    Returns:
+        tuple: (date, seconds_since_local_midnight, utc_offset_seconds)
+    """
+    epoch_seconds = epoch_ms // 1000
+    offset = offset_table(timezone_str).offset(epoch_seconds)
+    days, seconds = divmod(epoch_seconds + offset, DAY_SECONDS)
+    return date(*civil_from_days(days)), seconds, offset
+
+
+def epoch_ms_to_date(epoch_ms, timezone_str=DEFAULT_TIMEZONE):
+    """Returns the calendar date of an epoch timestamp (milliseconds) in the given timezone."""
+    days = offset_table(timezone_str).local_seconds(epoch_ms // 1000) // DAY_SECONDS
+    return date(*civil_from_days(days))
+
+
+def epoch_ms_to_datetime(epoch_ms, timezone_str=DEFAULT_TIMEZONE):
+    """Returns an epoch timestamp (milliseconds) as an aware datetime in the timezone."""
+    return datetime.fromtimestamp(epoch_ms / 1000, get_zone(timezone_str))
+
+
+def format_offset(offset_seconds):
+    """Formats a UTC offset in seconds as "+HH:MM"."""
+    sign = "-" if offset_seconds < 0 else "+"
+    hours, minutes = divmod(abs(offset_seconds) // 60, 60)
+    return f"{sign}{hours:02d}:{minutes:02d}"
+
+
+def epoch_ms_to_isoformat(epoch_ms, timezone_str=DEFAULT_TIMEZONE, sep="T"):
+    """Formats an epoch timestamp (milliseconds) as "YYYY-MM-DDTHH:MM:SS+HH:MM"."""
+    day, seconds, offset = epoch_ms_to_local(epoch_ms, timezone_str)
+    return (
+        f"{day.isoformat()}{sep}{seconds // 3600:02d}:{seconds // 60 % 60:02d}:"
+        f"{seconds % 60:02d}{format_offset(offset)}"
+    )
+
+
+def next_business_day_start_ms(
+    epoch_ms, timezone_str=DEFAULT_TIMEZONE, open_time=time(8, 0)
+):
+    """
+    Epoch version of utils.ghl.get_next_business_day(..., is_start_date=True): the
+    instant itself on a weekday, else the next Monday at `open_time`.
+    """
+    day, _, _ = epoch_ms_to_local(epoch_ms, timezone_str)
+    if day.weekday() < 5:
+        return epoch_ms
+    return local_to_epoch_ms(
+        day + timedelta(days=7 - day.weekday()), open_time, timezone_str
+    )